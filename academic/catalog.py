@@ -0,0 +1,191 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+from .models import Course, Department, Program, ProgramSemesterCourse
+
+
+VERSION_KEY = 'ums:catalog-version'
+
+CatalogDepartment = namedtuple('CatalogDepartment', ['id', 'name', 'code', 'head_id'])
+CatalogProgram = namedtuple('CatalogProgram', ['id', 'name', 'department_id', 'duration_years'])
+CatalogCourse = namedtuple('CatalogCourse', ['id', 'code', 'title', 'credits', 'department_id'])
+# One ProgramSemesterCourse row; ``id`` is the link's own primary key
+SemesterCourse = namedtuple('SemesterCourse', ['id', 'program_id', 'semester', 'course', 'is_elective'])
+
+JsonPayload = namedtuple('JsonPayload', ['body', 'etag'])
+
+
+def bump_catalog_version():
+    """
+    Make processes sharing the cache rebuild their catalog on next use;
+    others pick the change up once their snapshot is UMS_CATALOG_TTL old.
+    """
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Never fall back to a fixed value: after an eviction it could
+        # match a catalog some process built before the last change
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+class Catalog:
+    """
+    Immutable snapshot of departments, programs, courses and the
+    program/semester curriculum, loaded with one query per table. Lookups
+    return the tuples above sorted the way the pages list them.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.built_at = time.monotonic()
+        self.departments = {
+            row[0]: CatalogDepartment(*row)
+            for row in Department.objects.order_by('name', 'pk').values_list('pk', 'name', 'code', 'head_id')
+        }
+        self.programs = {
+            row[0]: CatalogProgram(*row)
+            for row in Program.objects.order_by('name', 'pk').values_list('pk', 'name', 'department_id', 'duration_years')
+        }
+        self.courses = {
+            row[0]: CatalogCourse(*row)
+            for row in Course.objects.order_by('code').values_list('pk', 'code', 'title', 'credits', 'department_id')
+        }
+
+        self._department_programs = defaultdict(list)
+        for program in self.programs.values():
+            self._department_programs[program.department_id].append(program)
+        self._department_courses = defaultdict(list)
+        for course in self.courses.values():
+            self._department_courses[course.department_id].append(course)
+
+        self._curriculum = defaultdict(list)
+        for pk, program_id, semester, course_id, is_elective in ProgramSemesterCourse.objects.order_by(
+            'semester', 'course__code'
+        ).values_list('pk', 'program_id', 'semester', 'course_id', 'is_elective'):
+            self._curriculum[program_id, semester].append(
+                SemesterCourse(pk, program_id, semester, self.courses[course_id], is_elective)
+            )
+        self._semesters = defaultdict(list)
+        for program_id, semester in self._curriculum:
+            self._semesters[program_id].append(semester)
+
+        self._json = {}
+        self._lock = threading.Lock()
+
+    def is_current(self, version):
+        return self.version == version and time.monotonic() - self.built_at < _ttl()
+
+    def department(self, pk):
+        return self.departments.get(_int(pk))
+
+    def program(self, pk):
+        return self.programs.get(_int(pk))
+
+    def course(self, pk):
+        return self.courses.get(_int(pk))
+
+    def programs_for(self, department_id):
+        """Programs of a department, by name"""
+        return tuple(self._department_programs.get(_int(department_id), ()))
+
+    def courses_for_department(self, department_id):
+        """Courses owned by a department, by code"""
+        return tuple(self._department_courses.get(_int(department_id), ()))
+
+    def semesters(self, program_id):
+        """Semester numbers of a program that have at least one course"""
+        return tuple(self._semesters.get(_int(program_id), ()))
+
+    def semester_courses(self, program_id, semester):
+        """Curriculum entries of one program semester, by course code"""
+        return tuple(self._curriculum.get((_int(program_id), _int(semester)), ()))
+
+    def tree(self):
+        """Every department with its programs, as ``{'department', 'programs'}`` dicts"""
+        return [
+            {'department': department, 'programs': list(self.programs_for(department.id))}
+            for department in self.departments.values()
+        ]
+
+    def semester_json(self, key, program_id, semester):
+        """
+        The courses of a program semester serialized once per catalog
+        version as ``{key: [{id, code, title}, ...]}``, with its ETag.
+        """
+        cache_key = (key, _int(program_id), _int(semester))
+        payload = self._json.get(cache_key)
+        if payload is None:
+            payload = json_payload({key: [
+                {'id': entry.course.id, 'code': entry.course.code, 'title': entry.course.title}
+                for entry in self.semester_courses(program_id, semester)
+            ]})
+            with self._lock:
+                self._json[cache_key] = payload
+        return payload
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+_catalog = None
+_build_lock = threading.Lock()
+
+
+def _ttl():
+    return getattr(settings, 'UMS_CATALOG_TTL', 60)
+
+
+def catalog():
+    """
+    The catalog for the current version. Each process keeps its snapshot
+    in memory and re-checks the version stamp, which the model signals
+    bump whenever a department, program, course or curriculum entry
+    changes. The stamp only reaches other processes through a shared
+    cache (see CACHES), so a snapshot is also rebuilt once it is
+    UMS_CATALOG_TTL seconds old.
+    """
+    global _catalog
+    version = _current_version()
+    current = _catalog
+    if current is not None and current.is_current(version):
+        return current
+    with _build_lock:
+        if _catalog is None or not _catalog.is_current(version):
+            _catalog = Catalog(version)
+        return _catalog
+
+
+def json_payload(data):
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return JsonPayload(body, quote_etag(hashlib.md5(body).hexdigest()))
+
+
+def json_etag_response(request, payload):
+    """
+    Serve pre-serialized JSON, answering a matching If-None-Match with 304.
+    Clients must revalidate, so a catalog change is seen on the next fetch.
+    """
+    if payload.etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(payload.body, content_type='application/json')
+    response['ETag'] = payload.etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+
+from .models import StudentResult, StudentSemesterGPA, UniversityExam
+from .results import bump_results_version
+
+
+CUMULATIVE_FIELDS = ['cumulative_credits', 'cumulative_grade_points', 'cgpa']
+
+TWO_PLACES = Decimal('0.01')
+ZERO = Decimal('0')
+
+
+def _average(points, credits):
+    return (points / credits).quantize(TWO_PLACES, rounding=ROUND_HALF_UP) if credits else ZERO
+
+
+def _batch_size():
+    return getattr(settings, 'UMS_GPA_BATCH_SIZE', 500)
+
+
+def _exam_totals(results):
+    """Credits attempted, credits earned and grade points per student, summed in the database"""
+    decimal = DecimalField(max_digits=9, decimal_places=1)
+    credits = F('exam_subject__course__credits')
+    grade_point = Case(
+        *[When(grade=grade, then=Value(points)) for grade, points in StudentResult.GRADE_POINTS.items()],
+        default=Value(0),
+    )
+    return results.values('student_id').annotate(
+        total_credits=Sum(credits, output_field=decimal),
+        earned_credits=Sum(Case(When(is_pass=True, then=credits), default=Value(0), output_field=decimal)),
+        total_points=Sum(credits * grade_point, output_field=decimal),
+    ).order_by()
+
+
+def _chunks(values, size):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _order(row, start_dates):
+    return row.semester, start_dates[row.exam_id], row.exam_id
+
+
+def _accumulate(student_ids, new_rows=()):
+    """
+    Recompute the running totals and CGPA of every GPA row of the given
+    students, in semester order, with ``new_rows`` (not saved yet) slotted
+    in. Returns the saved rows whose cumulative values changed.
+    """
+    pending = defaultdict(list)
+    for row in new_rows:
+        pending[row.student_id].append(row)
+
+    changed = []
+    for chunk in _chunks(sorted(student_ids), _batch_size()):
+        by_student = defaultdict(list)
+        start_dates = {}
+        for row in StudentSemesterGPA.objects.filter(student_id__in=chunk).annotate(
+            exam_start=F('exam__exam_start_date')
+        ).only('pk', 'student_id', 'exam_id', 'semester', 'credits', 'grade_points', *CUMULATIVE_FIELDS):
+            by_student[row.student_id].append(row)
+            start_dates[row.exam_id] = row.exam_start
+        for student_id in chunk:
+            for row in pending.get(student_id, ()):
+                by_student[student_id].append(row)
+                start_dates[row.exam_id] = row.exam.exam_start_date
+
+        for rows in by_student.values():
+            credits = points = ZERO
+            for row in sorted(rows, key=lambda row: _order(row, start_dates)):
+                credits += row.credits
+                points += row.grade_points
+                cumulative = (credits, points, _average(points, credits))
+                if row.pk is not None and cumulative == (row.cumulative_credits, row.cumulative_grade_points, row.cgpa):
+                    continue
+                row.cumulative_credits, row.cumulative_grade_points, row.cgpa = cumulative
+                if row.pk is not None:
+                    changed.append(row)
+    return changed
+
+
+def update_exam_gpa(exam, student_ids=None):
+    """
+    Recompute the SGPA of every student with marks in ``exam``, or only of
+    ``student_ids``, and the CGPA of every exam of those students, in one
+    transaction. Per-student totals come from a single aggregate query that
+    joins course credits once; unpublished exams have no GPA rows. Returns
+    the number of GPA rows written for the exam.
+    """
+    with transaction.atomic():
+        scope = StudentSemesterGPA.objects.filter(exam=exam)
+        results = StudentResult.objects.filter(exam_subject__exam=exam)
+        if student_ids is not None:
+            scope = scope.filter(student_id__in=student_ids)
+            results = results.filter(student_id__in=student_ids)
+
+        new_rows = []
+        if exam.result_published:
+            new_rows = [
+                StudentSemesterGPA(
+                    student_id=totals['student_id'],
+                    exam=exam,
+                    semester=exam.semester,
+                    credits=totals['total_credits'],
+                    credits_earned=totals['earned_credits'],
+                    grade_points=totals['total_points'],
+                    sgpa=_average(totals['total_points'], totals['total_credits']),
+                )
+                for totals in _exam_totals(results)
+            ]
+        affected = set(scope.values_list('student_id', flat=True))
+        affected.update(row.student_id for row in new_rows)
+        scope.delete()
+
+        changed = _accumulate(affected, new_rows)
+        StudentSemesterGPA.objects.bulk_create(new_rows, batch_size=_batch_size())
+        StudentSemesterGPA.objects.bulk_update(changed, CUMULATIVE_FIELDS, batch_size=_batch_size())
+    bump_results_version()
+    return len(new_rows)
+
+
+def refresh_cgpa(student_ids):
+    """Recompute the CGPA chain of students after one of their exams was removed or moved"""
+    with transaction.atomic():
+        changed = _accumulate(set(student_ids))
+        StudentSemesterGPA.objects.bulk_update(changed, CUMULATIVE_FIELDS, batch_size=_batch_size())
+    bump_results_version()
+    return len(changed)
+
+
+def rebuild_gpa():
+    """Recompute the GPA table from every published exam's results, oldest semester first"""
+    StudentSemesterGPA.objects.all().delete()
+    written = 0
+    for exam in UniversityExam.objects.filter(result_published=True).order_by('semester', 'exam_start_date', 'pk'):
+        written += update_exam_gpa(exam)
+    return written
+
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-17 07:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0004_programsemestercourse'),
+        ('accounts', '0009_studentprofile_semester'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='examnotification',
+            index=models.Index(fields=['college', 'notification_type', 'is_active', '-created_at'], name='examnotif_college_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='examnotification',
+            index=models.Index(fields=['notification_type', 'is_active', '-created_at'], name='examnotif_type_feed_idx'),
+        ),
+    ]
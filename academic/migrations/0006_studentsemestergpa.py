@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0005_examnotification_feed_indexes'),
+        ('accounts', '0009_studentprofile_semester'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSemesterGPA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.IntegerField()),
+                ('credits', models.DecimalField(decimal_places=1, max_digits=6)),
+                ('credits_earned', models.DecimalField(decimal_places=1, max_digits=6)),
+                ('grade_points', models.DecimalField(decimal_places=1, max_digits=8)),
+                ('sgpa', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('cumulative_credits', models.DecimalField(decimal_places=1, max_digits=7)),
+                ('cumulative_grade_points', models.DecimalField(decimal_places=1, max_digits=9)),
+                ('cgpa', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_gpas', to='academic.universityexam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semester_gpas', to='accounts.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam', '-sgpa'], name='studentgpa_exam_rank_idx')],
+                'unique_together': {('student', 'exam')},
+            },
+        ),
+    ]
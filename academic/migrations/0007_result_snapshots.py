@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-17 10:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0006_studentsemestergpa'),
+        ('accounts', '0009_studentprofile_semester'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamResultSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('students', models.IntegerField()),
+                ('passed', models.IntegerField()),
+                ('pass_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('average_sgpa', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('highest_sgpa', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('grade_distribution', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result_summary', to='academic.universityexam')),
+                ('topper', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.studentprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamSubjectSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appeared', models.IntegerField()),
+                ('absent', models.IntegerField()),
+                ('passed', models.IntegerField()),
+                ('pass_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('average_marks', models.DecimalField(decimal_places=2, max_digits=6)),
+                ('highest_marks', models.IntegerField(blank=True, null=True)),
+                ('grade_distribution', models.JSONField(default=dict)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_summaries', to='academic.universityexam')),
+                ('exam_subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='academic.examsubject')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExamCollegeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('students', models.IntegerField()),
+                ('passed', models.IntegerField()),
+                ('pass_rate', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('average_sgpa', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('college', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_summaries', to='accounts.college')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='college_summaries', to='academic.universityexam')),
+                ('topper', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.studentprofile')),
+            ],
+            options={
+                'unique_together': {('exam', 'college')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ExamRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('college_rank', models.IntegerField()),
+                ('sgpa', models.DecimalField(decimal_places=2, max_digits=4)),
+                ('total_marks', models.IntegerField()),
+                ('max_marks', models.IntegerField()),
+                ('percentage', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('passed', models.BooleanField()),
+                ('college', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='accounts.college')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='academic.universityexam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_ranks', to='accounts.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['exam', 'rank'], name='examrank_exam_rank_idx'), models.Index(fields=['exam', 'college', 'college_rank'], name='examrank_college_rank_idx')],
+                'unique_together': {('exam', 'student')},
+            },
+        ),
+    ]
@@ -106,6 +106,11 @@ class ExamNotification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pages of the notification feeds
+            models.Index(fields=['college', 'notification_type', 'is_active', '-created_at'], name='examnotif_college_feed_idx'),
+            models.Index(fields=['notification_type', 'is_active', '-created_at'], name='examnotif_type_feed_idx'),
+        ]
     
     def __str__(self):
         return f"[{self.get_notification_type_display()}] {self.title}"
@@ -174,32 +179,51 @@ class StudentResult(models.Model):
     class Meta:
         unique_together = ('student', 'exam_subject')
     
+    # Grade points on a 10-point scale; ungraded (absent) rows earn none
+    GRADE_POINTS = {
+        'O': 10,
+        'A+': 9,
+        'A': 8,
+        'B+': 7,
+        'B': 6,
+        'C': 5,
+        'P': 4,
+        'F': 0,
+        'AB': 0,
+    }
+    
+    # Percentage cut-offs for each grade, highest first
+    GRADE_THRESHOLDS = (
+        (90, 'O'),
+        (80, 'A+'),
+        (70, 'A'),
+        (60, 'B+'),
+        (55, 'B'),
+        (50, 'C'),
+    )
+    
+    @classmethod
+    def grade_marks(cls, marks_list, max_marks, pass_marks):
+        """
+        Grade a sequence of marks against one subject's max/pass marks.
+        Returns a list of (grade, is_pass) tuples in the same order.
+        """
+        thresholds = cls.GRADE_THRESHOLDS + ((pass_marks, 'P'),)
+        graded = []
+        for marks in marks_list:
+            percentage = (marks / max_marks) * 100
+            grade = next((g for cutoff, g in thresholds if percentage >= cutoff), 'F')
+            graded.append((grade, marks >= pass_marks))
+        return graded
+    
     def save(self, *args, **kwargs):
         # Auto-calculate grade and pass status
         if self.marks_obtained is not None:
-            max_marks = self.exam_subject.max_marks
-            pass_marks = self.exam_subject.pass_marks
-            percentage = (self.marks_obtained / max_marks) * 100
-            
-            self.is_pass = self.marks_obtained >= pass_marks
-            
-            # Grade calculation
-            if percentage >= 90:
-                self.grade = 'O'
-            elif percentage >= 80:
-                self.grade = 'A+'
-            elif percentage >= 70:
-                self.grade = 'A'
-            elif percentage >= 60:
-                self.grade = 'B+'
-            elif percentage >= 55:
-                self.grade = 'B'
-            elif percentage >= 50:
-                self.grade = 'C'
-            elif percentage >= pass_marks:
-                self.grade = 'P'
-            else:
-                self.grade = 'F'
+            self.grade, self.is_pass = self.grade_marks(
+                [self.marks_obtained],
+                self.exam_subject.max_marks,
+                self.exam_subject.pass_marks
+            )[0]
         
         super().save(*args, **kwargs)
     
@@ -207,6 +231,108 @@ class StudentResult(models.Model):
         return f"{self.student.user.get_full_name()} - {self.exam_subject.course.code} - {self.marks_obtained}"
 
 
+class StudentSemesterGPA(models.Model):
+    """Credit-weighted grade point averages of a student in one published exam, kept in step with StudentResult"""
+    student = models.ForeignKey('accounts.StudentProfile', on_delete=models.CASCADE, related_name='semester_gpas')
+    exam = models.ForeignKey(UniversityExam, on_delete=models.CASCADE, related_name='student_gpas')
+    semester = models.IntegerField()
+    credits = models.DecimalField(max_digits=6, decimal_places=1)
+    credits_earned = models.DecimalField(max_digits=6, decimal_places=1)
+    grade_points = models.DecimalField(max_digits=8, decimal_places=1)  # sum of grade point x credits
+    sgpa = models.DecimalField(max_digits=4, decimal_places=2)
+    # Totals over this and every earlier published exam of the student
+    cumulative_credits = models.DecimalField(max_digits=7, decimal_places=1)
+    cumulative_grade_points = models.DecimalField(max_digits=9, decimal_places=1)
+    cgpa = models.DecimalField(max_digits=4, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('student', 'exam')
+        indexes = [
+            models.Index(fields=['exam', '-sgpa'], name='studentgpa_exam_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.student} - {self.exam.name} - SGPA {self.sgpa}"
+
+
+# ============ RESULT PUBLICATION SNAPSHOTS ============
+# Written by academic.publication whenever an exam's published results
+# change; dashboards read them as they are.
+
+class ExamResultSummary(models.Model):
+    """Overall pass statistics of a published exam"""
+    exam = models.OneToOneField(UniversityExam, on_delete=models.CASCADE, related_name='result_summary')
+    students = models.IntegerField()
+    passed = models.IntegerField()
+    pass_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    average_sgpa = models.DecimalField(max_digits=4, decimal_places=2)
+    highest_sgpa = models.DecimalField(max_digits=4, decimal_places=2)
+    topper = models.ForeignKey('accounts.StudentProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    grade_distribution = models.JSONField(default=dict)  # grade -> number of subject results
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.exam.name} - {self.pass_rate}% passed"
+
+
+class ExamSubjectSummary(models.Model):
+    """Pass rate and grade distribution of one subject of a published exam"""
+    exam = models.ForeignKey(UniversityExam, on_delete=models.CASCADE, related_name='subject_summaries')
+    exam_subject = models.OneToOneField(ExamSubject, on_delete=models.CASCADE, related_name='summary')
+    appeared = models.IntegerField()
+    absent = models.IntegerField()
+    passed = models.IntegerField()
+    pass_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    average_marks = models.DecimalField(max_digits=6, decimal_places=2)
+    highest_marks = models.IntegerField(null=True, blank=True)
+    grade_distribution = models.JSONField(default=dict)
+    
+    def __str__(self):
+        return f"{self.exam_subject} - {self.pass_rate}% passed"
+
+
+class ExamCollegeSummary(models.Model):
+    """Pass statistics and topper of one college in a published exam"""
+    exam = models.ForeignKey(UniversityExam, on_delete=models.CASCADE, related_name='college_summaries')
+    college = models.ForeignKey('accounts.College', on_delete=models.CASCADE, related_name='exam_summaries')
+    students = models.IntegerField()
+    passed = models.IntegerField()
+    pass_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    average_sgpa = models.DecimalField(max_digits=4, decimal_places=2)
+    topper = models.ForeignKey('accounts.StudentProfile', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    
+    class Meta:
+        unique_together = ('exam', 'college')
+    
+    def __str__(self):
+        return f"{self.exam.name} - {self.college} - {self.pass_rate}% passed"
+
+
+class ExamRank(models.Model):
+    """A student's place in the program rank list of a published exam, by SGPA (ties share a rank)"""
+    exam = models.ForeignKey(UniversityExam, on_delete=models.CASCADE, related_name='ranks')
+    student = models.ForeignKey('accounts.StudentProfile', on_delete=models.CASCADE, related_name='exam_ranks')
+    college = models.ForeignKey('accounts.College', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    rank = models.IntegerField()
+    college_rank = models.IntegerField()
+    sgpa = models.DecimalField(max_digits=4, decimal_places=2)
+    total_marks = models.IntegerField()
+    max_marks = models.IntegerField()
+    percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    passed = models.BooleanField()
+    
+    class Meta:
+        unique_together = ('exam', 'student')
+        indexes = [
+            models.Index(fields=['exam', 'rank'], name='examrank_exam_rank_idx'),
+            models.Index(fields=['exam', 'college', 'college_rank'], name='examrank_college_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.exam.name} - #{self.rank} {self.student}"
+
+
 # ============ QUESTION PAPER MODELS ============
 
 class QuestionPaper(models.Model):
@@ -0,0 +1,105 @@
+import heapq
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .models import ExamNotification
+
+
+FeedPage = namedtuple('FeedPage', ['items', 'next_cursor'])
+
+UNIVERSITY_KEY = 'ums:university-notifications'
+
+
+def invalidate_university_notifications():
+    cache.delete(UNIVERSITY_KEY)
+
+
+def university_notifications():
+    """
+    Active university-wide notifications, newest first. The list is the
+    same for every user, so it is cached globally for UMS_NOTIFICATIONS_TTL
+    seconds, or until a university notification is created, edited or
+    deleted in a process sharing the cache.
+    """
+    notifications = cache.get(UNIVERSITY_KEY)
+    if notifications is None:
+        notifications = list(ExamNotification.objects.filter(
+            notification_type='university',
+            is_active=True
+        ).order_by('-created_at', '-pk'))
+        cache.set(UNIVERSITY_KEY, notifications, getattr(settings, 'UMS_NOTIFICATIONS_TTL', 60))
+    return notifications
+
+
+def _sort_key(notification):
+    return notification.created_at, notification.pk
+
+
+def encode_cursor(notification):
+    return urlsafe_base64_encode(f'{notification.created_at.isoformat()}|{notification.pk}'.encode())
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, pk) position a cursor points at, or None"""
+    if not cursor:
+        return None
+    try:
+        created_at, pk = force_str(urlsafe_base64_decode(cursor)).split('|')
+        created_at, pk = datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        return None
+    # Cursors we issue are aware; a naive one cannot be compared with them
+    if created_at.tzinfo is None:
+        return None
+    return created_at, pk
+
+
+def _page(items, limit):
+    items = list(items)
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return FeedPage(items[:limit], next_cursor)
+
+
+def _per_page(limit):
+    return limit or getattr(settings, 'UMS_NOTIFICATIONS_PER_PAGE', 20)
+
+
+def _newest_after(queryset, position, limit):
+    if position is not None:
+        created_at, pk = position
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+    return queryset.order_by('-created_at', '-pk')[:limit]
+
+
+def notification_page(queryset, cursor=None, limit=None):
+    """Keyset page of a notification queryset, newest first"""
+    limit = _per_page(limit)
+    return _page(_newest_after(queryset, decode_cursor(cursor), limit + 1), limit)
+
+
+def notification_feed(college, cursor=None, limit=None):
+    """
+    One page of the merged feed a college's students and faculty see:
+    the college's active notifications and the cached university ones,
+    interleaved by creation time. Costs one query per page.
+    """
+    limit = _per_page(limit)
+    position = decode_cursor(cursor)
+    college_items = _newest_after(
+        ExamNotification.objects.filter(college=college, notification_type='college', is_active=True),
+        position,
+        limit + 1
+    )
+    university_items = [
+        n for n in university_notifications()
+        if position is None or _sort_key(n) < position
+    ]
+    merged = heapq.merge(college_items, university_items, key=_sort_key, reverse=True)
+    return _page(islice(merged, limit + 1), limit)
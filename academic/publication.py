@@ -0,0 +1,198 @@
+from collections import Counter, defaultdict, namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .gpa import update_exam_gpa
+from .models import (
+    ExamCollegeSummary, ExamRank, ExamResultSummary, ExamSubjectSummary, StudentResult, StudentSemesterGPA,
+)
+
+
+SNAPSHOT_MODELS = (ExamResultSummary, ExamSubjectSummary, ExamCollegeSummary, ExamRank)
+
+TWO_PLACES = Decimal('0.01')
+ZERO = Decimal('0')
+
+# What build_result_snapshots wrote for an exam
+SnapshotCounts = namedtuple('SnapshotCounts', ['results', 'students', 'subjects', 'colleges'])
+
+
+def _batch_size():
+    return getattr(settings, 'UMS_RESULT_SNAPSHOT_BATCH_SIZE', 2000)
+
+
+def _rate(part, whole):
+    return (Decimal(part * 100) / whole).quantize(TWO_PLACES) if whole else ZERO
+
+
+def _mean(total, count):
+    return (Decimal(total) / count).quantize(TWO_PLACES) if count else ZERO
+
+
+def _competition_ranks(ordered, score):
+    """1-based ranks of an already sorted sequence; equal scores share a rank"""
+    ranks = []
+    previous = None
+    for position, item in enumerate(ordered, 1):
+        value = score(item)
+        if value != previous:
+            rank, previous = position, value
+        ranks.append(rank)
+    return ranks
+
+
+def _pull(exam):
+    """The exam's results, SGPAs and student colleges as plain tuples"""
+    results = StudentResult.objects.filter(exam_subject__exam=exam).values_list(
+        'student_id', 'exam_subject_id', 'marks_obtained', 'grade', 'is_pass'
+    ).iterator(chunk_size=_batch_size())
+    sgpas, colleges = {}, {}
+    for student_id, sgpa, college_id in StudentSemesterGPA.objects.filter(exam=exam).values_list(
+        'student_id', 'sgpa', 'student__college_id'
+    ):
+        sgpas[student_id] = sgpa
+        colleges[student_id] = college_id
+    return results, sgpas, colleges
+
+
+def build_result_snapshots(exam):
+    """
+    Recompute every snapshot of a published exam from its full result set:
+    per-subject pass rates and grade distributions, the overall and
+    per-college pass statistics with their toppers, and the program rank
+    list by SGPA. The data is read with one query per table and aggregated
+    in a single pass; the old snapshots are replaced in one transaction.
+    """
+    max_marks = dict(exam.subjects.values_list('pk', 'max_marks'))
+    results, sgpas, colleges = _pull(exam)
+
+    # subject id -> [appeared, absent, passed, marks total, highest, grades]
+    subjects = {pk: [0, 0, 0, 0, None, Counter()] for pk in max_marks}
+    # student id -> [marks total, max marks, failed subjects]
+    students = defaultdict(lambda: [0, 0, 0])
+    grades = Counter()
+    count = 0
+    for student_id, subject_id, marks, grade, is_pass in results:
+        count += 1
+        subject = subjects[subject_id]
+        student = students[student_id]
+        if marks is None:
+            subject[1] += 1
+        else:
+            subject[0] += 1
+            subject[3] += marks
+            if subject[4] is None or marks > subject[4]:
+                subject[4] = marks
+            student[0] += marks
+        if is_pass:
+            subject[2] += 1
+        else:
+            student[2] += 1
+        if grade:
+            subject[5][grade] += 1
+            grades[grade] += 1
+        student[1] += max_marks[subject_id]
+
+    # Program rank list: SGPA, then marks, then id for a stable order
+    ordered = sorted(students, key=lambda pk: (-sgpas.get(pk, ZERO), -students[pk][0], pk))
+    ranks = _competition_ranks(ordered, lambda pk: sgpas.get(pk, ZERO))
+
+    by_college = defaultdict(list)
+    for pk in ordered:
+        by_college[colleges.get(pk)].append(pk)
+    college_ranks = {}
+    for members in by_college.values():
+        college_ranks.update(zip(members, _competition_ranks(members, lambda pk: sgpas.get(pk, ZERO))))
+
+    rank_rows = [
+        ExamRank(
+            exam=exam,
+            student_id=pk,
+            college_id=colleges.get(pk),
+            rank=rank,
+            college_rank=college_ranks[pk],
+            sgpa=sgpas.get(pk, ZERO),
+            total_marks=students[pk][0],
+            max_marks=students[pk][1],
+            percentage=_rate(students[pk][0], students[pk][1]),
+            passed=not students[pk][2],
+        )
+        for pk, rank in zip(ordered, ranks)
+    ]
+    subject_rows = [
+        ExamSubjectSummary(
+            exam=exam,
+            exam_subject_id=pk,
+            appeared=appeared,
+            absent=absent,
+            passed=passed,
+            pass_rate=_rate(passed, appeared + absent),
+            average_marks=_mean(total, appeared),
+            highest_marks=highest,
+            grade_distribution=dict(subject_grades),
+        )
+        for pk, (appeared, absent, passed, total, highest, subject_grades) in subjects.items()
+    ]
+    college_rows = []
+    for college_id, members in by_college.items():
+        if college_id is None:
+            continue
+        college_passed = sum(1 for pk in members if not students[pk][2])
+        college_rows.append(ExamCollegeSummary(
+            exam=exam,
+            college_id=college_id,
+            students=len(members),
+            passed=college_passed,
+            pass_rate=_rate(college_passed, len(members)),
+            average_sgpa=_mean(sum(sgpas.get(pk, ZERO) for pk in members), len(members)),
+            topper_id=members[0],
+        ))
+    passed = sum(1 for row in rank_rows if row.passed)
+
+    with transaction.atomic():
+        for model in SNAPSHOT_MODELS:
+            model.objects.filter(exam=exam).delete()
+        ExamResultSummary.objects.create(
+            exam=exam,
+            students=len(rank_rows),
+            passed=passed,
+            pass_rate=_rate(passed, len(rank_rows)),
+            average_sgpa=_mean(sum(row.sgpa for row in rank_rows), len(rank_rows)),
+            highest_sgpa=rank_rows[0].sgpa if rank_rows else ZERO,
+            topper_id=ordered[0] if ordered else None,
+            grade_distribution=dict(grades),
+        )
+        ExamSubjectSummary.objects.bulk_create(subject_rows, batch_size=_batch_size())
+        ExamCollegeSummary.objects.bulk_create(college_rows, batch_size=_batch_size())
+        ExamRank.objects.bulk_create(rank_rows, batch_size=_batch_size())
+    return SnapshotCounts(count, len(rank_rows), len(subject_rows), len(college_rows))
+
+
+def refresh_exam_results(exam, student_ids=None):
+    """
+    Bring everything derived from an exam's results up to date: the SGPA
+    and CGPA of ``student_ids`` (or of every student) and, while the exam
+    is published, its snapshots. Unpublished exams have no snapshots.
+    """
+    with transaction.atomic():
+        update_exam_gpa(exam, student_ids)
+        if exam.result_published:
+            return build_result_snapshots(exam)
+        for model in SNAPSHOT_MODELS:
+            model.objects.filter(exam=exam).delete()
+    return None
+
+
+def publish_exam_results(exam):
+    """
+    Publish an exam's results: mark it published, compute SGPA/CGPA and
+    write its statistics and rank list snapshots, all in one transaction.
+    """
+    with transaction.atomic():
+        exam.result_published = True
+        exam.result_published_at = timezone.now()
+        exam.save()
+        return refresh_exam_results(exam)
@@ -0,0 +1,122 @@
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Coalesce
+
+from .models import StudentResult, StudentSemesterGPA
+
+
+VERSION_KEY = 'ums:results-version'
+
+SheetExam = namedtuple('SheetExam', [
+    'id', 'name', 'program_name', 'semester', 'academic_year', 'exam_start_date', 'exam_end_date',
+])
+SubjectMark = namedtuple('SubjectMark', ['course_code', 'course_title', 'max_marks', 'marks_obtained', 'grade', 'is_pass'])
+# One published exam on a student's result sheet; ``status`` is 'Pass' or 'Fail'
+ExamResult = namedtuple('ExamResult', [
+    'exam', 'results', 'total_marks', 'max_marks', 'percentage', 'status', 'sgpa', 'cgpa',
+])
+
+
+def bump_results_version():
+    """Invalidate every cached result sheet"""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _sheet_rows(student):
+    # Per-exam totals are window aggregates, so every subject row arrives
+    # with its exam's totals and nothing is summed in Python
+    per_exam = {'partition_by': [F('exam_subject__exam_id')]}
+    gpa = StudentSemesterGPA.objects.filter(student_id=OuterRef('student_id'), exam_id=OuterRef('exam_subject__exam_id'))
+    return StudentResult.objects.filter(
+        student=student,
+        exam_subject__exam__program_id=student.program_id,
+        exam_subject__exam__result_published=True,
+    ).annotate(
+        exam_total=Window(Sum(Coalesce('marks_obtained', Value(0))), **per_exam),
+        exam_max=Window(Sum('exam_subject__max_marks'), **per_exam),
+        exam_failed=Window(
+            Sum(Case(When(is_pass=False, then=Value(1)), default=Value(0), output_field=IntegerField())),
+            **per_exam
+        ),
+        exam_sgpa=Subquery(gpa.values('sgpa')[:1]),
+        exam_cgpa=Subquery(gpa.values('cgpa')[:1]),
+    ).order_by(
+        '-exam_subject__exam__exam_start_date', 'exam_subject__exam_id', 'exam_subject__course__code'
+    ).values_list(
+        'exam_subject__exam_id',
+        'exam_subject__exam__name',
+        'exam_subject__exam__program__name',
+        'exam_subject__exam__semester',
+        'exam_subject__exam__academic_year',
+        'exam_subject__exam__exam_start_date',
+        'exam_subject__exam__exam_end_date',
+        'exam_subject__course__code',
+        'exam_subject__course__title',
+        'exam_subject__max_marks',
+        'marks_obtained',
+        'grade',
+        'is_pass',
+        'exam_total',
+        'exam_max',
+        'exam_failed',
+        'exam_sgpa',
+        'exam_cgpa',
+    )
+
+
+def _grade_point_average(value):
+    # Subquery decimals are not rounded to the column's places on SQLite
+    return None if value is None else Decimal(value).quantize(Decimal('0.01'))
+
+
+def build_result_sheet(student):
+    """
+    Every published exam of the student's program that has marks for the
+    student, newest first, with per-subject marks by course code and the
+    exam's totals, percentage, pass status and SGPA/CGPA (from the GPA
+    table), read in a single query.
+    """
+    sheet = []
+    for row in _sheet_rows(student):
+        exam_id, total, max_marks, failed = row[0], row[13], row[14], row[15]
+        if not sheet or sheet[-1].exam.id != exam_id:
+            sheet.append(ExamResult(
+                exam=SheetExam(*row[:7]),
+                results=[],
+                total_marks=total,
+                max_marks=max_marks,
+                percentage=round((total / max_marks) * 100, 2) if max_marks > 0 else 0,
+                status='Fail' if failed else 'Pass',
+                sgpa=_grade_point_average(row[16]),
+                cgpa=_grade_point_average(row[17]),
+            ))
+        sheet[-1].results.append(SubjectMark(*row[7:13]))
+    return sheet
+
+
+def result_sheet(student):
+    """
+    The student's result sheet, cached per student, program and results
+    version. Publishing an exam or editing its marks, subjects or courses
+    bumps the version; the short UMS_RESULT_SHEET_TTL bounds how long a
+    process that cannot see the bump (no shared cache) shows old marks.
+    """
+    key = f'ums:result-sheet:{_current_version()}:{student.pk}:{student.program_id}'
+    sheet = cache.get(key)
+    if sheet is None:
+        sheet = build_result_sheet(student)
+        cache.set(key, sheet, getattr(settings, 'UMS_RESULT_SHEET_TTL', 300))
+    return sheet
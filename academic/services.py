@@ -0,0 +1,403 @@
+import atexit
+import hashlib
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F, Min
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+
+from .catalog import bump_catalog_version
+from .models import Course, ProgramSemesterCourse, QuestionPaper, QuestionPaperDownload, StudentResult
+from .publication import refresh_exam_results
+
+
+def save_subject_results(subject, students, data, entered_by, existing_results=None):
+    """
+    Save posted marks for every student of an exam subject in one batch.
+
+    The whole mark vector is graded in a single pass against the subject's
+    max/pass marks, then new and changed rows are written with one upsert
+    on (student, exam_subject). Returns the number of rows written.
+    """
+    if existing_results is None:
+        existing_results = {r.student_id: r for r in subject.results.all()}
+
+    posted = []
+    for student in students:
+        marks = data.get(f'marks_{student.pk}')
+        if marks and marks.strip():
+            marks_int = int(marks)
+            result = existing_results.get(student.pk)
+            if result is None or result.marks_obtained != marks_int:
+                posted.append((student, marks_int))
+
+    if not posted:
+        return 0
+
+    graded = StudentResult.grade_marks(
+        [marks for _, marks in posted],
+        subject.max_marks,
+        subject.pass_marks
+    )
+    rows = [
+        StudentResult(
+            student=student,
+            exam_subject=subject,
+            marks_obtained=marks,
+            grade=grade,
+            is_pass=is_pass,
+            entered_by=entered_by
+        )
+        for (student, marks), (grade, is_pass) in zip(posted, graded)
+    ]
+
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    unique_fields = None
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ['student', 'exam_subject']
+
+    with transaction.atomic():
+        StudentResult.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['marks_obtained', 'grade', 'is_pass', 'entered_by', 'updated_at'],
+        )
+    # The upsert skips model signals; only published marks feed GPAs and statistics
+    if subject.exam.result_published:
+        refresh_exam_results(subject.exam, [student.pk for student, _ in posted])
+    return len(rows)
+
+
+class CurriculumError(ValueError):
+    """A curriculum change set that cannot be applied; ``errors`` lists why"""
+
+    def __init__(self, errors):
+        super().__init__('; '.join(errors))
+        self.errors = errors
+
+
+def curriculum_grid(program):
+    """
+    The program's courses grouped by semester, from a single query, as a
+    list of ``{'number', 'courses'}`` dicts covering every semester of the
+    program (two per year) plus any stray semester beyond it.
+    """
+    by_semester = {number: [] for number in range(1, program.duration_years * 2 + 1)}
+    for entry in ProgramSemesterCourse.objects.filter(program=program).select_related('course').order_by(
+        'semester', 'course__code'
+    ):
+        by_semester.setdefault(entry.semester, []).append(entry)
+    return [{'number': number, 'courses': courses} for number, courses in sorted(by_semester.items())]
+
+
+def _change_int(value, errors, label):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        errors.append(f'Invalid {label}: {value!r}.')
+        return None
+
+
+def apply_curriculum_changes(program, add=(), move=(), remove=()):
+    """
+    Apply a batch of curriculum edits to a program in one transaction.
+
+    ``add`` holds ``{'course', 'semester', 'is_elective'}`` dicts, ``move``
+    holds ``{'course', 'semester'}`` dicts and ``remove`` holds course ids.
+    The whole batch is validated first and raises CurriculumError without
+    writing anything if any entry is invalid. It is then written with one
+    delete, one bulk insert and one bulk update. Returns the number of
+    added, moved and removed courses.
+    """
+    errors = []
+    semesters = range(1, program.duration_years * 2 + 1)
+
+    def semester_of(value):
+        semester = _change_int(value, errors, 'semester')
+        if semester is not None and semester not in semesters:
+            errors.append(f'Semester {semester} is outside 1-{semesters[-1]}.')
+            return None
+        return semester
+
+    additions = {}
+    for change in add:
+        course_id = _change_int(change.get('course'), errors, 'course')
+        semester = semester_of(change.get('semester'))
+        if course_id is not None and semester is not None:
+            additions[course_id] = (semester, bool(change.get('is_elective')))
+    moves = {}
+    for change in move:
+        course_id = _change_int(change.get('course'), errors, 'course')
+        semester = semester_of(change.get('semester'))
+        if course_id is not None and semester is not None:
+            moves[course_id] = semester
+    removals = {course_id for course_id in (_change_int(pk, errors, 'course') for pk in remove) if course_id is not None}
+
+    with transaction.atomic():
+        current = {
+            entry.course_id: entry
+            for entry in ProgramSemesterCourse.objects.select_for_update().filter(program=program)
+        }
+        existing_courses = set(Course.objects.filter(pk__in=additions).values_list('pk', flat=True))
+        for course_id in additions:
+            if course_id not in existing_courses:
+                errors.append(f'Course {course_id} does not exist.')
+            elif course_id in current and course_id not in removals:
+                errors.append(f'Course {course_id} is already in this program.')
+        for course_id in (moves.keys() | removals) - current.keys():
+            errors.append(f'Course {course_id} is not in this program.')
+        overlap = moves.keys() & removals
+        if overlap:
+            errors.append(f'Courses {sorted(overlap)} cannot be both moved and removed.')
+        if errors:
+            raise CurriculumError(errors)
+
+        if removals:
+            ProgramSemesterCourse.objects.filter(program=program, course_id__in=removals).delete()
+        if additions:
+            ProgramSemesterCourse.objects.bulk_create([
+                ProgramSemesterCourse(program=program, course_id=course_id, semester=semester, is_elective=is_elective)
+                for course_id, (semester, is_elective) in additions.items()
+            ])
+        moved = [current[course_id] for course_id, semester in moves.items() if current[course_id].semester != semester]
+        for entry in moved:
+            entry.semester = moves[entry.course_id]
+        if moved:
+            ProgramSemesterCourse.objects.bulk_update(moved, ['semester'])
+
+    if additions or moved or removals:
+        # Bulk writes bypass the model signals that refresh the catalog
+        bump_catalog_version()
+    return len(additions), len(moved), len(removals)
+
+
+RELEASED_PAPERS_KEY = 'ums:released-papers'
+
+
+def invalidate_released_papers():
+    cache.delete(RELEASED_PAPERS_KEY)
+
+
+def _load_released_papers(now):
+    papers = list(QuestionPaper.objects.filter(
+        status='released',
+        release_datetime__lte=now
+    ).select_related('exam_subject__exam', 'exam_subject__course'))
+
+    # Expire no later than the next paper becomes visible
+    timeout = getattr(settings, 'UMS_PAPER_LIST_TTL', 300)
+    next_release = QuestionPaper.objects.filter(
+        status__in=('scheduled', 'released'),
+        release_datetime__gt=now
+    ).aggregate(next=Min('release_datetime'))['next']
+    if next_release is not None:
+        timeout = max(min(timeout, (next_release - now).total_seconds()), 1)
+    cache.set(RELEASED_PAPERS_KEY, papers, timeout)
+    return papers
+
+
+def released_papers():
+    """
+    Question papers currently visible to colleges, shared by the college
+    and principal listings. Due scheduled papers are released first on a
+    cache miss, so the listing is correct even if the worker falls behind.
+    """
+    papers = cache.get(RELEASED_PAPERS_KEY)
+    if papers is None:
+        now = timezone.now()
+        release_due_papers(now, warm=False)
+        papers = _load_released_papers(now)
+    return papers
+
+
+def release_due_papers(now=None, warm=True):
+    """
+    Release every scheduled paper whose release time has passed with one
+    UPDATE, then rebuild the listing cache. Returns the number released.
+    """
+    now = now or timezone.now()
+    released = QuestionPaper.objects.filter(
+        status='scheduled',
+        release_datetime__lte=now
+    ).update(status='released', released_at=now)
+    if released and warm:
+        _load_released_papers(now)
+    return released
+
+
+def next_scheduled_release():
+    return QuestionPaper.objects.filter(status='scheduled').aggregate(
+        next=Min('release_datetime')
+    )['next']
+
+
+class DownloadLogBuffer:
+    """
+    Writes QuestionPaperDownload rows with group commit. A row is inserted
+    straight away unless another thread is already writing; then it is
+    queued, and the writing thread keeps bulk inserting whatever queued up
+    before it returns. Quiet traffic writes through, concurrent downloads
+    share inserts, and no row is left waiting once its writer is done.
+    """
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or getattr(settings, 'UMS_DOWNLOAD_LOG_BATCH_SIZE', 50)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._writing = False
+
+    def add(self, download):
+        with self._lock:
+            self._pending.append(download)
+            if self._writing:
+                return
+            self._writing = True
+        self._drain()
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._writing = False
+                    return
+            try:
+                self._write(batch)
+            except Exception:
+                # Rows queued meanwhile go out with the next download or flush
+                with self._lock:
+                    self._writing = False
+                raise
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        self._write(batch)
+
+    def _write(self, batch):
+        if batch:
+            QuestionPaperDownload.objects.bulk_create(batch, batch_size=self.batch_size)
+
+
+download_log = DownloadLogBuffer()
+atexit.register(download_log.flush)
+
+
+def record_paper_download(paper, college, user):
+    """Count a download atomically and queue its log row"""
+    QuestionPaper.objects.filter(pk=paper.pk).update(download_count=F('download_count') + 1)
+    download_log.add(QuestionPaperDownload(
+        question_paper_id=paper.pk,
+        college=college,
+        downloaded_by=user
+    ))
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class _RangeNotSatisfiable(Exception):
+    pass
+
+
+def _parse_range(header, size):
+    """
+    Parse a single ``bytes=`` range into inclusive (start, end) offsets.
+    Returns None when the header should be ignored and the whole file sent.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        # Suffix range: the last N bytes
+        if int(end) == 0:
+            raise _RangeNotSatisfiable
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise _RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, end
+
+
+class _RangeReader:
+    """File wrapper that reads at most ``length`` bytes from the current offset"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def serve_question_paper(request, paper, college):
+    """
+    Stream a released question paper to a college.
+
+    The file is sent with FileResponse rather than read into memory, honours
+    single byte ranges (If-Range aware) and answers If-None-Match with 304.
+    Only responses that start at the first byte are counted as downloads,
+    so resumed transfers are not counted twice.
+    """
+    paper_file = paper.paper_file
+    try:
+        size = paper_file.size
+    except (FileNotFoundError, ValueError):
+        raise Http404('Question paper file not found')
+
+    etag = quote_etag(hashlib.md5(f'{paper_file.name}:{size}'.encode()).hexdigest())
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, size)
+        except _RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None or byte_range[0] == 0:
+        record_paper_download(paper, college, request.user)
+
+    paper_file.open('rb')
+    filename = f'{paper.title}.pdf'
+    if byte_range is None:
+        response = FileResponse(paper_file, as_attachment=True, filename=filename, content_type='application/pdf')
+    else:
+        start, end = byte_range
+        paper_file.seek(start)
+        response = FileResponse(
+            _RangeReader(paper_file, end - start + 1),
+            as_attachment=True,
+            filename=filename,
+            content_type='application/pdf',
+            status=206
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
@@ -0,0 +1,93 @@
+from django.utils.functional import SimpleLazyObject, cached_property
+
+from .models import College, FacultyProfile, StudentProfile
+
+
+# Profile model, reverse accessor on User and relations joined in for each portal role
+ROLE_PROFILES = {
+    'student': (StudentProfile, 'studentprofile', ('college', 'department', 'program')),
+    'faculty': (FacultyProfile, 'faculty_profile', ('college',)),
+    'college': (College, 'college_profile', ()),
+}
+
+
+class UMSContext:
+    """
+    The logged-in user's role, profile, college and department ids,
+    resolved once per request and attached as ``request.ums``.
+    """
+
+    def __init__(self, user, role=None, profile=None):
+        self.user = user
+        self.role = role
+        self.profile = profile
+        self.designation = getattr(profile, 'designation', None)
+
+    @cached_property
+    def department_ids(self):
+        """
+        Departments the user belongs to. They decide access, so they are
+        read from the database on first use in every request, never cached.
+        """
+        if self.profile is None:
+            return []
+        if self.role == 'faculty':
+            return list(self.profile.departments.values_list('id', flat=True))
+        if self.role == 'student' and self.profile.department_id:
+            return [self.profile.department_id]
+        return []
+
+    @property
+    def college(self):
+        if self.role == 'college':
+            return self.profile
+        return getattr(self.profile, 'college', None)
+
+    @property
+    def college_id(self):
+        college = self.college
+        return college.pk if college else None
+
+    @property
+    def student(self):
+        return self.profile if self.role == 'student' else None
+
+    @property
+    def faculty(self):
+        return self.profile if self.role == 'faculty' else None
+
+    @property
+    def is_hod(self):
+        return self.designation == 'hod'
+
+    @property
+    def is_principal(self):
+        return self.designation == 'principal'
+
+
+def _load_profile(user, role):
+    """Fetch the role profile and its college in one joined query"""
+    model, accessor, related = ROLE_PROFILES[role]
+    profile = model.objects.select_related(*related).filter(user_id=user.pk).first()
+    if profile is not None:
+        # Prime user.<profile> and profile.user so neither is fetched again
+        setattr(user, accessor, profile)
+    return profile
+
+
+def resolve_context(request):
+    user = request.user
+    if not user.is_authenticated or user.role not in ROLE_PROFILES:
+        return UMSContext(user, role=getattr(user, 'role', None))
+    return UMSContext(user, user.role, _load_profile(user, user.role))
+
+
+class UMSContextMiddleware:
+    """Attach the lazily resolved role context to every request as ``request.ums``"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.ums = SimpleLazyObject(lambda: resolve_context(request))
+        return self.get_response(request)
@@ -0,0 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+
+def _setup_worker(settings_module):
+    # Workers started with "spawn" begin without a configured Django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+class PasswordHasherPool:
+    """
+    Hash many passwords across CPU cores. Each PBKDF2 hash is deliberately
+    slow and holds the GIL, so bulk imports spread them over worker
+    processes; small batches and ``workers=1`` hash in-process.
+
+    Passwords that are None become unusable passwords without any hashing.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or getattr(settings, 'UMS_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def hash_many(self, passwords):
+        passwords = list(passwords)
+        pending = [i for i, password in enumerate(passwords) if password is not None]
+        hashes = [make_password(None) if password is None else None for password in passwords]
+        if len(pending) < 2 or self.workers == 1:
+            for i in pending:
+                hashes[i] = make_password(passwords[i])
+            return hashes
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_setup_worker,
+                initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'ums_project.settings'),),
+            )
+        chunksize = max(1, len(pending) // (self.workers * 4))
+        for i, hashed in zip(pending, self.pool.map(_hash, [passwords[i] for i in pending], chunksize=chunksize)):
+            hashes[i] = hashed
+        return hashes
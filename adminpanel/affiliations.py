@@ -0,0 +1,58 @@
+from django.db import transaction
+
+from accounts.models import College, CollegeAffiliatedDepartment, CollegeAffiliatedProgram
+from academic.catalog import catalog
+from academic.models import Program
+from .stats import bump_stats_version
+
+
+def department_program_tree():
+    """
+    Every department with its programs, both sorted by name, as
+    ``{'department', 'programs'}`` dicts, served from the cached catalog.
+    """
+    return catalog().tree()
+
+
+def _apply_difference(model, college, field, current, wanted):
+    removed = current - wanted
+    added = wanted - current
+    if removed:
+        model.objects.filter(college=college, **{f'{field}__in': removed}).delete()
+    if added:
+        model.objects.bulk_create(
+            [model(college=college, **{field: pk}) for pk in added],
+            ignore_conflicts=True,
+        )
+    return bool(removed or added)
+
+
+def update_college_affiliations(college, program_ids):
+    """
+    Make the college's affiliated programs exactly ``program_ids`` and its
+    affiliated departments those programs' departments. Only the
+    difference from the current rows is written, with one bulk insert and
+    one delete per table inside a single transaction, so departments that
+    stay keep their original application date. Unknown ids are ignored.
+    Returns True when anything changed.
+    """
+    program_ids = {int(pk) for pk in program_ids if str(pk).isdigit()}
+    with transaction.atomic():
+        # Serialize concurrent updates of the same college
+        College.objects.select_for_update().filter(pk=college.pk).exists()
+        departments = dict(Program.objects.filter(pk__in=program_ids).values_list('pk', 'department_id'))
+
+        changed = _apply_difference(
+            CollegeAffiliatedProgram, college, 'program_id',
+            set(college.affiliated_programs.values_list('program_id', flat=True)),
+            set(departments),
+        )
+        changed |= _apply_difference(
+            CollegeAffiliatedDepartment, college, 'department_id',
+            set(college.affiliated_departments.values_list('department_id', flat=True)),
+            set(departments.values()),
+        )
+    if changed:
+        # bulk_create bypasses the save signals that invalidate the counters
+        bump_stats_version()
+    return changed
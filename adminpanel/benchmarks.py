@@ -0,0 +1,271 @@
+import platform
+import statistics
+import subprocess
+import time
+from collections import namedtuple
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import College, FacultyProfile, StudentProfile
+from academic.catalog import bump_catalog_version
+from academic.models import ExamSubject, QuestionPaper, QuestionPaperDownload, StudentResult
+from academic.notifications import invalidate_university_notifications
+from academic.results import bump_results_version
+from academic.services import download_log, invalidate_released_papers
+from attendance.models import AttendanceSession, StudentAttendance, StudentSubjectAttendanceSummary
+from search.index import bump_search_version
+from .metrics import RequestMetrics, percentiles
+from .stats import bump_stats_version
+
+User = get_user_model()
+
+# One benchmarked request: the account it runs as and a function of the
+# fixture and iteration number returning (method, path, data)
+Scenario = namedtuple('Scenario', ['name', 'account', 'request'])
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def _first(queryset, what):
+    obj = queryset.first()
+    if obj is None:
+        raise BenchmarkError(f"The dataset has no {what}; run generate_load_data first.")
+    return obj
+
+
+def load_fixture(prefix='LT'):
+    """
+    Accounts and objects of a generate_load_data dataset that the
+    scenarios use, picked deterministically.
+    """
+    prefix = prefix.upper()
+    domain = f"{prefix.lower()}.load.test"
+    college = _first(College.objects.filter(code=f"{prefix}C01"), f"college {prefix}C01")
+    hod = _first(
+        FacultyProfile.objects.filter(college=college, designation='hod').select_related('user').order_by('pk'),
+        'HOD',
+    )
+    department_ids = list(hod.departments.values_list('pk', flat=True))
+    session = _first(
+        AttendanceSession.objects.filter(college=college, department_id__in=department_ids).order_by('-date', 'pk'),
+        'attendance session',
+    )
+    student = _first(
+        StudentProfile.objects.filter(college=college, semester__gt=1).select_related('user').order_by('-semester', 'pk'),
+        'student with results',
+    )
+    subject = _first(
+        ExamSubject.objects.filter(
+            exam__result_published=False, exam__program=student.program, exam__semester=student.semester
+        ).order_by('pk'),
+        'upcoming exam subject',
+    )
+    paper = _first(QuestionPaper.objects.filter(status='released').order_by('pk'), 'released question paper')
+    return {
+        'accounts': {
+            'admin': f"admin@{domain}",
+            'hod': hod.user.email,
+            'student': student.user.email,
+            'college': college.user.email,
+        },
+        'session': session,
+        'subject': subject,
+        'paper': paper,
+        'search': student.user.last_name,
+        'attendance_students': list(StudentProfile.objects.filter(
+            college=college, department=session.department, program=session.program
+        ).values_list('pk', flat=True)),
+        'result_students': list(StudentProfile.objects.filter(
+            program=subject.exam.program, semester=subject.exam.semester
+        ).values_list('pk', flat=True)),
+    }
+
+
+def _mark_attendance(fixture, i):
+    # Mark a different tenth of the class absent each time so every POST writes
+    data = {
+        f'status_{pk}': 'absent' if n % 10 == i % 10 else 'present'
+        for n, pk in enumerate(fixture['attendance_students'])
+    }
+    return 'post', reverse('public:hod_mark_attendance', args=[fixture['session'].pk]), data
+
+
+def _enter_results(fixture, i):
+    subject = fixture['subject']
+    data = {
+        f'marks_{pk}': str((n * 7 + i * 3) % (subject.max_marks + 1))
+        for n, pk in enumerate(fixture['result_students'])
+    }
+    return 'post', reverse('adminpanel:results_by_subject', args=[subject.exam_id, subject.pk]), data
+
+
+def _get(name, *args, query=None):
+    def build(fixture, i):
+        return 'get', reverse(name, args=[arg(fixture) if callable(arg) else arg for arg in args]), query(fixture) if query else None
+    return build
+
+
+SCENARIOS = (
+    Scenario('hod_mark_attendance POST', 'hod', _mark_attendance),
+    Scenario('results_by_subject POST', 'admin', _enter_results),
+    Scenario('student_attendance', 'student', _get('public:student_attendance')),
+    Scenario('student_results', 'student', _get('public:student_results')),
+    Scenario('student_notifications', 'student', _get('public:student_notifications')),
+    Scenario('college_notifications', 'college', _get('public:college_notifications')),
+    Scenario('university_notifications', 'admin', _get('adminpanel:notifications')),
+    Scenario('students_list search', 'admin', _get('adminpanel:students', query=lambda fixture: {'q': fixture['search']})),
+    Scenario('question paper download', 'college', _get('public:college_download_paper', lambda fixture: fixture['paper'].pk)),
+)
+
+
+def _request(client, method, path, data):
+    metrics = RequestMetrics()
+    start = time.perf_counter()
+    with connection.execute_wrapper(metrics):
+        response = getattr(client, method)(path, data)
+        if response.streaming:
+            # Downloads are only complete once the body has been read; the
+            # test client closes the response when the stream is exhausted
+            b''.join(response.streaming_content)
+    return response.status_code, (time.perf_counter() - start) * 1000, metrics
+
+
+def run_benchmarks(prefix='LT', iterations=20, warmup=2, names=None, keep_changes=False):
+    """
+    Drive each scenario through the test client ``warmup`` + ``iterations``
+    times and return latency and query-count statistics per scenario, as
+    a JSON-serializable dict. Requests run and commit as they would when
+    served, on-commit work included. Rows written by the scenarios are put
+    back afterwards unless ``keep_changes`` is set, so runs start from the
+    same data.
+    """
+    scenarios = [scenario for scenario in SCENARIOS if names is None or scenario.name in names]
+    fixture = load_fixture(prefix)
+    written = None if keep_changes else _capture(fixture)
+    try:
+        results = _run(scenarios, fixture, iterations, warmup)
+    finally:
+        download_log.flush()
+        if written is not None:
+            _restore(written)
+    return {'meta': _meta(iterations, warmup, prefix), 'scenarios': results}
+
+
+def _written_rows(fixture):
+    """Model and filter of every row the scenarios insert, update or delete"""
+    session, subject, paper = fixture['session'], fixture['subject'], fixture['paper']
+    return (
+        (StudentAttendance, Q(session=session)),
+        (StudentSubjectAttendanceSummary, Q(
+            subject_id=session.subject_id, semester=session.semester, year=session.date.year, month=session.date.month,
+        )),
+        (StudentResult, Q(exam_subject=subject)),
+        (QuestionPaperDownload, Q(question_paper=paper)),
+    )
+
+
+def _capture(fixture):
+    rows = [(model, condition, list(model.objects.filter(condition))) for model, condition in _written_rows(fixture)]
+    counts = list(QuestionPaper.objects.filter(pk=fixture['paper'].pk))
+    return rows, counts
+
+
+def _restore(written):
+    """Put the captured rows back as they were, then drop everything cached from the run"""
+    rows, counts = written
+    with transaction.atomic():
+        for model, condition, _ in rows:
+            model.objects.filter(condition).delete()
+        for model, _, objects in rows:
+            model.objects.bulk_create(objects)
+        QuestionPaper.objects.bulk_update(counts, ['download_count'])
+    # The run may have cached lists, counters and sheets of rows that are
+    # gone now, possibly in a cache other processes share
+    bump_stats_version()
+    bump_results_version()
+    bump_catalog_version()
+    bump_search_version()
+    invalidate_released_papers()
+    invalidate_university_notifications()
+
+
+def _run(scenarios, fixture, iterations, warmup):
+    results = {}
+    clients = {}
+    for role, email in fixture['accounts'].items():
+        clients[role] = Client()
+        clients[role].force_login(User.objects.get(email=email))
+
+    for scenario in scenarios:
+        client = clients[scenario.account]
+        latencies, queries, sql_times, statuses = [], [], [], set()
+        for i in range(warmup + iterations):
+            method, path, data = scenario.request(fixture, i)
+            status, elapsed, metrics = _request(client, method, path, data)
+            if status >= 400:
+                raise BenchmarkError(f"{scenario.name}: {method.upper()} {path} returned {status}")
+            if i >= warmup:
+                latencies.append(elapsed)
+                queries.append(metrics.queries)
+                sql_times.append(metrics.sql_time * 1000)
+                statuses.add(status)
+        results[scenario.name] = {
+            'path': path,
+            'status': sorted(statuses),
+            'latency_ms': {**percentiles(latencies), 'mean': round(statistics.fmean(latencies), 2)},
+            'sql_ms': percentiles(sql_times),
+            'queries': {'min': min(queries), 'max': max(queries)},
+        }
+    return results
+
+
+def _meta(iterations, warmup, prefix):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': timezone.now().isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'iterations': iterations,
+        'warmup': warmup,
+        'dataset': {
+            'prefix': prefix.upper(),
+            'students': StudentProfile.objects.count(),
+            'attendance_records': StudentAttendance.objects.count(),
+            'results': StudentResult.objects.count(),
+        },
+    }
+
+
+def compare(baseline, current, tolerance=0.25):
+    """
+    Regressions of ``current`` against a ``baseline`` run: scenarios whose
+    p50 latency grew by more than ``tolerance`` or whose query count grew
+    at all. Returns (scenario, message) pairs.
+    """
+    regressions = []
+    for name, result in current['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(name)
+        if before is None:
+            continue
+        if result['queries']['max'] > before['queries']['max']:
+            regressions.append((name, f"queries {before['queries']['max']} -> {result['queries']['max']}"))
+        old, new = before['latency_ms']['p50'], result['latency_ms']['p50']
+        if old and new > old * (1 + tolerance):
+            regressions.append((name, f"p50 {old:.1f}ms -> {new:.1f}ms (+{(new / old - 1) * 100:.0f}%)"))
+    return regressions
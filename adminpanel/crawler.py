@@ -0,0 +1,218 @@
+import tempfile
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from accounts.models import College, FacultyProfile, StudentProfile
+from academic.models import Course, Department, ExamNotification, QuestionPaper, UniversityExam
+from academic.services import download_log
+from attendance.models import AttendanceSession, MedicalCertificate
+from .metrics import RequestMetrics
+
+User = get_user_model()
+
+PREFIX = 'QC'
+
+# generate_load_data options of the two datasets; everything grows
+SIZES = (
+    {'colleges': 2, 'departments': 2, 'programs': 1, 'courses': 2, 'students': 12, 'faculty': 2, 'days': 3, 'notifications': 4},
+    {'colleges': 3, 'departments': 3, 'programs': 2, 'courses': 3, 'students': 40, 'faculty': 4, 'days': 8, 'notifications': 15},
+)
+
+# URL namespaces crawled, and the role that owns each public path prefix
+NAMESPACES = ('public', 'adminpanel', 'search')
+PUBLIC_ROLES = {
+    'college/': 'college',
+    'student/': 'student',
+    'faculty/': 'faculty',
+    'hod/': 'hod',
+    'principal/': 'principal',
+    'api/': 'hod',
+}
+
+Route = namedtuple('Route', ['name', 'pattern', 'params', 'role'])
+Sample = namedtuple('Sample', ['status', 'queries'])
+
+
+def _walk(patterns, prefix='', namespace=None):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _walk(pattern.url_patterns, prefix + str(pattern.pattern), pattern.namespace or namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name and namespace in NAMESPACES:
+            yield f"{namespace}:{pattern.name}", prefix + str(pattern.pattern), list(pattern.pattern.converters)
+
+
+def named_routes():
+    """Every named route of the crawled apps, with the role that can open it"""
+    routes = []
+    for name, pattern, params in _walk(get_resolver().url_patterns):
+        if name.startswith('public:'):
+            # Public pages outside the role areas are opened anonymously
+            role = next((role for prefix, role in PUBLIC_ROLES.items() if pattern.startswith(prefix)), None)
+        else:
+            role = 'admin'
+        routes.append(Route(name, pattern, params, role))
+    return routes
+
+
+# Object primary key per URL parameter: by route name first, then by
+# (first path segment, parameter), then by parameter alone
+def _sample_objects(context):
+    college = context['college']
+    hod = context['hod']
+    exam = UniversityExam.objects.filter(
+        program__department__code__startswith=PREFIX, result_published=True
+    ).order_by('-pk').first()
+    session = AttendanceSession.objects.filter(
+        college=college, department__in=hod.departments.all()
+    ).order_by('pk').first()
+    certificate = MedicalCertificate.objects.filter(student__college=college).order_by('pk').first()
+    program = exam.program if exam else None
+    return {
+        'student_id': StudentProfile.objects.filter(college=college).order_by('pk').first(),
+        'faculty_id': FacultyProfile.objects.filter(college=college).order_by('pk').first(),
+        'paper_id': QuestionPaper.objects.filter(status='released').order_by('pk').first(),
+        'session_id': session,
+        'cert_id': certificate,
+        'exam_pk': exam,
+        'subject_pk': exam.subjects.order_by('pk').first() if exam else None,
+        'course_pk': program.semester_courses.order_by('pk').first().course if program else None,
+        ('students', 'pk'): context['student'],
+        ('courses', 'pk'): Course.objects.filter(code__startswith=PREFIX).order_by('pk').first(),
+        ('departments', 'pk'): Department.objects.filter(code__startswith=PREFIX).order_by('pk').first(),
+        ('faculty', 'pk'): hod,
+        ('colleges', 'pk'): college,
+        ('notifications', 'pk'): ExamNotification.objects.filter(notification_type='university').order_by('pk').first(),
+        ('exams', 'pk'): exam,
+        ('question-papers', 'pk'): QuestionPaper.objects.order_by('pk').first(),
+        ('programs', 'pk'): program,
+    }
+
+
+def _query(route, samples):
+    """Query string the AJAX endpoints need to return real data"""
+    exam = samples['exam_pk']
+    if route.name in ('public:get_semester_subjects', 'adminpanel:get_program_courses'):
+        return {'program_id': exam.program_id, 'semester': exam.semester}
+    if route.name == 'adminpanel:get_exam_subjects':
+        return {'exam_id': exam.pk}
+    if route.name == 'search:autocomplete':
+        return {'q': 'co'}
+    if route.name in ('adminpanel:students', 'adminpanel:faculty'):
+        return {'q': 'a'}
+    return None
+
+
+def _resolve(route, samples):
+    """(path, query) for a route, or None when the dataset has no object to open"""
+    kwargs = {}
+    segment = route.pattern.split('/')[1] if route.name.startswith('adminpanel:') else None
+    for param in route.params:
+        obj = samples.get((segment, param), samples.get(param))
+        if obj is None:
+            return None
+        kwargs[param] = obj.pk
+    return reverse(route.name, kwargs=kwargs), _query(route, samples)
+
+
+def _login_context():
+    college = College.objects.filter(code__startswith=PREFIX).order_by('code').first()
+    faculty = FacultyProfile.objects.filter(college=college).select_related('user').order_by('pk')
+    context = {
+        'college': college,
+        'hod': faculty.filter(designation='hod').first(),
+        'principal': faculty.filter(designation='principal').first(),
+        'faculty': faculty.filter(designation='faculty').first(),
+        'student': StudentProfile.objects.filter(college=college, semester__gt=1).select_related('user').order_by('pk').first(),
+    }
+    context['users'] = {
+        'admin': User.objects.get(email=f"admin@{PREFIX.lower()}.load.test"),
+        'college': college.user,
+        'hod': context['hod'].user,
+        'principal': context['principal'].user,
+        'faculty': context['faculty'].user,
+        'student': context['student'].user,
+    }
+    return context
+
+
+def _add_certificates():
+    """One pending medical certificate per student; generate_load_data has none"""
+    today = timezone.now().date()
+    MedicalCertificate.objects.bulk_create([
+        MedicalCertificate(
+            student_id=pk, month=today.month, year=today.year,
+            certificate_file='medical_certificates/sample.pdf', reason='Fever',
+        )
+        for pk in StudentProfile.objects.values_list('pk', flat=True)
+    ], batch_size=500)
+
+
+def crawl(routes):
+    """Open every route once as its role; returns name -> Sample, or None when skipped"""
+    context = _login_context()
+    samples = _sample_objects(context)
+    # Errors are recorded as 500s instead of aborting the crawl
+    clients = {None: Client(raise_request_exception=False)}
+    for role, user in context['users'].items():
+        clients[role] = Client(raise_request_exception=False)
+        clients[role].force_login(user)
+
+    results = {}
+    for route in routes:
+        target = _resolve(route, samples)
+        if target is None:
+            results[route.name] = None
+            continue
+        path, query = target
+        client = clients[route.role]
+        # Warm the per-process caches so both sizes are measured the same way
+        client.get(path, query)
+        metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            response = client.get(path, query)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        results[route.name] = Sample(response.status_code, metrics.queries)
+    # Buffered download rows belong to this dataset, not the next one
+    download_log.flush()
+    return results
+
+
+def crawl_sizes(sizes=SIZES, stdout=None):
+    """
+    Generate each dataset in turn in the current (test) database, crawl
+    every named route and return route -> [Sample per size].
+    """
+    routes = named_routes()
+    runs = []
+    with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media, UMS_METRICS_ENABLED=False):
+        for size in sizes:
+            call_command('flush', interactive=False, verbosity=0)
+            cache.clear()
+            call_command('generate_load_data', prefix=PREFIX, seed=1, batch_size=500, stdout=stdout, **size)
+            _add_certificates()
+            runs.append(crawl(routes))
+    return routes, {route.name: [run[route.name] for run in runs] for route in routes}
+
+
+def find_regressions(results):
+    """Routes that failed, or whose query count grew with the dataset"""
+    problems = []
+    for name, samples in results.items():
+        if any(sample is None for sample in samples):
+            continue
+        if any(sample.status >= 500 for sample in samples):
+            problems.append((name, f"status {[sample.status for sample in samples]}"))
+        elif len({sample.status for sample in samples}) > 1:
+            problems.append((name, f"status changed {[sample.status for sample in samples]}"))
+        elif any(later.queries > earlier.queries for earlier, later in zip(samples, samples[1:])):
+            problems.append((name, f"queries grew {[sample.queries for sample in samples]}"))
+    return problems
@@ -0,0 +1,282 @@
+import codecs
+import csv
+import re
+import zipfile
+from collections import defaultdict
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from accounts.models import FacultyProfile
+from attendance.models import StudentAttendance
+
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Characters XML 1.0 does not allow, even escaped
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+
+class _Buffer:
+    """File-like sink the writers fill and the generators drain after each batch"""
+
+    def __init__(self, empty):
+        self.empty = empty
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = self.empty.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _chunk_size():
+    return getattr(settings, 'UMS_EXPORT_CHUNK_SIZE', 2000)
+
+
+def batches(rows, size=None):
+    """Split an iterable of rows into lists of ``size`` rows"""
+    rows = iter(rows)
+    size = size or _chunk_size()
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    # Keep spreadsheet programs from evaluating user-entered text as a formula
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        return "'" + value
+    return value
+
+
+def csv_stream(header, rows):
+    """Yield a UTF-8 CSV (with BOM, for Excel) one batch of rows at a time"""
+    buffer = _Buffer('')
+    writer = csv.writer(buffer)
+    yield codecs.BOM_UTF8
+    writer.writerow(header)
+    for batch in batches(rows):
+        writer.writerows([_csv_value(value) for value in row] for row in batch)
+        yield buffer.drain().encode('utf-8')
+    yield buffer.drain().encode('utf-8')
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(row):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>'
+
+
+def xlsx_stream(header, rows):
+    """
+    Yield a single-sheet XLSX workbook one batch of rows at a time. The
+    archive is written to a non-seekable buffer, so zipfile emits data
+    descriptors instead of seeking back and nothing is held in memory
+    beyond the current batch. Cells use inline strings, so no shared
+    string table has to be built first.
+    """
+    buffer = _Buffer(b'')
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode('utf-8'))
+            for batch in batches(rows):
+                sheet.write(''.join(_xlsx_row(row) for row in batch).encode('utf-8'))
+                yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def export_response(request, filename, header, rows):
+    """
+    Stream ``rows`` as CSV, or as XLSX when the request asks for
+    ``format=xlsx``. The download starts with the first batch instead of
+    after the whole file has been built.
+    """
+    stamp = timezone.localdate().isoformat()
+    if request.GET.get('format') == 'xlsx':
+        response = StreamingHttpResponse(xlsx_stream(header, rows), content_type=XLSX_CONTENT_TYPE)
+        filename = f'{filename}-{stamp}.xlsx'
+    else:
+        response = StreamingHttpResponse(csv_stream(header, rows), content_type='text/csv; charset=utf-8')
+        filename = f'{filename}-{stamp}.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    # Ask nginx not to buffer the whole body before passing it on
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def export_values(request, filename, columns, queryset, transform=None, extra_columns=()):
+    """
+    Export ``columns`` — (header, field path) pairs — of ``queryset``.
+    Rows come from ``values_list().iterator()``, so no model instances are
+    built and memory stays flat however many rows there are. ``transform``
+    may post-process the stream of value tuples, appending the values for
+    any ``extra_columns`` headers.
+    """
+    header = [title for title, _ in columns] + list(extra_columns)
+    rows = queryset.values_list(*(field for _, field in columns)).iterator(chunk_size=_chunk_size())
+    if transform is not None:
+        rows = transform(rows)
+    return export_response(request, filename, header, rows)
+
+
+# ========== EXPORT DEFINITIONS ==========
+
+STUDENT_COLUMNS = (
+    ('Student ID', 'pk'),
+    ('First Name', 'user__first_name'),
+    ('Last Name', 'user__last_name'),
+    ('Email', 'user__email'),
+    ('Roll Number', 'roll_number'),
+    ('College', 'college__name'),
+    ('Department', 'department__name'),
+    ('Program', 'program__name'),
+    ('Semester', 'semester'),
+    ('Phone', 'phone'),
+    ('Admission Date', 'admission_date'),
+)
+
+FACULTY_COLUMNS = (
+    ('Faculty ID', 'pk'),
+    ('First Name', 'user__first_name'),
+    ('Last Name', 'user__last_name'),
+    ('Email', 'user__email'),
+    ('College', 'college__name'),
+    ('Designation', 'designation'),
+    ('Qualification', 'qualification'),
+    ('Specialization', 'specialization'),
+    ('Phone', 'phone'),
+    ('Joining Date', 'joining_date'),
+)
+
+ATTENDANCE_COLUMNS = (
+    ('Date', 'session__date'),
+    ('Subject Code', 'session__subject__code'),
+    ('Subject', 'session__subject__title'),
+    ('Department', 'session__department__name'),
+    ('Program', 'session__program__name'),
+    ('Semester', 'session__semester'),
+    ('Student ID', 'student_id'),
+    ('Roll Number', 'student__roll_number'),
+    ('First Name', 'student__user__first_name'),
+    ('Last Name', 'student__user__last_name'),
+    ('Status', 'status'),
+    ('Remarks', 'remarks'),
+)
+
+RESULT_COLUMNS = (
+    ('Course Code', 'exam_subject__course__code'),
+    ('Course', 'exam_subject__course__title'),
+    ('Student ID', 'student_id'),
+    ('Roll Number', 'student__roll_number'),
+    ('First Name', 'student__user__first_name'),
+    ('Last Name', 'student__user__last_name'),
+    ('College', 'student__college__name'),
+    ('Marks', 'marks_obtained'),
+    ('Max Marks', 'exam_subject__max_marks'),
+    ('Grade', 'grade'),
+    ('Result', 'is_pass'),
+    ('Remarks', 'remarks'),
+)
+
+
+def student_rows(rows):
+    for pk, *rest in rows:
+        yield (f"STU{pk:04d}", *rest)
+
+
+def faculty_rows(rows):
+    """Format faculty ids and add each member's departments, one lookup per batch"""
+    through = FacultyProfile.departments.through
+    designations = dict(FacultyProfile.DESIGNATION_CHOICES)
+    for batch in batches(rows):
+        departments = defaultdict(list)
+        for faculty_id, name in through.objects.filter(
+            facultyprofile_id__in=[row[0] for row in batch]
+        ).order_by('department__name').values_list('facultyprofile_id', 'department__name'):
+            departments[faculty_id].append(name)
+        for pk, first, last, email, college, designation, *rest in batch:
+            yield (
+                f"FAC{pk:04d}", first, last, email, college,
+                designations.get(designation, designation), *rest,
+                ', '.join(departments[pk]),
+            )
+
+
+def attendance_rows(rows):
+    statuses = dict(StudentAttendance.STATUS_CHOICES)
+    for *head, student_id, roll, first, last, status, remarks in rows:
+        yield (*head, f"STU{student_id:04d}", roll, first, last, statuses.get(status, status), remarks)
+
+
+def result_rows(rows):
+    for code, title, student_id, *rest, is_pass, remarks in rows:
+        yield (code, title, f"STU{student_id:04d}", *rest, 'Pass' if is_pass else 'Fail', remarks)
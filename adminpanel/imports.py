@@ -0,0 +1,610 @@
+import codecs
+import csv
+import posixpath
+import re
+import zipfile
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from xml.etree.ElementTree import ParseError, iterparse
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from accounts.models import FacultyProfile, StudentProfile
+from accounts.passwords import PasswordHasherPool
+from search.index import index_objects
+from .exports import batches
+from .stats import bump_stats_version
+
+User = get_user_model()
+
+SPREADSHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Day zero of spreadsheet date serial numbers
+EXCEL_EPOCH = date(1899, 12, 30)
+
+RowError = namedtuple('RowError', ['line', 'email', 'message'])
+
+
+class SpreadsheetError(ValueError):
+    """The uploaded file cannot be read as a spreadsheet"""
+
+
+# ========== FILE READERS ==========
+
+def _header_key(value):
+    return str(value or '').strip().lower().replace(' ', '_')
+
+
+def _csv_rows(file):
+    try:
+        yield from csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    except UnicodeDecodeError:
+        raise SpreadsheetError('CSV files must be UTF-8 encoded.')
+
+
+def _column_index(reference):
+    """Zero-based column of a cell reference such as 'AB12'"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _first_sheet_path(archive):
+    with archive.open('xl/workbook.xml') as workbook:
+        for _, element in iterparse(workbook):
+            if element.tag == f'{SPREADSHEET_NS}sheet':
+                relationship = element.get(f'{RELATIONSHIP_NS}id')
+                break
+        else:
+            raise SpreadsheetError('The workbook has no sheets.')
+    with archive.open('xl/_rels/workbook.xml.rels') as rels:
+        for _, element in iterparse(rels):
+            if element.tag == f'{PACKAGE_RELATIONSHIP_NS}Relationship' and element.get('Id') == relationship:
+                target = element.get('Target')
+                return target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+    raise SpreadsheetError('The first sheet of the workbook could not be found.')
+
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    strings = []
+    with archive.open('xl/sharedStrings.xml') as part:
+        for _, element in iterparse(part):
+            if element.tag == f'{SPREADSHEET_NS}si':
+                strings.append(''.join(t.text or '' for t in element.iter(f'{SPREADSHEET_NS}t')))
+                element.clear()
+    return strings
+
+
+def _cell_value(cell, strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(t.text or '' for t in cell.iter(f'{SPREADSHEET_NS}t'))
+    value = cell.findtext(f'{SPREADSHEET_NS}v')
+    if value is None:
+        return ''
+    if kind == 's':
+        return strings[int(value)]
+    if kind in ('str', 'e'):
+        return value
+    if kind == 'b':
+        return value == '1'
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _xlsx_rows(file):
+    """
+    Rows of the first worksheet, read with iterparse so only one row is in
+    memory at a time. Cells keep their position even when empty ones are
+    omitted from the file.
+    """
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise SpreadsheetError('The file is not a valid XLSX workbook.')
+    with archive:
+        try:
+            strings = _shared_strings(archive)
+            with archive.open(_first_sheet_path(archive)) as sheet:
+                for _, element in iterparse(sheet):
+                    if element.tag != f'{SPREADSHEET_NS}row':
+                        continue
+                    row = []
+                    for position, cell in enumerate(element.iter(f'{SPREADSHEET_NS}c')):
+                        reference = cell.get('r')
+                        column = _column_index(reference) if reference else position
+                        row.extend([''] * (column - len(row)))
+                        row.append(_cell_value(cell, strings))
+                    element.clear()
+                    yield row
+        except SpreadsheetError:
+            raise
+        # Missing parts, malformed XML, bad shared string indexes or numbers
+        except (KeyError, IndexError, ParseError, ValueError, zipfile.BadZipFile):
+            raise SpreadsheetError('The file is not a valid XLSX workbook.')
+
+
+def read_rows(file, name=''):
+    """
+    Yield (line number, dict) for every data row of an uploaded CSV or XLSX
+    file, keyed by the lower-cased header with spaces as underscores.
+    Blank rows are skipped.
+    """
+    name = (name or getattr(file, 'name', '')).lower()
+    rows = _xlsx_rows(file) if name.endswith('.xlsx') else _csv_rows(file)
+    header = None
+    for line, row in enumerate(rows, start=1):
+        if header is None:
+            header = [_header_key(value) for value in row]
+            continue
+        values = [value.strip() if isinstance(value, str) else value for value in row]
+        if not any(value not in ('', None) for value in values):
+            continue
+        yield line, dict(zip(header, values))
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _date(value):
+    """Parse an ISO date or a spreadsheet date serial; raises ValueError"""
+    if value in ('', None):
+        return None
+    if isinstance(value, (int, float)):
+        try:
+            return EXCEL_EPOCH + timedelta(days=int(value))
+        except OverflowError:
+            raise ValueError(f'Date serial {value} is out of range.')
+    return datetime.strptime(str(value).strip()[:10], '%Y-%m-%d').date()
+
+
+# ========== IMPORTS ==========
+
+STUDENT_IMPORT_COLUMNS = (
+    'email', 'first_name', 'last_name', 'password', 'program', 'department',
+    'roll_number', 'phone', 'semester', 'admission_date',
+)
+
+FACULTY_IMPORT_COLUMNS = (
+    'email', 'first_name', 'last_name', 'password', 'designation', 'departments',
+    'qualification', 'specialization', 'phone', 'joining_date',
+)
+
+
+class ImportReport:
+    """Outcome of an import: rows read and valid, created/updated object ids and per-row errors"""
+
+    def __init__(self):
+        self.created_ids = []
+        self.updated_ids = []
+        self.errors = []
+        self.rows = 0
+        self.valid = 0
+
+    @property
+    def created(self):
+        return len(self.created_ids)
+
+    @property
+    def updated(self):
+        return len(self.updated_ids)
+
+    def error(self, line, email, message):
+        self.errors.append(RowError(line, email, message))
+
+
+class BulkImport:
+    """
+    Streaming spreadsheet import for one college.
+
+    Rows are validated one at a time by ``clean``, which records problems
+    on the report and returns None for rejected rows. Accepted rows are
+    handed to ``write`` in chunks of UMS_IMPORT_CHUNK_SIZE, which checks
+    them against the database with one lookup per chunk and writes them
+    with bulk operations. New accounts get their passwords hashed in a
+    process pool; rows without a password get an unusable one and sign
+    in through the password reset flow.
+    """
+    role = None
+
+    def __init__(self, college, chunk_size=None, workers=None, dry_run=False):
+        self.college = college
+        self.chunk_size = chunk_size or getattr(settings, 'UMS_IMPORT_CHUNK_SIZE', 500)
+        self.workers = workers
+        self.dry_run = dry_run
+        self.report = ImportReport()
+
+    def clean_person(self, data, seen, errors):
+        """Validate the account columns shared by every import"""
+        email = User.objects.normalize_email(_text(data.get('email')))
+        try:
+            validate_email(email)
+        except ValidationError:
+            errors.append('A valid email is required.')
+        if email.lower() in seen:
+            errors.append('Email appears more than once in the file.')
+
+        first_name = _text(data.get('first_name'))
+        last_name = _text(data.get('last_name'))
+        if not first_name:
+            errors.append('First name is required.')
+        if not last_name:
+            errors.append('Last name is required.')
+
+        password = _text(data.get('password')) or None
+        if password is not None and len(password) < 8:
+            errors.append('Password must be at least 8 characters.')
+        return {
+            'email': email,
+            'first_name': first_name[:150],
+            'last_name': last_name[:150],
+            'password': password,
+        }
+
+    def accept(self, line, row, errors, seen):
+        if errors:
+            for message in errors:
+                self.report.error(line, row['email'], message)
+            return None
+        seen.add(row['email'].lower())
+        row['line'] = line
+        return row
+
+    def create_users(self, rows, hasher):
+        """Bulk-create the accounts for ``rows``, returning their ids by e-mail"""
+        hashes = hasher.hash_many(row['password'] for row in rows)
+        User.objects.bulk_create(
+            [
+                User(
+                    email=row['email'],
+                    password=hashed,
+                    first_name=row['first_name'],
+                    last_name=row['last_name'],
+                    role=self.role,
+                )
+                for row, hashed in zip(rows, hashes)
+            ],
+            batch_size=self.chunk_size,
+        )
+        # Not every backend returns primary keys from a bulk insert
+        return dict(User.objects.filter(email__in=[row['email'] for row in rows]).values_list('email', 'pk'))
+
+    def clean(self, line, data, seen):
+        raise NotImplementedError
+
+    def write(self, rows, hasher):
+        raise NotImplementedError
+
+    def finish(self):
+        if self.report.created or self.report.updated:
+            bump_stats_version()
+
+    def run(self, rows):
+        seen = set()
+
+        def cleaned():
+            for line, data in rows:
+                self.report.rows += 1
+                row = self.clean(line, data, seen)
+                if row is not None:
+                    yield row
+
+        with PasswordHasherPool(self.workers) as hasher:
+            for batch in batches(cleaned(), self.chunk_size):
+                self.write(batch, hasher)
+        self.finish()
+        self.report.errors.sort(key=lambda error: error.line)
+        return self.report
+
+
+class StudentImport(BulkImport):
+    """
+    Create students for a college. Programs are checked against the
+    college's affiliated programs, loaded once; the department is taken
+    from the program.
+    """
+    role = 'student'
+
+    def __init__(self, college, **options):
+        super().__init__(college, **options)
+        self.programs = {}
+        for program in college.affiliated_programs.select_related('program__department'):
+            program = program.program
+            self.programs[str(program.pk)] = program
+            self.programs[program.name.lower()] = program
+
+    def _department_matches(self, value, program):
+        department = program.department
+        return value.lower() in (str(department.pk), department.code.lower(), department.name.lower())
+
+    def clean(self, line, data, seen):
+        errors = []
+        row = self.clean_person(data, seen, errors)
+
+        program = self.programs.get(_text(data.get('program')).lower())
+        if program is None:
+            errors.append('Program is missing or not affiliated with your college.')
+        department = _text(data.get('department'))
+        if program is not None and department and not self._department_matches(department, program):
+            errors.append('Department does not match the program.')
+
+        semester = _text(data.get('semester')) or '1'
+        max_semester = program.duration_years * 2 if program is not None else 12
+        if not semester.isdigit() or not 1 <= int(semester) <= max_semester:
+            errors.append(f'Semester must be a number between 1 and {max_semester}.')
+        try:
+            admission_date = _date(data.get('admission_date'))
+        except ValueError:
+            errors.append('Admission date must be in YYYY-MM-DD format.')
+            admission_date = None
+
+        row.update(
+            program=program,
+            roll_number=_text(data.get('roll_number'))[:50],
+            phone=_text(data.get('phone'))[:20],
+            semester=int(semester) if not errors else None,
+            admission_date=admission_date,
+        )
+        return self.accept(line, row, errors, seen)
+
+    def write(self, rows, hasher):
+        emails = [row['email'] for row in rows]
+        existing = {email.lower() for email in User.objects.filter(email__in=emails).values_list('email', flat=True)}
+        for row in rows:
+            if row['email'].lower() in existing:
+                self.report.error(row['line'], row['email'], 'A user with this email already exists.')
+        rows = [row for row in rows if row['email'].lower() not in existing]
+        self.report.valid += len(rows)
+        if not rows or self.dry_run:
+            return
+
+        with transaction.atomic():
+            user_ids = self.create_users(rows, hasher)
+            students = StudentProfile.objects.bulk_create(
+                [
+                    StudentProfile(
+                        user_id=user_ids[row['email']],
+                        college=self.college,
+                        department_id=row['program'].department_id,
+                        program=row['program'],
+                        semester=row['semester'],
+                        roll_number=row['roll_number'],
+                        phone=row['phone'],
+                        admission_date=row['admission_date'],
+                    )
+                    for row in rows
+                ],
+                batch_size=self.chunk_size,
+            )
+            student_ids = [student.pk for student in students if student.pk is not None]
+            if len(student_ids) != len(students):
+                student_ids = list(StudentProfile.objects.filter(
+                    user_id__in=user_ids.values()
+                ).values_list('pk', flat=True))
+            # bulk_create skips the save signals that keep search documents current
+            index_objects('student', student_ids)
+        self.report.created_ids.extend(student_ids)
+
+
+def sync_faculty_departments(assignments):
+    """
+    Make each faculty member's departments exactly the given set, for a
+    ``{faculty_id: department_ids}`` mapping. Current memberships are read
+    with one query and only the difference is written: one bulk_create for
+    the additions and one delete for the removals. Returns the ids of the
+    faculty whose departments changed.
+    """
+    through = FacultyProfile.departments.through
+    current = {}
+    for row_id, faculty_id, department_id in through.objects.filter(
+        facultyprofile_id__in=list(assignments)
+    ).values_list('pk', 'facultyprofile_id', 'department_id'):
+        current.setdefault(faculty_id, {})[department_id] = row_id
+
+    additions, removals, changed = [], [], set()
+    for faculty_id, department_ids in assignments.items():
+        existing = current.get(faculty_id, {})
+        department_ids = set(department_ids)
+        for department_id in department_ids - existing.keys():
+            additions.append(through(facultyprofile_id=faculty_id, department_id=department_id))
+            changed.add(faculty_id)
+        for department_id in existing.keys() - department_ids:
+            removals.append(existing[department_id])
+            changed.add(faculty_id)
+
+    if removals:
+        through.objects.filter(pk__in=removals).delete()
+    if additions:
+        through.objects.bulk_create(additions)
+    return changed
+
+
+class FacultyImport(BulkImport):
+    """
+    Create or update a college's faculty. Rows whose e-mail belongs to a
+    faculty member of the college update that member: names, the profile
+    columns that are filled in, and departments, which are diffed against
+    the current memberships. Passwords of existing accounts are left alone.
+    The one-principal-per-college rule is checked with a single query per
+    chunk.
+    """
+    role = 'faculty'
+    PROFILE_FIELDS = ('designation', 'qualification', 'specialization', 'phone', 'joining_date')
+
+    def __init__(self, college, **options):
+        super().__init__(college, **options)
+        self.departments = {}
+        for affiliation in college.affiliated_departments.select_related('department'):
+            department = affiliation.department
+            for key in (str(department.pk), department.code.lower(), department.name.lower()):
+                self.departments[key] = department.pk
+        self.designations = {}
+        for value, label in FacultyProfile.DESIGNATION_CHOICES:
+            self.designations[value] = self.designations[label.lower()] = value
+
+    def clean(self, line, data, seen):
+        errors = []
+        row = self.clean_person(data, seen, errors)
+
+        designation = _text(data.get('designation')).lower()
+        if designation and designation not in self.designations:
+            errors.append('Designation must be faculty, hod or principal.')
+
+        department_ids = set()
+        for name in re.split('[;,]', _text(data.get('departments'))):
+            name = name.strip().lower()
+            if not name:
+                continue
+            if name not in self.departments:
+                errors.append(f'Department "{name}" is not affiliated with your college.')
+            else:
+                department_ids.add(self.departments[name])
+        if not department_ids and not errors:
+            errors.append('At least one department is required.')
+
+        try:
+            joining_date = _date(data.get('joining_date'))
+        except ValueError:
+            errors.append('Joining date must be in YYYY-MM-DD format.')
+            joining_date = None
+
+        row.update(
+            designation=self.designations.get(designation),
+            department_ids=department_ids,
+            qualification=_text(data.get('qualification'))[:256],
+            specialization=_text(data.get('specialization'))[:256],
+            phone=_text(data.get('phone'))[:20],
+            joining_date=joining_date,
+        )
+        return self.accept(line, row, errors, seen)
+
+    def _check_principal(self, rows):
+        """Reject rows that would give the college a second principal"""
+        principal = self.college.faculty_members.filter(
+            designation='principal'
+        ).values_list('user__email', flat=True).first()
+        principal = principal.lower() if principal else None
+
+        accepted = []
+        for row in rows:
+            email = row['email'].lower()
+            if row['designation'] == 'principal':
+                if principal not in (None, email):
+                    self.report.error(
+                        row['line'], row['email'],
+                        'This college already has a Principal. There can only be one Principal per college.'
+                    )
+                    continue
+                principal = email
+            elif row['designation'] and principal == email:
+                principal = None
+            accepted.append(row)
+        return accepted
+
+    def write(self, rows, hasher):
+        accounts = {
+            email.lower(): (user_id, faculty_id, college_id)
+            for email, user_id, faculty_id, college_id in User.objects.filter(
+                email__in=[row['email'] for row in rows]
+            ).values_list('email', 'pk', 'faculty_profile__pk', 'faculty_profile__college_id')
+        }
+        candidates = []
+        for row in rows:
+            account = accounts.get(row['email'].lower())
+            if account is not None and (account[1] is None or account[2] != self.college.pk):
+                self.report.error(row['line'], row['email'], 'A user with this email already exists.')
+                continue
+            if account is not None:
+                row['user_id'], row['faculty_id'] = account[:2]
+            candidates.append(row)
+
+        # In file order, so a principal demoted earlier in the file frees the post
+        rows = self._check_principal(candidates)
+        new_rows = [row for row in rows if 'faculty_id' not in row]
+        update_rows = [row for row in rows if 'faculty_id' in row]
+        self.report.valid += len(rows)
+        if not rows or self.dry_run:
+            return
+
+        with transaction.atomic():
+            if new_rows:
+                user_ids = self.create_users(new_rows, hasher)
+                FacultyProfile.objects.bulk_create(
+                    [
+                        FacultyProfile(
+                            user_id=user_ids[row['email']],
+                            college=self.college,
+                            designation=row['designation'] or 'faculty',
+                            qualification=row['qualification'],
+                            specialization=row['specialization'],
+                            phone=row['phone'],
+                            joining_date=row['joining_date'],
+                        )
+                        for row in new_rows
+                    ],
+                    batch_size=self.chunk_size,
+                )
+                faculty_ids = dict(FacultyProfile.objects.filter(
+                    user_id__in=user_ids.values()
+                ).values_list('user_id', 'pk'))
+                for row in new_rows:
+                    row['user_id'] = user_ids[row['email']]
+                    row['faculty_id'] = faculty_ids[row['user_id']]
+
+            if update_rows:
+                self._update(update_rows)
+
+            sync_faculty_departments({row['faculty_id']: row['department_ids'] for row in rows})
+            faculty_changed([row['faculty_id'] for row in rows])
+
+        self.report.created_ids.extend(row['faculty_id'] for row in new_rows)
+        self.report.updated_ids.extend(row['faculty_id'] for row in update_rows)
+
+    def _update(self, rows):
+        profiles = FacultyProfile.objects.in_bulk([row['faculty_id'] for row in rows])
+        users = User.objects.only('first_name', 'last_name').in_bulk([row['user_id'] for row in rows])
+        for row in rows:
+            profile = profiles[row['faculty_id']]
+            # Blank cells keep the current value
+            for field in self.PROFILE_FIELDS:
+                if row[field]:
+                    setattr(profile, field, row[field])
+            user = users[row['user_id']]
+            user.first_name = row['first_name']
+            user.last_name = row['last_name']
+        FacultyProfile.objects.bulk_update(profiles.values(), self.PROFILE_FIELDS, batch_size=self.chunk_size)
+        User.objects.bulk_update(users.values(), ['first_name', 'last_name'], batch_size=self.chunk_size)
+
+
+def faculty_changed(faculty_ids):
+    """
+    Side effects of bulk faculty writes, which bypass model signals:
+    refresh their search documents.
+    """
+    index_objects('faculty', faculty_ids)
+
+
+def import_students(college, file, name='', **options):
+    """Import students for ``college`` from an uploaded CSV or XLSX file"""
+    return StudentImport(college, **options).run(read_rows(file, name))
+
+
+def import_faculty(college, file, name='', **options):
+    """Create or update faculty of ``college`` from an uploaded CSV or XLSX file"""
+    return FacultyImport(college, **options).run(read_rows(file, name))
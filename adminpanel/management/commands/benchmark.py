@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from adminpanel.benchmarks import SCENARIOS, BenchmarkError, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = "Benchmark the hot portal and admin views against a generate_load_data dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='LT', help="Prefix the dataset was generated with")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            choices=[scenario.name for scenario in SCENARIOS], help="Run only these scenarios")
+        parser.add_argument('--output', help="Write the JSON results to this file")
+        parser.add_argument('--compare', help="Fail if results regress against this earlier JSON file")
+        parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed p50 latency growth when comparing")
+        parser.add_argument('--keep-changes', action='store_true', help="Keep the writes made by POST scenarios")
+
+    def handle(self, *args, **options):
+        try:
+            results = run_benchmarks(
+                prefix=options['prefix'],
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                names=options['scenarios'],
+                keep_changes=options['keep_changes'],
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'scenario':<28} {'p50':>8} {'p95':>8} {'max':>8} {'queries':>8}")
+        for name, result in results['scenarios'].items():
+            latency, queries = result['latency_ms'], result['queries']
+            count = str(queries['max']) if queries['min'] == queries['max'] else f"{queries['min']}-{queries['max']}"
+            self.stdout.write(f"{name:<28} {latency['p50']:>7.1f}ms {latency['p95']:>6.1f}ms {latency['max']:>6.1f}ms {count:>8}")
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                json.dump(results, out, indent=2, sort_keys=True)
+            self.stdout.write(f"  ✓ Results written to {options['output']}")
+
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as baseline:
+                regressions = compare(json.load(baseline), results, options['tolerance'])
+            for name, message in regressions:
+                self.stdout.write(self.style.ERROR(f"  ✗ {name}: {message}"))
+            if regressions:
+                raise CommandError(f"{len(regressions)} regression(s) against {options['compare']}.")
+            self.stdout.write(self.style.SUCCESS(f"✓ No regressions against {options['compare']}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✓ Benchmarked {len(results['scenarios'])} scenarios."))
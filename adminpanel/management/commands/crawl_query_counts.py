@@ -0,0 +1,60 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from adminpanel.crawler import SIZES, crawl_sizes, find_regressions
+
+
+class Command(BaseCommand):
+    help = (
+        "Open every named route as its role against two generated dataset sizes "
+        "in a throwaway test database and fail if any page's query count grows with the data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Write the per-route query counts to this JSON file")
+        parser.add_argument('--verbose-routes', action='store_true', help="List every route, not only problems")
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        self.stdout.write("Creating test database...")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            # generate_load_data progress is only shown at -v 2
+            routes, results = crawl_sizes(stdout=io.StringIO() if options['verbosity'] < 2 else None)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        problems = dict(find_regressions(results))
+        skipped = [name for name, samples in results.items() if any(sample is None for sample in samples)]
+        for route in routes:
+            samples = results[route.name]
+            if route.name in skipped or (route.name not in problems and not options['verbose_routes']):
+                continue
+            counts = ' -> '.join(f"{sample.queries} ({sample.status})" for sample in samples)
+            line = f"  {route.name:<45} {route.role or 'anonymous':<10} {counts}"
+            if route.name in problems:
+                self.stdout.write(self.style.ERROR(f"{line}  ✗ {problems[route.name]}"))
+            else:
+                self.stdout.write(line)
+        for name in skipped:
+            self.stdout.write(self.style.WARNING(f"  - {name}: skipped, no sample object in the dataset"))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                json.dump({
+                    'sizes': SIZES,
+                    'routes': {
+                        name: [sample._asdict() if sample else None for sample in samples]
+                        for name, samples in results.items()
+                    },
+                }, out, indent=2, sort_keys=True)
+            self.stdout.write(f"  ✓ Results written to {options['output']}")
+
+        if problems:
+            raise CommandError(f"{len(problems)} of {len(results) - len(skipped)} routes regressed.")
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {len(results) - len(skipped)} routes keep a constant query count across dataset sizes."
+        ))
@@ -0,0 +1,457 @@
+import random
+import time
+from datetime import date, timedelta
+from itertools import cycle
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import College, CollegeAffiliatedDepartment, CollegeAffiliatedProgram, FacultyProfile, StudentProfile
+from academic.catalog import bump_catalog_version
+from academic.notifications import invalidate_university_notifications
+from academic.publication import refresh_exam_results
+from academic.results import bump_results_version
+from academic.services import invalidate_released_papers
+from academic.models import (
+    Course, Department, ExamNotification, ExamSubject, Program, ProgramSemesterCourse,
+    QuestionPaper, StudentResult, UniversityExam,
+)
+from attendance.models import AttendanceSession, StudentAttendance
+from attendance.services import rebuild_attendance_summary
+from adminpanel.stats import bump_stats_version
+from search.index import rebuild_search_index
+
+User = get_user_model()
+
+DEPARTMENT_NAMES = (
+    'Computer Science', 'Mathematics', 'Physics', 'Chemistry', 'Commerce', 'English',
+    'Economics', 'Biology', 'History', 'Electronics', 'Statistics', 'Psychology',
+)
+PROGRAM_KINDS = ('BSc', 'MSc', 'BA', 'MA', 'BCom', 'BTech')
+COURSE_WORDS = (
+    'Foundations', 'Methods', 'Analysis', 'Theory', 'Laboratory', 'Systems', 'Applications',
+    'Modelling', 'Seminar', 'Design', 'Principles', 'Topics',
+)
+FIRST_NAMES = (
+    'Aarav', 'Aditi', 'Akhil', 'Anjali', 'Arjun', 'Devika', 'Farhan', 'Gauri', 'Hari', 'Isha',
+    'Jithin', 'Kavya', 'Lakshmi', 'Manu', 'Meera', 'Nikhil', 'Nisha', 'Rahul', 'Riya', 'Sanjay',
+    'Sneha', 'Tara', 'Vivek', 'Zara', 'Abel', 'Bincy', 'Christy', 'Diya', 'Elias', 'Fathima',
+)
+LAST_NAMES = (
+    'Nair', 'Menon', 'Pillai', 'Kurian', 'Thomas', 'Joseph', 'Varghese', 'Iyer', 'Rao', 'Khan',
+    'Das', 'George', 'Mathew', 'Krishnan', 'Paul', 'Jacob', 'Raj', 'Babu', 'Sebastian', 'Philip',
+)
+
+# Minimal PDF shared by every generated question paper
+SAMPLE_PAPER = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n'
+    b'trailer<</Root 1 0 R>>\n%%EOF\n'
+)
+
+
+class Command(BaseCommand):
+    help = "Generate a large, reproducible university dataset for load and performance testing"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colleges', type=int, default=3)
+        parser.add_argument('--departments', type=int, default=4)
+        parser.add_argument('--programs', type=int, default=2, help="Programs per department")
+        parser.add_argument('--courses', type=int, default=5, help="Courses per program semester")
+        parser.add_argument('--students', type=int, default=1000, help="Students per college")
+        parser.add_argument('--faculty', type=int, default=5, help="Faculty per department per college")
+        parser.add_argument('--days', type=int, default=200, help="Teaching days of attendance")
+        parser.add_argument('--sessions-per-day', type=int, default=4, help="Attendance sessions per class per day")
+        parser.add_argument('--notifications', type=int, default=50, help="University and per-college notifications")
+        parser.add_argument('--start-date', type=date.fromisoformat, default=None,
+                            help="First teaching day (YYYY-MM-DD); defaults to a year ago")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default='LT', help="Prefix of generated codes and e-mail domain")
+        parser.add_argument('--password', default='loadpass', help="Password of every generated account")
+        parser.add_argument('--skip-attendance', action='store_true')
+        parser.add_argument('--skip-search-index', action='store_true')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix'].upper()
+        self.domain = f"{self.prefix.lower()}.load.test"
+        if College.objects.filter(code__startswith=self.prefix).exists() or Department.objects.filter(
+            code__startswith=self.prefix
+        ).exists():
+            raise CommandError(f"Data with prefix '{self.prefix}' already exists; use another --prefix or a fresh database.")
+        # Hash once: every generated account shares the same password
+        self.password = make_password(options['password'])
+        self.now = timezone.now()
+
+        started = time.monotonic()
+        self.step("Catalog", self.create_catalog)
+        self.step("Colleges", self.create_colleges)
+        self.step("Faculty", self.create_faculty)
+        self.step("Students", self.create_students)
+        if not options['skip_attendance']:
+            self.step("Attendance sessions", self.create_sessions)
+            self.step("Attendance records", self.create_attendance)
+            self.step("Attendance summary", lambda: rebuild_attendance_summary(batch_size=self.batch_size))
+        self.step("Exams and results", self.create_exams)
+        self.step("Result publication", self.publish_results)
+        self.step("Question papers", self.create_question_papers)
+        self.step("Notifications", self.create_notifications)
+        if not options['skip_search_index']:
+            self.step("Search index", lambda: sum(rebuild_search_index(batch_size=self.batch_size).values()))
+
+        # Bulk inserts bypass the signals that invalidate these caches
+        bump_stats_version()
+        bump_catalog_version()
+        bump_results_version()
+        invalidate_released_papers()
+        invalidate_university_notifications()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Generated '{self.prefix}' dataset in {time.monotonic() - started:.1f}s "
+            f"(accounts use the password '{options['password']}', admin: admin@{self.domain})"
+        ))
+
+    def step(self, label, func):
+        started = time.monotonic()
+        with transaction.atomic():
+            count = func()
+        self.stdout.write(f"  ✓ {label}: {count} rows in {time.monotonic() - started:.1f}s")
+
+    def bulk(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        return len(objs)
+
+    def person(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def create_users(self, rows, role, is_staff=False):
+        """Insert users from (email, first, last) rows; returns email -> id"""
+        self.bulk(User, [
+            User(email=email, first_name=first, last_name=last, role=role, is_staff=is_staff, password=self.password)
+            for email, first, last in rows
+        ])
+        ids = {}
+        emails = [email for email, _, _ in rows]
+        # bulk_create does not return primary keys on every backend
+        for start in range(0, len(emails), self.batch_size):
+            ids.update(User.objects.filter(email__in=emails[start:start + self.batch_size]).values_list('email', 'pk'))
+        return ids
+
+    # ========== CATALOG ==========
+
+    def create_catalog(self):
+        names = cycle(DEPARTMENT_NAMES)
+        self.bulk(Department, [
+            Department(name=f"{next(names)} {self.prefix}{i + 1}", code=f"{self.prefix}D{i + 1:02d}")
+            for i in range(self.options['departments'])
+        ])
+        self.departments = list(Department.objects.filter(code__startswith=self.prefix).order_by('code'))
+
+        programs = []
+        for d, department in enumerate(self.departments):
+            for p in range(self.options['programs']):
+                kind = PROGRAM_KINDS[(d + p) % len(PROGRAM_KINDS)]
+                duration = 2 if kind.startswith('M') else self.rng.choice((3, 4))
+                programs.append(Program(name=f"{kind} {department.name} {p + 1}", department=department, duration_years=duration))
+        self.bulk(Program, programs)
+        self.programs = list(Program.objects.filter(department__in=self.departments).order_by('pk'))
+
+        courses, links = [], []
+        for program in self.programs:
+            for semester in range(1, program.duration_years * 2 + 1):
+                for k in range(self.options['courses']):
+                    code = f"{self.prefix}{program.pk}-{semester}{k + 1:02d}"
+                    title = f"{program.department.name} {self.rng.choice(COURSE_WORDS)} {semester}.{k + 1}"
+                    courses.append(Course(code=code, title=title, credits=self.rng.choice((2, 3, 4)), department=program.department))
+                    links.append((program.pk, semester, code, k == self.options['courses'] - 1 and semester > 2))
+        self.bulk(Course, courses)
+        course_ids = dict(Course.objects.filter(code__startswith=self.prefix).values_list('code', 'pk'))
+        self.bulk(ProgramSemesterCourse, [
+            ProgramSemesterCourse(program_id=program_id, semester=semester, course_id=course_ids[code], is_elective=elective)
+            for program_id, semester, code, elective in links
+        ])
+        # (program id, semester) -> course ids, in code order
+        self.curriculum = {}
+        for program_id, semester, course_id in ProgramSemesterCourse.objects.filter(
+            program__in=self.programs
+        ).order_by('course__code').values_list('program_id', 'semester', 'course_id'):
+            self.curriculum.setdefault((program_id, semester), []).append(course_id)
+        return len(self.departments) + len(self.programs) + len(courses) * 2
+
+    # ========== COLLEGES AND PEOPLE ==========
+
+    def create_colleges(self):
+        count = self.options['colleges']
+        user_ids = self.create_users(
+            [(f"college{c + 1}@{self.domain}", 'College', f"{c + 1}") for c in range(count)], 'college'
+        )
+        self.admin_id = self.create_users([(f"admin@{self.domain}", 'Load', 'Admin')], 'admin', is_staff=True)[f"admin@{self.domain}"]
+        self.bulk(College, [
+            College(
+                user_id=user_ids[f"college{c + 1}@{self.domain}"],
+                name=f"{self.prefix} College {c + 1}",
+                code=f"{self.prefix}C{c + 1:02d}",
+                email=f"college{c + 1}@{self.domain}",
+                established_year=self.rng.randint(1950, 2015),
+                status='approved',
+                approved_at=self.now,
+                affiliation_status='approved',
+                affiliation_applied_at=self.now,
+                affiliation_approved_at=self.now,
+            )
+            for c in range(count)
+        ])
+        self.colleges = list(College.objects.filter(code__startswith=self.prefix).order_by('code'))
+        self.bulk(CollegeAffiliatedDepartment, [
+            CollegeAffiliatedDepartment(college=college, department=department)
+            for college in self.colleges for department in self.departments
+        ])
+        self.bulk(CollegeAffiliatedProgram, [
+            CollegeAffiliatedProgram(college=college, program=program)
+            for college in self.colleges for program in self.programs
+        ])
+        return count * (2 + len(self.departments) + len(self.programs)) + 1
+
+    def create_faculty(self):
+        rows, profiles = [], []
+        for c, college in enumerate(self.colleges):
+            principal = f"principal.c{c + 1}@{self.domain}"
+            rows.append((principal, *self.person()))
+            profiles.append((principal, college, 'principal', self.departments[0]))
+            for d, department in enumerate(self.departments):
+                for f in range(self.options['faculty']):
+                    email = f"{'hod' if f == 0 else 'faculty'}{'' if f == 0 else f}.d{d + 1}.c{c + 1}@{self.domain}"
+                    rows.append((email, *self.person()))
+                    profiles.append((email, college, 'hod' if f == 0 else 'faculty', department))
+        user_ids = self.create_users(rows, 'faculty')
+        self.bulk(FacultyProfile, [
+            FacultyProfile(
+                user_id=user_ids[email], college=college, designation=designation,
+                qualification=self.rng.choice(('PhD', 'MPhil', 'MSc', 'MTech')),
+                joining_date=date(self.rng.randint(2000, 2022), self.rng.randint(1, 12), 1),
+            )
+            for email, college, designation, _ in profiles
+        ])
+        faculty_ids = dict(FacultyProfile.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'pk'))
+        through = FacultyProfile.departments.through
+        self.bulk(through, [
+            through(facultyprofile_id=faculty_ids[user_ids[email]], department_id=department.pk)
+            for email, _, _, department in profiles
+        ])
+        # Sessions are recorded by each department's HOD
+        self.hods = {
+            (college.pk, department.pk): faculty_ids[user_ids[email]]
+            for email, college, designation, department in profiles if designation == 'hod'
+        }
+        return len(profiles) * 3
+
+    def create_students(self):
+        rows, profiles = [], []
+        for c, college in enumerate(self.colleges):
+            for n in range(self.options['students']):
+                program = self.rng.choice(self.programs)
+                semester = self.rng.randint(1, program.duration_years * 2)
+                email = f"s{n + 1}.c{c + 1}@{self.domain}"
+                rows.append((email, *self.person()))
+                admitted = date(self.now.year - (semester - 1) // 2, 7, 1)
+                profiles.append((email, college, program, semester, f"{college.code}{n + 1:06d}", admitted))
+        total = 0
+        for start in range(0, len(rows), self.batch_size):
+            user_ids = self.create_users(rows[start:start + self.batch_size], 'student')
+            total += self.bulk(StudentProfile, [
+                StudentProfile(
+                    user_id=user_ids[email], college=college, department_id=program.department_id, program=program,
+                    semester=semester, roll_number=roll, admission_date=admitted,
+                    phone=f"9{self.rng.randrange(10 ** 9):09d}",
+                )
+                for email, college, program, semester, roll, admitted in profiles[start:start + self.batch_size]
+            ])
+        # Classes that have students: (college id, program id, semester)
+        self.classes = sorted(set(
+            StudentProfile.objects.filter(college__in=self.colleges).values_list('college_id', 'program_id', 'semester').distinct()
+        ))
+        return total * 2
+
+    # ========== ATTENDANCE ==========
+
+    def teaching_days(self):
+        day = self.options['start_date'] or (timezone.localdate() - timedelta(days=365))
+        days = []
+        while len(days) < self.options['days']:
+            if day.weekday() < 5:
+                days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    def create_sessions(self):
+        departments = dict((program.pk, program.department_id) for program in self.programs)
+        days = self.teaching_days()
+        per_day = self.options['sessions_per_day']
+        sessions = []
+        for college_id, program_id, semester in self.classes:
+            courses = self.curriculum.get((program_id, semester))
+            if not courses:
+                continue
+            department_id = departments[program_id]
+            created_by = self.hods.get((college_id, department_id))
+            subjects = cycle(courses)
+            for day in days:
+                # Each subject at most once a day, as unique_together requires
+                for course_id in {next(subjects) for _ in range(min(per_day, len(courses)))}:
+                    sessions.append(AttendanceSession(
+                        college_id=college_id, department_id=department_id, program_id=program_id,
+                        subject_id=course_id, semester=semester, date=day, created_by_id=created_by,
+                    ))
+        return self.bulk(AttendanceSession, sessions)
+
+    def create_attendance(self):
+        """
+        Insert every class member's attendance with one INSERT ... SELECT
+        per range of sessions, so millions of rows never pass through
+        Python. Statuses are a hash of the session and student ids: each
+        student gets a steady presence rate of 65-94%, with a few leaves.
+        """
+        sessions = AttendanceSession.objects.filter(college__in=self.colleges)
+        low, high = sessions.order_by('pk').values_list('pk', flat=True).first(), sessions.order_by('-pk').values_list('pk', flat=True).first()
+        if low is None:
+            return 0
+        seed = self.options['seed']
+        attendance = StudentAttendance._meta.db_table
+        session = AttendanceSession._meta.db_table
+        student = StudentProfile._meta.db_table
+        # %% is a literal modulo once the range parameters are interpolated
+        roll = f"((s.id * 7919 + st.id * 104729 + {seed}) %% 100)"
+        sql = (
+            f"INSERT INTO {attendance} (session_id, student_id, status, remarks) "
+            f"SELECT s.id, st.id, CASE "
+            f"WHEN {roll} < 65 + (st.id * 13) %% 30 THEN 'present' "
+            f"WHEN {roll} >= 97 THEN 'leave' ELSE 'absent' END, '' "
+            f"FROM {session} s JOIN {student} st ON st.college_id = s.college_id "
+            f"AND st.program_id = s.program_id AND st.semester = s.semester "
+            f"WHERE s.id BETWEEN %s AND %s"
+        )
+        # Roughly batch_size attendance rows per statement
+        class_size = max(1, self.options['students'] // max(1, len(self.classes) // len(self.colleges)))
+        step = max(1, self.batch_size * 20 // class_size)
+        written = 0
+        with connection.cursor() as cursor:
+            for start in range(low, high + 1, step):
+                cursor.execute(sql, [start, min(start + step - 1, high)])
+                written += cursor.rowcount
+        return written
+
+    # ========== EXAMS, PAPERS AND NOTIFICATIONS ==========
+
+    def create_exams(self):
+        """
+        A published exam with results for every semester before a
+        program's last one (classes above it have completed it), and an
+        upcoming exam for every semester, which the question papers use.
+        """
+        today = timezone.localdate()
+        exams = []
+        for program in self.programs:
+            last = program.duration_years * 2
+            for semester in range(1, last + 1):
+                if semester < last:
+                    held = today - timedelta(days=120 * (last - semester))
+                    exams.append(UniversityExam(
+                        name=f"End Semester Exam - Sem {semester}", program=program, semester=semester,
+                        academic_year=f"{held.year - 1}-{held.year}", exam_start_date=held,
+                        exam_end_date=held + timedelta(days=10), result_published=True, result_published_at=self.now,
+                    ))
+                upcoming = today + timedelta(days=30)
+                exams.append(UniversityExam(
+                    name=f"Upcoming Exam - Sem {semester}", program=program, semester=semester,
+                    academic_year=f"{upcoming.year}-{upcoming.year + 1}", exam_start_date=upcoming,
+                    exam_end_date=upcoming + timedelta(days=10),
+                ))
+        self.bulk(UniversityExam, exams)
+        exams = UniversityExam.objects.filter(program__in=self.programs).values_list('pk', 'program_id', 'semester', 'result_published')
+        self.bulk(ExamSubject, [
+            ExamSubject(exam_id=exam_id, course_id=course_id)
+            for exam_id, program_id, semester, _ in exams
+            for course_id in self.curriculum.get((program_id, semester), ())
+        ])
+        # (program id, semester) -> (subject id, max marks, pass marks) of the published exams
+        subjects = {}
+        for pk, program_id, semester, max_marks, pass_marks in ExamSubject.objects.filter(
+            exam__program__in=self.programs, exam__result_published=True
+        ).order_by('pk').values_list('pk', 'exam__program_id', 'exam__semester', 'max_marks', 'pass_marks'):
+            subjects.setdefault((program_id, semester), []).append((pk, max_marks, pass_marks))
+
+        written = 0
+        batch = []
+        students = StudentProfile.objects.filter(college__in=self.colleges).order_by('pk').values_list('pk', 'program_id', 'semester')
+        for student_id, program_id, current in students.iterator(chunk_size=self.batch_size):
+            # Each student has a steady ability the marks scatter around
+            ability = self.rng.gauss(62, 12)
+            for semester in range(1, current):
+                for subject_id, max_marks, pass_marks in subjects.get((program_id, semester), ()):
+                    marks = max(0, min(max_marks, round(self.rng.gauss(ability, 10) * max_marks / 100)))
+                    grade, is_pass = StudentResult.grade_marks([marks], max_marks, pass_marks)[0]
+                    batch.append(StudentResult(
+                        student_id=student_id, exam_subject_id=subject_id, marks_obtained=marks,
+                        grade=grade, is_pass=is_pass, entered_by_id=self.admin_id,
+                    ))
+            if len(batch) >= self.batch_size:
+                written += self.bulk(StudentResult, batch)
+                batch = []
+        if batch:
+            written += self.bulk(StudentResult, batch)
+        return len(exams) + written
+
+    def publish_results(self):
+        """GPAs, statistics and rank lists of the published exams, oldest semester first"""
+        return sum(
+            refresh_exam_results(exam).students
+            for exam in UniversityExam.objects.filter(
+                program__in=self.programs, result_published=True
+            ).order_by('semester', 'exam_start_date', 'pk')
+        )
+
+    def create_question_papers(self):
+        """One paper per upcoming exam subject, about half already released"""
+        name = default_storage.save(f'question_papers/{self.prefix.lower()}-sample.pdf', ContentFile(SAMPLE_PAPER))
+        papers = []
+        for subject_id, code in ExamSubject.objects.filter(
+            exam__program__in=self.programs, exam__result_published=False
+        ).order_by('pk').values_list('pk', 'course__code'):
+            released = self.rng.random() < 0.5
+            papers.append(QuestionPaper(
+                exam_subject_id=subject_id, title=f"{code} Question Paper", paper_file=name,
+                release_datetime=self.now + timedelta(hours=self.rng.randint(1, 240) * (-1 if released else 1)),
+                status='released' if released else 'scheduled',
+                released_at=self.now if released else None, uploaded_by_id=self.admin_id,
+            ))
+        return self.bulk(QuestionPaper, papers)
+
+    def create_notifications(self):
+        count = self.options['notifications']
+        priorities = [choice for choice, _ in ExamNotification.PRIORITY_CHOICES]
+        notifications = [
+            ExamNotification(
+                notification_type='university', title=f"University notice {n + 1}",
+                content=f"Schedule and instructions for notice {n + 1}.", priority=self.rng.choice(priorities),
+                created_by_id=self.admin_id, exam_date=timezone.localdate() + timedelta(days=self.rng.randint(1, 90)),
+            )
+            for n in range(count)
+        ]
+        for college in self.colleges:
+            notifications.extend(
+                ExamNotification(
+                    notification_type='college', college=college, title=f"{college.code} notice {n + 1}",
+                    content=f"Internal exam notice {n + 1}.", priority=self.rng.choice(priorities),
+                    exam_date=timezone.localdate() + timedelta(days=self.rng.randint(1, 60)),
+                )
+                for n in range(count)
+            )
+        return self.bulk(ExamNotification, notifications)
@@ -0,0 +1,62 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import College
+from adminpanel.imports import SpreadsheetError, import_faculty
+
+
+class Command(BaseCommand):
+    help = "Bulk-import or update faculty of a college from a CSV or XLSX file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('college', help="College code or id")
+        parser.add_argument('path', help="CSV or XLSX file with a header row")
+        parser.add_argument('--chunk-size', type=int, default=None, help="Rows validated and inserted per batch")
+        parser.add_argument('--workers', type=int, default=None, help="Processes used to hash passwords")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without creating anyone")
+        parser.add_argument('--errors', help="Write the per-row error report to this CSV file")
+
+    def handle(self, *args, **options):
+        college = College.objects.filter(code=options['college']).first()
+        if college is None and options['college'].isdigit():
+            college = College.objects.filter(pk=options['college']).first()
+        if college is None:
+            raise CommandError(f"College '{options['college']}' not found.")
+        if not college.can_enroll_students:
+            raise CommandError(f"{college.name} is not yet authorized to add faculty.")
+
+        started = time.monotonic()
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_faculty(
+                    college, file, options['path'],
+                    chunk_size=options['chunk_size'],
+                    workers=options['workers'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, SpreadsheetError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        for error in report.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  ✗ line {error.line} {error.email}: {error.message}"))
+        if len(report.errors) > 20:
+            self.stdout.write(f"  ... {len(report.errors) - 20} more errors")
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as out:
+                writer = csv.writer(out)
+                writer.writerow(['line', 'email', 'error'])
+                writer.writerows(report.errors)
+            self.stdout.write(f"  ✓ Error report written to {options['errors']}")
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ {report.valid} of {report.rows} rows are valid ({len(report.errors)} errors) in {elapsed:.1f}s"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Added {report.created} and updated {report.updated} of {report.rows} faculty in {college.name} "
+                f"({len(report.errors)} errors) in {elapsed:.1f}s"
+            ))
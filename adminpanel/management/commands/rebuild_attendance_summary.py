@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from attendance.services import find_summary_mismatches, rebuild_attendance_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the student attendance summary table from raw attendance records"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify-only', action='store_true', help="Only compare the summary with raw records")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not options['verify_only']:
+            self.stdout.write("Rebuilding attendance summary...")
+            created = rebuild_attendance_summary(batch_size=options['batch_size'])
+            self.stdout.write(f"  ✓ Created {created} summary rows")
+
+        self.stdout.write("Verifying against raw attendance records...")
+        mismatches = find_summary_mismatches()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("✓ Attendance summary matches raw records."))
+            return
+
+        for key, expected, stored in mismatches[:20]:
+            student_id, subject_id, semester, year, month = key
+            self.stdout.write(
+                f"  student={student_id} subject={subject_id} sem={semester} {month}/{year}: "
+                f"expected={expected} stored={stored}"
+            )
+        self.stdout.write(self.style.ERROR(f"✗ {len(mismatches)} summary rows do not match raw records."))
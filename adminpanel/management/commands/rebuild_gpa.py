@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from academic.gpa import rebuild_gpa
+from academic.models import UniversityExam
+from academic.publication import build_result_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the student SGPA/CGPA table and the result statistics and rank list "
+        "snapshots from the results of every published exam"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--snapshots-only', action='store_true', help="Keep the GPA table; only rebuild snapshots")
+
+    def handle(self, *args, **options):
+        if not options['snapshots_only']:
+            self.stdout.write("Rebuilding grade point averages...")
+            written = rebuild_gpa()
+            self.stdout.write(f"  ✓ Wrote {written} SGPA rows")
+
+        self.stdout.write("Rebuilding result snapshots...")
+        exams = ranked = 0
+        for exam in UniversityExam.objects.filter(result_published=True).order_by('semester', 'exam_start_date', 'pk'):
+            ranked += build_result_snapshots(exam).students
+            exams += 1
+        self.stdout.write(self.style.SUCCESS(f"✓ Snapshots written for {exams} exams ({ranked} ranked students)."))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from search.index import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search documents used by the listing search boxes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding search documents...")
+        counts = rebuild_search_index(batch_size=options['batch_size'])
+        for entity, written in counts.items():
+            self.stdout.write(f"  ✓ {written} {entity} documents")
+        self.stdout.write(self.style.SUCCESS("✓ Search index rebuilt."))
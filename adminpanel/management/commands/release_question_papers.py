@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from academic.services import next_scheduled_release, release_due_papers
+
+
+class Command(BaseCommand):
+    help = "Release scheduled question papers whose release time has passed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep running and release papers as they fall due")
+        parser.add_argument(
+            '--interval', type=float, default=getattr(settings, 'UMS_PAPER_RELEASE_INTERVAL', 60),
+            help="Longest sleep in seconds between checks when looping"
+        )
+
+    def handle(self, *args, **options):
+        self.release()
+        if not options['loop']:
+            return
+
+        self.stdout.write("Waiting for scheduled papers (Ctrl+C to stop)...")
+        try:
+            while True:
+                # Wake at the next release instant rather than polling blindly
+                delay = options['interval']
+                next_release = next_scheduled_release()
+                if next_release is not None:
+                    delay = min(delay, max((next_release - timezone.now()).total_seconds(), 0))
+                time.sleep(delay)
+                self.release()
+        except KeyboardInterrupt:
+            pass
+
+    def release(self):
+        released = release_due_papers()
+        if released:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Released {released} question paper{'s' if released != 1 else ''} at {timezone.now():%Y-%m-%d %H:%M:%S}"
+            ))
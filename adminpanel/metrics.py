@@ -0,0 +1,228 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+
+logger = logging.getLogger('ums.requests')
+
+# Metrics of the request being handled on this thread or task, if any
+_current = ContextVar('ums_request_metrics', default=None)
+
+# Literals replaced to turn a statement into its fingerprint
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN \((?:\?|%s)(?:, ?(?:\?|%s))*\)', re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r'%s')
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def fingerprint(sql):
+    """SQL with its literals and IN lists collapsed, so repeats of one statement compare equal"""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = PLACEHOLDER_RE.sub('?', sql)
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+class RequestMetrics:
+    """SQL and template timings collected while one request is handled"""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.fingerprints = Counter()
+        self._template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed as a database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold):
+        """Statements run at least ``threshold`` times, most repeated first"""
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+class InstrumentedTemplate(Template):
+    """Times each top-level render; included and extended templates count once"""
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        metrics._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with render time reported to RequestMetrics"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+def _percentile(ordered, percent):
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def percentiles(values):
+    """Nearest-rank p50/p90/p95/p99 and max of a non-empty sequence, rounded to 2 places"""
+    ordered = sorted(values)
+    summary = {f'p{p}': round(_percentile(ordered, p), 2) for p in PERCENTILES}
+    summary['max'] = round(ordered[-1], 2)
+    return summary
+
+
+class MetricsStore:
+    """
+    Rolling window of the latest samples per URL name, kept in process
+    memory. Each worker process reports its own traffic.
+    """
+
+    FIELDS = ('total_ms', 'sql_ms', 'template_ms', 'queries')
+
+    def __init__(self, window=None):
+        self.window = window or getattr(settings, 'UMS_METRICS_WINDOW', 500)
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._requests = Counter()
+        self._duplicates = defaultdict(Counter)
+
+    def add(self, view, sample, duplicates=()):
+        with self._lock:
+            self._samples[view].append(tuple(sample[field] for field in self.FIELDS))
+            self._requests[view] += 1
+            for sql, count in duplicates:
+                self._duplicates[view][sql] += 1
+
+    def snapshot(self):
+        """Percentiles of every field per URL name, slowest p95 latency first"""
+        with self._lock:
+            samples = {view: list(rows) for view, rows in self._samples.items()}
+            requests = dict(self._requests)
+            duplicates = {view: counter.most_common(5) for view, counter in self._duplicates.items()}
+        views = []
+        for view, rows in samples.items():
+            entry = {'view': view, 'requests': requests[view], 'window': len(rows)}
+            for i, field in enumerate(self.FIELDS):
+                entry[field] = percentiles(row[i] for row in rows)
+            entry['duplicate_queries'] = [{'sql': sql, 'requests': n} for sql, n in duplicates.get(view, ())]
+            views.append(entry)
+        views.sort(key=lambda entry: entry['total_ms']['p95'], reverse=True)
+        return views
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._requests.clear()
+            self._duplicates.clear()
+
+
+store = MetricsStore()
+
+
+def query_budget(view):
+    budgets = getattr(settings, 'UMS_QUERY_BUDGETS', {})
+    return budgets.get(view, getattr(settings, 'UMS_QUERY_BUDGET_DEFAULT', None))
+
+
+class RequestMetricsMiddleware:
+    """
+    Record SQL count, SQL time, template render time and total latency of
+    every request under its URL name. Each request is logged as one JSON
+    line on the ``ums.requests`` logger. A warning is logged when a view
+    exceeds its UMS_QUERY_BUDGETS entry or repeats one statement
+    UMS_METRICS_DUPLICATE_THRESHOLD times or more (a likely N+1).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'UMS_METRICS_ENABLED', True)
+        self.threshold = getattr(settings, 'UMS_METRICS_DUPLICATE_THRESHOLD', 3)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match else '<unresolved>'
+        sample = {
+            'total_ms': total * 1000,
+            'sql_ms': metrics.sql_time * 1000,
+            'template_ms': metrics.template_time * 1000,
+            'queries': metrics.queries,
+        }
+        duplicates = metrics.duplicates(self.threshold)
+        store.add(view, sample, duplicates)
+
+        logger.info(json.dumps({
+            'event': 'request',
+            'view': view,
+            'method': request.method,
+            'status': response.status_code,
+            **{field: round(value, 2) for field, value in sample.items()},
+            'duplicate_queries': len(duplicates),
+        }))
+        budget = query_budget(view)
+        if budget is not None and metrics.queries > budget:
+            logger.warning(json.dumps({
+                'event': 'query_budget_exceeded',
+                'view': view,
+                'path': request.path,
+                'queries': metrics.queries,
+                'budget': budget,
+            }))
+        if duplicates:
+            logger.warning(json.dumps({
+                'event': 'duplicate_queries',
+                'view': view,
+                'path': request.path,
+                'statements': [{'sql': sql, 'count': count} for sql, count in duplicates[:5]],
+            }))
+
+        if settings.DEBUG:
+            response['Server-Timing'] = ', '.join((
+                f'sql;dur={sample["sql_ms"]:.1f};desc="{metrics.queries} queries"',
+                f'tpl;dur={sample["template_ms"]:.1f}',
+                f'total;dur={sample["total_ms"]:.1f}',
+            ))
+        return response
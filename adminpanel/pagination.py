@@ -0,0 +1,203 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils.functional import cached_property
+
+
+def _json_default(value):
+    # Full isoformat keeps microseconds, which keyset comparisons rely on
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def _encode_cursor(direction, values):
+    payload = json.dumps({'d': direction, 'v': values}, default=_json_default)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        data = json.loads(payload)
+        return data['d'], list(data['v'])
+    except (ValueError, TypeError, KeyError):
+        return None, None
+
+
+class KeysetPage:
+    """
+    One page of a KeysetPaginator. Iterates like a Django Page and exposes
+    has_next/has_previous plus ready-made query strings for the links,
+    preserving the request's other GET parameters.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous, params):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.params = params
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def count(self):
+        return self.paginator.count
+
+    def _querystring(self, cursor=None):
+        params = self.params.copy()
+        if cursor:
+            params['cursor'] = cursor
+        return params.urlencode()
+
+    @property
+    def next_querystring(self):
+        if not self.object_list:
+            return self.first_querystring
+        return self._querystring(_encode_cursor('n', self.paginator.key_values(self.object_list[-1])))
+
+    @property
+    def previous_querystring(self):
+        if not self.object_list:
+            return self.first_querystring
+        return self._querystring(_encode_cursor('p', self.paginator.key_values(self.object_list[0])))
+
+    @property
+    def first_querystring(self):
+        return self._querystring()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the last row shown rather than with
+    OFFSET, so a deep page costs the same as the first one.
+
+    ``ordering`` must identify rows uniquely (end with the primary key when
+    the leading field can repeat) and use concrete fields of the model.
+    Pass ``approximate_count=True`` to expose an estimated ``count``
+    instead of running COUNT(*) on every request.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-pk',), approximate_count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering
+        ]
+        self.approximate_count = approximate_count
+
+    def _field(self, name):
+        opts = self.queryset.model._meta
+        return opts.pk if name == 'pk' else opts.get_field(name)
+
+    def key_values(self, obj):
+        return [getattr(obj, self._field(name).attname) for name, _ in self.ordering]
+
+    def _seek(self, values, forward):
+        """Q matching rows strictly after (or before) the given key"""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _order_by(self, forward):
+        return [
+            f'-{name}' if descending == forward else name
+            for name, descending in self.ordering
+        ]
+
+    def page(self, cursor=None, params=None):
+        params = params.copy() if params is not None else QueryDict(mutable=True)
+        for key in ('cursor', 'page'):
+            params.pop(key, None)
+
+        direction, values = _decode_cursor(cursor) if cursor else (None, None)
+        if values is not None and len(values) == len(self.ordering):
+            try:
+                values = [self._field(name).to_python(v) for (name, _), v in zip(self.ordering, values)]
+            except (ValidationError, TypeError):
+                direction = None
+        else:
+            direction = None
+
+        forward = direction != 'p'
+        qs = self.queryset
+        if direction is not None:
+            qs = qs.filter(self._seek(values, forward))
+        rows = list(qs.order_by(*self._order_by(forward))[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if forward:
+            return KeysetPage(rows, self, has_more, direction is not None, params)
+        rows.reverse()
+        return KeysetPage(rows, self, True, has_more, params)
+
+    @cached_property
+    def count(self):
+        if not self.approximate_count:
+            return None
+        return approximate_count(self.queryset)
+
+
+def paginate_keyset(request, queryset, per_page, ordering=('-pk',), approximate_count=False):
+    """Keyset page for the ``cursor`` in the request's query string"""
+    paginator = KeysetPaginator(queryset, per_page, ordering, approximate_count)
+    return paginator.page(request.GET.get('cursor'), request.GET)
+
+
+def _planner_estimate(queryset, connection):
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def approximate_count(queryset):
+    """
+    Row count for a listing without an exact COUNT(*) per request. On
+    PostgreSQL the planner's estimate is used once it passes
+    UMS_COUNT_ESTIMATE_THRESHOLD; below that, and on other databases, the
+    exact count is cached for UMS_COUNT_CACHE_TTL seconds.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        estimate = _planner_estimate(queryset, connection)
+        if estimate >= getattr(settings, 'UMS_COUNT_ESTIMATE_THRESHOLD', 10000):
+            return estimate
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    key = 'ums:count:' + hashlib.md5(f'{sql}{params!r}'.encode()).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, getattr(settings, 'UMS_COUNT_CACHE_TTL', 300))
+    return count
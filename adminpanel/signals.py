@@ -0,0 +1,175 @@
+import threading
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import StudentProfile, FacultyProfile, College, CollegeAffiliatedDepartment
+from academic.catalog import bump_catalog_version
+from academic.gpa import refresh_cgpa
+from academic.models import (
+    Course, Department, ExamNotification, ExamSubject, Program, ProgramSemesterCourse, QuestionPaper, StudentResult,
+    UniversityExam,
+)
+from academic.notifications import invalidate_university_notifications
+from academic.publication import refresh_exam_results
+from academic.results import bump_results_version
+from academic.services import invalidate_released_papers
+from attendance.models import AttendanceSession
+from attendance.services import apply_summary_deltas
+from enrollment.models import Enrollment
+
+from .stats import bump_stats_version
+
+
+STATS_MODELS = (StudentProfile, FacultyProfile, College, CollegeAffiliatedDepartment, Course, Department, Program, Enrollment)
+
+
+def stats_changed(sender, **kwargs):
+    bump_stats_version()
+
+
+for model in STATS_MODELS:
+    post_save.connect(stats_changed, sender=model, dispatch_uid=f'stats_changed_save_{model.__name__}')
+    post_delete.connect(stats_changed, sender=model, dispatch_uid=f'stats_changed_delete_{model.__name__}')
+
+
+CATALOG_MODELS = (Department, Program, Course, ProgramSemesterCourse)
+
+
+def catalog_changed(sender, **kwargs):
+    bump_catalog_version()
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_changed_save_{model.__name__}')
+    post_delete.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_changed_delete_{model.__name__}')
+
+
+# Result sheets show exam, subject and course details next to the marks
+RESULT_MODELS = (UniversityExam, ExamSubject, StudentResult, Course, Program)
+
+
+def results_changed(sender, **kwargs):
+    bump_results_version()
+
+
+for model in RESULT_MODELS:
+    post_save.connect(results_changed, sender=model, dispatch_uid=f'results_changed_save_{model.__name__}')
+    post_delete.connect(results_changed, sender=model, dispatch_uid=f'results_changed_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=StudentResult)
+def student_result_saved(sender, instance, **kwargs):
+    exam = UniversityExam.objects.filter(subjects=instance.exam_subject_id, result_published=True).first()
+    if exam is not None:
+        refresh_exam_results(exam, [instance.student_id])
+
+
+# Results removed by deletes in the current thread: exam subject id ->
+# student ids, plus the exam of every subject deleted with its results.
+# A cascade (an exam, subject, course or student being deleted) removes
+# many results at once, so they are recomputed together, once per exam,
+# after the delete commits.
+_deleted_results = threading.local()
+
+
+def _pending_deletes():
+    if not hasattr(_deleted_results, 'subjects'):
+        _deleted_results.subjects = defaultdict(set)
+        _deleted_results.exams = {}
+    return _deleted_results
+
+
+def refresh_deleted_results():
+    """Recompute the GPA and snapshots of every published exam that lost results"""
+    pending = _pending_deletes()
+    subjects, deleted_subjects = pending.subjects, pending.exams
+    pending.subjects, pending.exams = defaultdict(set), {}
+    if not subjects:
+        return
+
+    exam_ids = dict(deleted_subjects)
+    exam_ids.update(
+        ExamSubject.objects.filter(pk__in=subjects.keys() - exam_ids.keys()).values_list('pk', 'exam_id')
+    )
+    students = defaultdict(set)
+    whole_exams = set()
+    for subject_id, student_ids in subjects.items():
+        exam_id = exam_ids.get(subject_id)
+        if subject_id in deleted_subjects:
+            # Every student of the exam sat the subject
+            whole_exams.add(exam_id)
+        elif exam_id is not None:
+            students[exam_id].update(student_ids)
+    # Exams deleted with their results are gone and skipped here
+    for exam in UniversityExam.objects.filter(pk__in=whole_exams | students.keys(), result_published=True):
+        refresh_exam_results(exam, None if exam.pk in whole_exams else students[exam.pk])
+
+
+@receiver(post_delete, sender=StudentResult)
+def student_result_deleted(sender, instance, **kwargs):
+    _pending_deletes().subjects[instance.exam_subject_id].add(instance.student_id)
+    # Runs straight away outside a transaction; a rolled back delete leaves
+    # entries that the next flush recomputes harmlessly
+    transaction.on_commit(refresh_deleted_results)
+
+
+@receiver(pre_delete, sender=ExamSubject)
+def exam_subject_deleting(sender, instance, **kwargs):
+    _pending_deletes().exams[instance.pk] = instance.exam_id
+
+
+@receiver(pre_delete, sender=UniversityExam)
+def exam_deleting(sender, instance, **kwargs):
+    instance._gpa_student_ids = list(instance.student_gpas.values_list('student_id', flat=True))
+
+
+@receiver(post_delete, sender=UniversityExam)
+def exam_deleted(sender, instance, **kwargs):
+    # Later exams of these students carried this exam in their CGPA
+    if getattr(instance, '_gpa_student_ids', None):
+        refresh_cgpa(instance._gpa_student_ids)
+
+
+@receiver(pre_delete, sender=AttendanceSession)
+def attendance_session_deleting(sender, instance, **kwargs):
+    # Also runs when a department, course, program or college delete
+    # cascades to its sessions, while their attendance rows still exist
+    deltas = defaultdict(Counter)
+    for student_id, status in instance.student_attendances.values_list('student_id', 'status'):
+        deltas[student_id][status] -= 1
+    with transaction.atomic():
+        apply_summary_deltas(instance, deltas)
+
+
+@receiver(pre_save, sender=Course)
+def course_saving(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._previous_credits = Course.objects.filter(pk=instance.pk).values_list('credits', flat=True).first()
+
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_credits', None)
+    if not created and previous is not None and previous != instance.credits:
+        for exam in UniversityExam.objects.filter(subjects__course=instance, result_published=True).distinct():
+            refresh_exam_results(exam)
+
+
+@receiver(m2m_changed, sender=FacultyProfile.departments.through)
+def faculty_departments_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_stats_version()
+
+
+@receiver([post_save, post_delete], sender=QuestionPaper)
+def question_paper_changed(sender, **kwargs):
+    invalidate_released_papers()
+
+
+@receiver([post_save, post_delete], sender=ExamNotification)
+def notification_changed(sender, instance, **kwargs):
+    if instance.notification_type == 'university':
+        invalidate_university_notifications()
@@ -0,0 +1,128 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Concat, Trim
+from django.db.utils import OperationalError, ProgrammingError
+
+from accounts.models import StudentProfile, FacultyProfile, College, CollegeAffiliatedDepartment
+from academic.models import Course, Department, Program
+from enrollment.models import Enrollment
+
+
+VERSION_KEY = 'ums:stats-version'
+
+
+def bump_stats_version():
+    """Invalidate every cached dashboard counter"""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _cached(scope, compute):
+    version = cache.get(VERSION_KEY, 0)
+    key = f'ums:stats:{version}:{scope}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute()
+        cache.set(key, stats, getattr(settings, 'UMS_STATS_TTL', 60))
+    return stats
+
+
+def _safe_aggregate(queryset, **aggregates):
+    """Run an aggregate, falling back to zeros while tables are missing"""
+    try:
+        return queryset.aggregate(**aggregates)
+    except (OperationalError, ProgrammingError):
+        return dict.fromkeys(aggregates, 0)
+
+
+def university_stats():
+    """Counters for the university admin dashboard"""
+    def compute():
+        stats = {}
+        stats.update(_safe_aggregate(StudentProfile.objects.all(), students_count=Count('pk')))
+        stats.update(_safe_aggregate(Course.objects.all(), courses_count=Count('pk')))
+        stats.update(_safe_aggregate(Enrollment.objects.all(), enrollments_count=Count('pk')))
+        stats.update(_safe_aggregate(FacultyProfile.objects.all(), faculty_count=Count('pk')))
+        stats.update(_safe_aggregate(Department.objects.all(), departments_count=Count('pk')))
+        stats.update(_safe_aggregate(
+            College.objects.all(),
+            colleges_count=Count('pk'),
+            pending_colleges_count=Count('pk', filter=Q(status='pending')),
+            affiliated_colleges_count=Count('pk', filter=Q(affiliation_status='approved')),
+            pending_affiliation_count=Count('pk', filter=Q(affiliation_status='pending')),
+        ))
+        stats.update(_safe_aggregate(Program.objects.all(), programs_count=Count('pk')))
+        return stats
+    return _cached('university', compute)
+
+
+def college_stats(college):
+    """Counters for the college and principal dashboards"""
+    def compute():
+        stats = {}
+        stats.update(FacultyProfile.objects.filter(college=college).aggregate(
+            faculty_count=Count('pk'),
+            hod_count=Count('pk', filter=Q(designation='hod')),
+        ))
+        stats.update(StudentProfile.objects.filter(college=college).aggregate(students_count=Count('pk')))
+        stats.update(CollegeAffiliatedDepartment.objects.filter(college=college).aggregate(departments_count=Count('pk')))
+        return stats
+    return _cached(f'college:{college.pk}', compute)
+
+
+def department_stats(college, department_ids):
+    """
+    Counters for an HOD dashboard. Faculty and students are counted once
+    per department they belong to, matching a per-department tally.
+    """
+    department_ids = sorted(department_ids)
+
+    def compute():
+        stats = {}
+        stats.update(FacultyProfile.objects.filter(
+            college=college, departments__in=department_ids
+        ).aggregate(faculty_count=Count('pk')))
+        stats.update(StudentProfile.objects.filter(
+            college=college, department_id__in=department_ids
+        ).aggregate(students_count=Count('pk')))
+        return stats
+    scope = f"departments:{college.pk if college else None}:{','.join(map(str, department_ids))}"
+    return _cached(scope, compute)
+
+
+def _count_subquery(queryset, group_by):
+    counts = queryset.order_by().values(group_by).annotate(count=Count('pk')).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def college_department_stats(college, department_ids=None):
+    """
+    Departments annotated in a single query with their faculty_count,
+    student_count and HOD (hod_id, hod_name; None when not assigned) within
+    a college. Covers the college's affiliated departments unless explicit
+    department_ids are given.
+    """
+    if department_ids is None:
+        departments = Department.objects.filter(affiliated_colleges__college=college)
+    else:
+        departments = Department.objects.filter(pk__in=department_ids)
+
+    hods = FacultyProfile.objects.filter(
+        departments=OuterRef('pk'), college=college, designation='hod'
+    ).order_by('pk')
+    return departments.annotate(
+        faculty_count=_count_subquery(
+            FacultyProfile.objects.filter(departments=OuterRef('pk'), college=college), 'departments'
+        ),
+        student_count=_count_subquery(
+            StudentProfile.objects.filter(department=OuterRef('pk'), college=college), 'department'
+        ),
+        hod_id=Subquery(hods.values('pk')[:1]),
+        hod_name=Subquery(
+            hods.annotate(
+                full_name=Trim(Concat('user__first_name', Value(' '), 'user__last_name'))
+            ).values('full_name')[:1]
+        ),
+    ).order_by('name')
@@ -0,0 +1,128 @@
+import tempfile
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from accounts.models import College, StudentProfile, User
+from academic.models import (
+    Course, Department, ExamRank, ExamResultSummary, ExamSubject, ExamSubjectSummary, Program, StudentResult,
+    StudentSemesterGPA, UniversityExam,
+)
+from academic.publication import publish_exam_results
+from adminpanel.benchmarks import SCENARIOS, run_benchmarks
+
+
+class PublishedExamDeleteTests(TestCase):
+    """Deleting a published exam or one of its subjects cascades through results and snapshots"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user('admin@example.com', 'password', role='admin', is_staff=True)
+        department = Department.objects.create(name='Computer Science', code='CS')
+        program = Program.objects.create(name='B.Sc Computer Science', department=department)
+        college = College.objects.create(
+            user=User.objects.create_user('college@example.com', 'password', role='college'),
+            name='Test College',
+            code='TC',
+        )
+        self.exam = UniversityExam.objects.create(
+            name='End Semester',
+            program=program,
+            semester=1,
+            academic_year='2025-2026',
+            exam_start_date=date(2025, 12, 1),
+            exam_end_date=date(2025, 12, 10),
+        )
+        self.subjects = [
+            ExamSubject.objects.create(
+                exam=self.exam,
+                course=Course.objects.create(code=f'CS10{n}', title=f'Course {n}', credits=4, department=department),
+            )
+            for n in range(2)
+        ]
+        self.students = []
+        for n in range(3):
+            student = StudentProfile.objects.create(
+                user=User.objects.create_user(f'student{n}@example.com', 'password'),
+                college=college,
+                department=department,
+                program=program,
+            )
+            self.students.append(student)
+            for subject in self.subjects:
+                StudentResult.objects.create(
+                    student=student, exam_subject=subject, marks_obtained=50 + 10 * n, grade='B', is_pass=True
+                )
+        publish_exam_results(self.exam)
+        self.client.force_login(self.admin)
+
+    def test_delete_published_exam(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('adminpanel:exam_delete', args=[self.exam.pk]))
+
+        self.assertRedirects(response, reverse('adminpanel:exams'))
+        self.assertFalse(UniversityExam.objects.filter(pk=self.exam.pk).exists())
+        self.assertFalse(StudentResult.objects.exists())
+        self.assertFalse(StudentSemesterGPA.objects.exists())
+        self.assertFalse(ExamResultSummary.objects.exists())
+        self.assertFalse(ExamSubjectSummary.objects.exists())
+        self.assertFalse(ExamRank.objects.exists())
+
+    def test_delete_subject_of_published_exam(self):
+        removed, kept = self.subjects
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('adminpanel:exam_delete_subject', args=[self.exam.pk, removed.pk])
+            )
+
+        self.assertRedirects(response, reverse('adminpanel:exam_detail', args=[self.exam.pk]))
+        self.assertFalse(StudentResult.objects.filter(exam_subject_id=removed.pk).exists())
+        self.assertEqual(
+            list(self.exam.subject_summaries.values_list('exam_subject_id', flat=True)), [kept.pk]
+        )
+        # Every student now has half the credits, all from the remaining subject
+        self.assertEqual(
+            sorted(StudentSemesterGPA.objects.filter(exam=self.exam).values_list('credits', flat=True)),
+            [4, 4, 4],
+        )
+        summary = ExamResultSummary.objects.get(exam=self.exam)
+        self.assertEqual(summary.students, 3)
+        self.assertEqual(summary.topper_id, self.students[-1].pk)
+        self.assertEqual(
+            list(ExamRank.objects.filter(exam=self.exam).order_by('rank').values_list('max_marks', flat=True)),
+            [100, 100, 100],
+        )
+
+
+class BenchmarkHarnessTests(TestCase):
+    """
+    Runs every benchmark scenario once against a tiny generated dataset so
+    the harness keeps working. Timings from here mean nothing; measure with
+    ``manage.py benchmark`` against a full generate_load_data dataset.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # generate_load_data saves sample question papers to MEDIA_ROOT
+        media = cls.enterClassContext(tempfile.TemporaryDirectory())
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_load_data', colleges=1, departments=1, programs=1, courses=2, students=10, faculty=2, days=2,
+            stdout=StringIO(),
+        )
+
+    def test_every_scenario_runs(self):
+        results = run_benchmarks(iterations=1, warmup=0)
+
+        self.assertEqual(set(results['scenarios']), {scenario.name for scenario in SCENARIOS})
+        for name, result in results['scenarios'].items():
+            with self.subTest(name):
+                self.assertTrue(all(status < 400 for status in result['status']))
+                self.assertGreater(result['queries']['max'], 0)
@@ -9,6 +9,7 @@ urlpatterns = [
     # Students
     path('students/', views.students_list, name='students'),
     path('students/add/', views.student_add, name='student_add'),
+    path('students/export/', views.students_export, name='students_export'),
     path('students/<int:pk>/edit/', views.student_edit, name='student_edit'),
     path('students/<int:pk>/delete/', views.student_delete, name='student_delete'),
     
@@ -27,6 +28,7 @@ urlpatterns = [
     # Faculty
     path('faculty/', views.faculty_list, name='faculty_list'),
     path('faculty/add/', views.faculty_add, name='faculty_add'),
+    path('faculty/export/', views.faculty_export, name='faculty_export'),
     path('faculty/<int:pk>/edit/', views.faculty_edit, name='faculty_edit'),
     path('faculty/<int:pk>/delete/', views.faculty_delete, name='faculty_delete'),
     
@@ -61,6 +63,7 @@ urlpatterns = [
     
     # Results Entry
     path('exams/<int:exam_pk>/results/', views.results_entry, name='results_entry'),
+    path('exams/<int:exam_pk>/results/export/', views.results_export, name='results_export'),
     path('exams/<int:exam_pk>/results/<int:subject_pk>/', views.results_by_subject, name='results_by_subject'),
     
     # Question Papers
@@ -79,8 +82,10 @@ urlpatterns = [
     path('programs/<int:pk>/add-course/', views.program_add_course, name='program_add_course'),
     path('programs/<int:pk>/remove-course/<int:course_pk>/', views.program_remove_course, name='program_remove_course'),
     path('programs/<int:pk>/move-course/', views.program_move_course, name='program_move_course'),
+    path('programs/<int:pk>/curriculum/', views.program_curriculum_update, name='program_curriculum_update'),
     
     # AJAX endpoints
     path('api/exam-subjects/', views.get_exam_subjects, name='get_exam_subjects'),
     path('api/program-courses/', views.get_program_courses, name='get_program_courses'),
+    path('api/metrics/', views.request_metrics, name='request_metrics'),
 ]
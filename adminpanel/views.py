@@ -1,15 +1,28 @@
 ﻿from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from accounts.models import StudentProfile, FacultyProfile, College, CollegeAffiliatedDepartment, CollegeAffiliatedProgram
-from academic.models import Course, Department, CourseOffering, Program, ExamNotification, UniversityExam, ExamSubject, StudentResult, QuestionPaper, ProgramSemesterCourse
+from accounts.models import StudentProfile, FacultyProfile, College
+from academic.models import Course, Department, CourseOffering, Program, ExamNotification, UniversityExam, ExamSubject, StudentResult, QuestionPaper, ProgramSemesterCourse, ExamResultSummary
+from academic.catalog import catalog, json_etag_response, json_payload
+from academic.publication import publish_exam_results, refresh_exam_results
+from academic.notifications import notification_page
+from academic.services import CurriculumError, apply_curriculum_changes, curriculum_grid, save_subject_results
 from enrollment.models import Enrollment
+from search.index import search_ids
+from .affiliations import department_program_tree, update_college_affiliations
+from .exports import (
+    FACULTY_COLUMNS, RESULT_COLUMNS, STUDENT_COLUMNS,
+    export_values, faculty_rows, result_rows, student_rows,
+)
+from .metrics import store as metrics_store
+from .pagination import paginate_keyset
+from .stats import college_department_stats, college_stats, university_stats
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.utils import OperationalError, ProgrammingError
 from django.http import JsonResponse
+import json
 
 User = get_user_model()
 
@@ -21,58 +34,12 @@ def staff_required(user):
 @login_required
 @user_passes_test(staff_required)
 def dashboard(request):
-    try:
-        students_count = StudentProfile.objects.count()
-    except (OperationalError, ProgrammingError):
-        students_count = 0
-
-    try:
-        courses_count = Course.objects.count()
-    except (OperationalError, ProgrammingError):
-        courses_count = 0
-
-    try:
-        enrollments_count = Enrollment.objects.count()
-    except (OperationalError, ProgrammingError):
-        enrollments_count = 0
-    
-    try:
-        faculty_count = FacultyProfile.objects.count()
-    except (OperationalError, ProgrammingError):
-        faculty_count = 0
-    
-    try:
-        departments_count = Department.objects.count()
-    except (OperationalError, ProgrammingError):
-        departments_count = 0
-    
-    try:
-        colleges_count = College.objects.count()
-        pending_colleges_count = College.objects.filter(status='pending').count()
-        affiliated_colleges_count = College.objects.filter(affiliation_status='approved').count()
-        pending_affiliation_count = College.objects.filter(affiliation_status='pending').count()
-    except (OperationalError, ProgrammingError):
-        colleges_count = 0
-        pending_colleges_count = 0
-        affiliated_colleges_count = 0
-        pending_affiliation_count = 0
-    
-    try:
-        programs_count = Program.objects.count()
-    except (OperationalError, ProgrammingError):
-        programs_count = 0
-
     context = {
-        'students_count': students_count,
-        'courses_count': courses_count,
-        'enrollments_count': enrollments_count,
-        'faculty_count': faculty_count,
-        'departments_count': departments_count,
-        'colleges_count': colleges_count,
-        'pending_colleges_count': pending_colleges_count,
-        'affiliated_colleges_count': affiliated_colleges_count,
-        'pending_affiliation_count': pending_affiliation_count,
-        'programs_count': programs_count,
+        **university_stats(),
+        # Pass statistics snapshotted when each exam's results were published
+        'recent_results': ExamResultSummary.objects.select_related('exam__program', 'topper__user').order_by(
+            '-exam__result_published_at', '-pk'
+        )[:5],
     }
     return render(request, 'adminpanel/dashboard.html', context)
 
@@ -85,23 +52,9 @@ def students_list(request):
     q = request.GET.get('q', '').strip()
     qs = StudentProfile.objects.select_related('user', 'college').all().order_by('-pk')
     if q:
-        qs = qs.filter(
-            Q(pk__icontains=q) |
-            Q(user__first_name__icontains=q) |
-            Q(user__last_name__icontains=q) |
-            Q(user__email__icontains=q) |
-            Q(program__icontains=q) |
-            Q(college__name__icontains=q)
-        )
+        qs = qs.filter(pk__in=search_ids('student', q))
 
-    paginator = Paginator(qs, 10)
-    page = request.GET.get('page')
-    try:
-        students = paginator.page(page)
-    except PageNotAnInteger:
-        students = paginator.page(1)
-    except EmptyPage:
-        students = paginator.page(paginator.num_pages)
+    students = paginate_keyset(request, qs, 10, ordering=('-pk',), approximate_count=True)
 
     context = {
         'students': students,
@@ -110,6 +63,17 @@ def students_list(request):
     return render(request, 'adminpanel/students.html', context)
 
 
+@login_required
+@user_passes_test(staff_required)
+def students_export(request):
+    """Stream the (optionally searched) student list as CSV or XLSX"""
+    q = request.GET.get('q', '').strip()
+    qs = StudentProfile.objects.order_by('pk')
+    if q:
+        qs = qs.filter(pk__in=search_ids('student', q))
+    return export_values(request, 'students', STUDENT_COLUMNS, qs, student_rows)
+
+
 @login_required
 @user_passes_test(staff_required)
 def student_add(request):
@@ -203,20 +167,9 @@ def courses_list(request):
     q = request.GET.get('q', '').strip()
     qs = Course.objects.select_related('department').all().order_by('code')
     if q:
-        qs = qs.filter(
-            Q(code__icontains=q) |
-            Q(title__icontains=q) |
-            Q(department__name__icontains=q)
-        )
+        qs = qs.filter(pk__in=search_ids('course', q))
 
-    paginator = Paginator(qs, 10)
-    page = request.GET.get('page')
-    try:
-        courses = paginator.page(page)
-    except PageNotAnInteger:
-        courses = paginator.page(1)
-    except EmptyPage:
-        courses = paginator.page(paginator.num_pages)
+    courses = paginate_keyset(request, qs, 10, ordering=('code',), approximate_count=True)
 
     context = {
         'courses': courses,
@@ -299,7 +252,10 @@ def course_delete(request, pk):
 @user_passes_test(staff_required)
 def departments_list(request):
     q = request.GET.get('q', '').strip()
-    qs = Department.objects.all().order_by('name')
+    qs = Department.objects.select_related('head__user').annotate(
+        course_count=Count('course', distinct=True),
+        faculty_count=Count('faculty', distinct=True),
+    ).order_by('name')
     if q:
         qs = qs.filter(Q(name__icontains=q) | Q(code__icontains=q))
 
@@ -371,22 +327,9 @@ def faculty_list(request):
     q = request.GET.get('q', '').strip()
     qs = FacultyProfile.objects.select_related('user', 'college').prefetch_related('departments').all().order_by('pk')
     if q:
-        qs = qs.filter(
-            Q(pk__icontains=q) |
-            Q(user__first_name__icontains=q) |
-            Q(user__last_name__icontains=q) |
-            Q(user__email__icontains=q) |
-            Q(departments__name__icontains=q)
-        ).distinct()
-
-    paginator = Paginator(qs, 10)
-    page = request.GET.get('page')
-    try:
-        faculty = paginator.page(page)
-    except PageNotAnInteger:
-        faculty = paginator.page(1)
-    except EmptyPage:
-        faculty = paginator.page(paginator.num_pages)
+        qs = qs.filter(pk__in=search_ids('faculty', q))
+
+    faculty = paginate_keyset(request, qs, 10, ordering=('pk',), approximate_count=True)
 
     context = {
         'faculty_list': faculty,
@@ -395,6 +338,17 @@ def faculty_list(request):
     return render(request, 'adminpanel/faculty.html', context)
 
 
+@login_required
+@user_passes_test(staff_required)
+def faculty_export(request):
+    """Stream the (optionally searched) faculty list as CSV or XLSX"""
+    q = request.GET.get('q', '').strip()
+    qs = FacultyProfile.objects.order_by('pk')
+    if q:
+        qs = qs.filter(pk__in=search_ids('faculty', q))
+    return export_values(request, 'faculty', FACULTY_COLUMNS, qs, faculty_rows, extra_columns=('Departments',))
+
+
 @login_required
 @user_passes_test(staff_required)
 def faculty_add(request):
@@ -485,20 +439,11 @@ def enrollments_list(request):
     qs = Enrollment.objects.select_related('student', 'student__user', 'offering', 'offering__course').all().order_by('-enrolled_at')
     if q:
         qs = qs.filter(
-            Q(student__pk__icontains=q) |
-            Q(student__user__email__icontains=q) |
-            Q(offering__course__code__icontains=q) |
-            Q(offering__course__title__icontains=q)
+            Q(student__in=search_ids('student', q)) |
+            Q(offering__course__in=search_ids('course', q))
         )
 
-    paginator = Paginator(qs, 10)
-    page = request.GET.get('page')
-    try:
-        enrollments = paginator.page(page)
-    except PageNotAnInteger:
-        enrollments = paginator.page(1)
-    except EmptyPage:
-        enrollments = paginator.page(paginator.num_pages)
+    enrollments = paginate_keyset(request, qs, 10, ordering=('-enrolled_at', '-pk'), approximate_count=True)
 
     context = {
         'enrollments': enrollments,
@@ -516,14 +461,10 @@ def colleges_list(request):
     status_filter = request.GET.get('status', '').strip()
     affiliation_filter = request.GET.get('affiliation', '').strip()
     
-    qs = College.objects.select_related('user').all().order_by('-created_at')
+    qs = College.objects.select_related('user').annotate(student_count=Count('students')).order_by('-created_at')
     
     if q:
-        qs = qs.filter(
-            Q(name__icontains=q) |
-            Q(code__icontains=q) |
-            Q(user__email__icontains=q)
-        )
+        qs = qs.filter(pk__in=search_ids('college', q))
     
     if status_filter:
         qs = qs.filter(status=status_filter)
@@ -531,14 +472,7 @@ def colleges_list(request):
     if affiliation_filter:
         qs = qs.filter(affiliation_status=affiliation_filter)
 
-    paginator = Paginator(qs, 10)
-    page = request.GET.get('page')
-    try:
-        colleges = paginator.page(page)
-    except PageNotAnInteger:
-        colleges = paginator.page(1)
-    except EmptyPage:
-        colleges = paginator.page(paginator.num_pages)
+    colleges = paginate_keyset(request, qs, 10, ordering=('-created_at', '-pk'), approximate_count=True)
 
     context = {
         'colleges': colleges,
@@ -642,7 +576,7 @@ def college_delete(request, pk):
 @user_passes_test(staff_required)
 def college_detail(request, pk):
     college = get_object_or_404(College, pk=pk)
-    affiliated_departments = college.affiliated_departments.select_related('department').all()
+    affiliated_departments = {dept.id: dept for dept in college_department_stats(college)}
     students = college.students.select_related('user').all()[:10]
     faculty = FacultyProfile.objects.filter(college=college).select_related('user').prefetch_related('departments')[:10]
     
@@ -653,19 +587,22 @@ def college_detail(request, pk):
         dept = aff_prog.program.department
         if dept.id not in affiliated_programs_by_dept:
             affiliated_programs_by_dept[dept.id] = {
-                'department': dept,
+                # Prefer the annotated department so its counts are available
+                'department': affiliated_departments.get(dept.id, dept),
                 'programs': []
             }
         affiliated_programs_by_dept[dept.id]['programs'].append(aff_prog.program)
     
+    stats = college_stats(college)
+    
     context = {
         'college': college,
-        'affiliated_departments': affiliated_departments,
+        'affiliated_departments': affiliated_departments.values(),
         'affiliated_programs_by_dept': affiliated_programs_by_dept,
         'faculty': faculty,
-        'total_faculty': FacultyProfile.objects.filter(college=college).count(),
+        'total_faculty': stats['faculty_count'],
         'students': students,
-        'total_students': college.students.count(),
+        'total_students': stats['students_count'],
     }
     return render(request, 'adminpanel/college_detail.html', context)
 
@@ -722,42 +659,17 @@ def college_affiliation(request, pk):
 def college_programs_affiliation(request, pk):
     """Manage which programs a college is affiliated with (program-wise)"""
     college = get_object_or_404(College, pk=pk)
-    all_departments = Department.objects.all().order_by('name')
-    # Get all programs grouped by department
-    departments_with_programs = []
-    affiliated_program_ids = set(college.affiliated_programs.values_list('program_id', flat=True))
-
-    for dept in all_departments:
-        programs = Program.objects.filter(department=dept).order_by('name')
-        departments_with_programs.append({
-            'department': dept,
-            'programs': programs,
-        })
 
     if request.method == 'POST':
-        selected_programs = request.POST.getlist('programs')
-        # Clear existing affiliations and add new ones
-        college.affiliated_programs.all().delete()
-        for prog_id in selected_programs:
-            CollegeAffiliatedProgram.objects.create(
-                college=college,
-                program_id=prog_id
-            )
-        # Optionally update department affiliations as well
-        dept_ids = set(Program.objects.filter(id__in=selected_programs).values_list('department_id', flat=True))
-        college.affiliated_departments.all().delete()
-        for dept_id in dept_ids:
-            CollegeAffiliatedDepartment.objects.get_or_create(
-                college=college,
-                department_id=dept_id
-            )
+        # Only the added and removed programs (and their departments) are written
+        update_college_affiliations(college, request.POST.getlist('programs'))
         messages.success(request, f'Programs updated for {college.name}.')
         return redirect('adminpanel:college_detail', pk=pk)
 
     context = {
         'college': college,
-        'departments': departments_with_programs,
-        'affiliated_program_ids': affiliated_program_ids,
+        'departments': department_program_tree(),
+        'affiliated_program_ids': set(college.affiliated_programs.values_list('program_id', flat=True)),
     }
     return render(request, 'adminpanel/college_programs_affiliation.html', context)
 
@@ -768,19 +680,13 @@ def college_programs_affiliation(request, pk):
 @user_passes_test(staff_required)
 def university_notifications(request):
     """List all university exam notifications"""
-    notifications = ExamNotification.objects.filter(notification_type='university').order_by('-created_at')
-    
-    paginator = Paginator(notifications, 10)
-    page = request.GET.get('page')
-    try:
-        notifications = paginator.page(page)
-    except PageNotAnInteger:
-        notifications = paginator.page(1)
-    except EmptyPage:
-        notifications = paginator.page(paginator.num_pages)
+    cursor = request.GET.get('cursor')
+    page = notification_page(ExamNotification.objects.filter(notification_type='university'), cursor, 10)
     
     context = {
-        'notifications': notifications,
+        'notifications': page.items,
+        'cursor': cursor,
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'adminpanel/notifications.html', context)
 
@@ -906,17 +812,23 @@ def exam_add(request):
 @user_passes_test(staff_required)
 def exam_detail(request, pk):
     """View exam details and manage subjects"""
-    exam = get_object_or_404(UniversityExam, pk=pk)
-    subjects = exam.subjects.select_related('course').all()
+    exam = get_object_or_404(UniversityExam.objects.select_related('program'), pk=pk)
+    subjects = exam.subjects.select_related('course', 'summary').all()
     
-    # Get courses for the exam's program department that are not already added
-    added_course_ids = subjects.values_list('course_id', flat=True)
-    available_courses = Course.objects.filter(department=exam.program.department).exclude(id__in=added_course_ids)
+    # Courses of the exam's program department that are not already added
+    added_course_ids = {subject.course_id for subject in subjects}
+    available_courses = [
+        course for course in catalog().courses_for_department(exam.program.department_id)
+        if course.id not in added_course_ids
+    ]
     
     context = {
         'exam': exam,
         'subjects': subjects,
         'available_courses': available_courses,
+        # Snapshots written when the results were published
+        'summary': ExamResultSummary.objects.filter(exam=exam).select_related('topper__user').first(),
+        'rank_list': exam.ranks.select_related('student__user', 'college').order_by('rank', 'pk')[:10],
     }
     return render(request, 'adminpanel/exam_detail.html', context)
 
@@ -936,6 +848,10 @@ def exam_edit(request, pk):
         exam.exam_start_date = request.POST.get('exam_start_date')
         exam.exam_end_date = request.POST.get('exam_end_date')
         exam.save()
+        if exam.result_published:
+            # The semester and date order the CGPA of published exams
+            exam.refresh_from_db()
+            refresh_exam_results(exam)
         messages.success(request, 'Exam updated successfully.')
         return redirect('adminpanel:exam_detail', pk=pk)
     
@@ -1008,10 +924,12 @@ def exam_publish_results(request, pk):
     exam = get_object_or_404(UniversityExam, pk=pk)
     
     if request.method == 'POST':
-        exam.result_published = True
-        exam.result_published_at = timezone.now()
-        exam.save()
-        messages.success(request, 'Results published successfully. Students can now view their results.')
+        snapshot = publish_exam_results(exam)
+        messages.success(
+            request,
+            f'Results published successfully. {snapshot.students} students ranked from {snapshot.results} results; '
+            'they can now view their results.'
+        )
     
     return redirect('adminpanel:exam_detail', pk=pk)
 
@@ -1023,7 +941,7 @@ def exam_publish_results(request, pk):
 def results_entry(request, exam_pk):
     """Entry point for results - select subject"""
     exam = get_object_or_404(UniversityExam, pk=exam_pk)
-    subjects = exam.subjects.select_related('course').all()
+    subjects = exam.subjects.select_related('course').annotate(result_count=Count('results'))
     
     context = {
         'exam': exam,
@@ -1049,21 +967,7 @@ def results_by_subject(request, exam_pk, subject_pk):
     existing_results = {r.student_id: r for r in subject.results.all()}
     
     if request.method == 'POST':
-        for student in students:
-            marks_key = f'marks_{student.pk}'
-            if marks_key in request.POST:
-                marks = request.POST.get(marks_key)
-                if marks and marks.strip():
-                    marks_int = int(marks)
-                    result, created = StudentResult.objects.get_or_create(
-                        student=student,
-                        exam_subject=subject,
-                        defaults={'marks_obtained': marks_int, 'entered_by': request.user}
-                    )
-                    if not created:
-                        result.marks_obtained = marks_int
-                        result.entered_by = request.user
-                        result.save()
+        save_subject_results(subject, students, request.POST, request.user, existing_results)
         
         messages.success(request, f'Results saved for {subject.course.title}.')
         return redirect('adminpanel:results_entry', exam_pk=exam_pk)
@@ -1085,6 +989,20 @@ def results_by_subject(request, exam_pk, subject_pk):
     return render(request, 'adminpanel/results_by_subject.html', context)
 
 
+@login_required
+@user_passes_test(staff_required)
+def results_export(request, exam_pk):
+    """Stream an exam's results, or one subject's with ?subject=, as CSV or XLSX"""
+    exam = get_object_or_404(UniversityExam, pk=exam_pk)
+    results = StudentResult.objects.filter(exam_subject__exam=exam)
+    subject_pk = request.GET.get('subject')
+    if subject_pk:
+        subject = get_object_or_404(ExamSubject, pk=subject_pk, exam=exam)
+        results = results.filter(exam_subject=subject)
+    results = results.order_by('exam_subject__course__code', 'student_id')
+    return export_values(request, f'results-exam-{exam.pk}', RESULT_COLUMNS, results, result_rows)
+
+
 # ========== QUESTION PAPERS ==========
 
 @login_required
@@ -1116,7 +1034,7 @@ def question_paper_add(request):
     """Upload a new question paper"""
     exams = UniversityExam.objects.filter(
         exam_start_date__gte=timezone.now().date()
-    ).order_by('exam_start_date')
+    ).select_related('program').order_by('exam_start_date')
     
     if request.method == 'POST':
         exam_subject_id = request.POST.get('exam_subject')
@@ -1206,9 +1124,13 @@ def get_exam_subjects(request):
     """AJAX endpoint to get subjects for an exam"""
     exam_id = request.GET.get('exam_id')
     if exam_id:
-        subjects = ExamSubject.objects.filter(exam_id=exam_id).select_related('course')
-        data = [{'id': s.pk, 'name': f"{s.course.code} - {s.course.title}"} for s in subjects]
-        return JsonResponse({'subjects': data})
+        courses = catalog().courses
+        data = [
+            {'id': pk, 'name': f"{courses[course_id].code} - {courses[course_id].title}"}
+            for pk, course_id in ExamSubject.objects.filter(exam_id=exam_id).order_by('pk').values_list('pk', 'course_id')
+            if course_id in courses
+        ]
+        return json_etag_response(request, json_payload({'subjects': data}))
     return JsonResponse({'subjects': []})
 
 
@@ -1218,7 +1140,9 @@ def get_exam_subjects(request):
 @user_passes_test(staff_required)
 def programs_list(request):
     """List all programs"""
-    programs = Program.objects.select_related('department').all().order_by('department__name', 'name')
+    programs = Program.objects.select_related('department').annotate(
+        subject_count=Count('semester_courses')
+    ).order_by('department__name', 'name')
     
     context = {
         'programs': programs,
@@ -1255,26 +1179,21 @@ def program_add(request):
 @user_passes_test(staff_required)
 def program_detail(request, pk):
     """View program details with semester-wise courses"""
-    program = get_object_or_404(Program, pk=pk)
+    program = get_object_or_404(Program.objects.select_related('department'), pk=pk)
     
     # Get total semesters (2 per year)
     total_semesters = program.duration_years * 2
     
-    # Organize courses by semester
-    semester_courses = {}
-    for sem in range(1, total_semesters + 1):
-        semester_courses[sem] = ProgramSemesterCourse.objects.filter(
-            program=program, semester=sem
-        ).select_related('course')
-    
-    # Get available courses for adding
-    added_course_ids = ProgramSemesterCourse.objects.filter(program=program).values_list('course_id', flat=True)
-    available_courses = Course.objects.exclude(id__in=added_course_ids).order_by('code')
+    # Every semester's courses from a single query
+    semesters = curriculum_grid(program)
+    added_course_ids = {entry.course_id for semester in semesters for entry in semester['courses']}
+    available_courses = [course for course in catalog().courses.values() if course.id not in added_course_ids]
     
     context = {
         'program': program,
         'total_semesters': total_semesters,
-        'semester_courses': semester_courses,
+        'semesters': semesters,
+        'total_subjects': len(added_course_ids),
         'available_courses': available_courses,
         'semester_range': range(1, total_semesters + 1),
     }
@@ -1320,28 +1239,34 @@ def program_delete(request, pk):
     return render(request, 'adminpanel/program_confirm_delete.html', context)
 
 
+def _curriculum_message(request, added=0, moved=0, removed=0):
+    if added:
+        messages.success(request, f'{added} course(s) added to semester successfully.')
+    if moved:
+        messages.success(request, f'{moved} course(s) moved.')
+    if removed:
+        messages.success(request, f'{removed} course(s) removed from program.')
+
+
 @login_required
 @user_passes_test(staff_required)
 def program_add_course(request, pk):
-    """Add a course to a program semester"""
+    """Add one or more courses to a program semester"""
     program = get_object_or_404(Program, pk=pk)
     
     if request.method == 'POST':
-        course_id = request.POST.get('course')
         semester = request.POST.get('semester')
         is_elective = 'is_elective' in request.POST
-        
-        # Check if course already exists in this program
-        if ProgramSemesterCourse.objects.filter(program=program, course_id=course_id).exists():
-            messages.warning(request, 'This course is already added to this program.')
+        try:
+            added, _, _ = apply_curriculum_changes(program, add=[
+                {'course': course_id, 'semester': semester, 'is_elective': is_elective}
+                for course_id in request.POST.getlist('course')
+            ])
+        except CurriculumError as e:
+            for error in e.errors:
+                messages.warning(request, error)
         else:
-            ProgramSemesterCourse.objects.create(
-                program=program,
-                course_id=course_id,
-                semester=semester,
-                is_elective=is_elective,
-            )
-            messages.success(request, 'Course added to semester successfully.')
+            _curriculum_message(request, added=added)
     
     return redirect('adminpanel:program_detail', pk=pk)
 
@@ -1353,10 +1278,13 @@ def program_remove_course(request, pk, course_pk):
     program = get_object_or_404(Program, pk=pk)
     
     if request.method == 'POST':
-        ProgramSemesterCourse.objects.filter(
-            program=program, course_id=course_pk
-        ).delete()
-        messages.success(request, 'Course removed from program.')
+        try:
+            _, _, removed = apply_curriculum_changes(program, remove=[course_pk])
+        except CurriculumError as e:
+            for error in e.errors:
+                messages.warning(request, error)
+        else:
+            _curriculum_message(request, removed=removed)
     
     return redirect('adminpanel:program_detail', pk=pk)
 
@@ -1368,17 +1296,48 @@ def program_move_course(request, pk):
     program = get_object_or_404(Program, pk=pk)
     
     if request.method == 'POST':
-        psc_id = request.POST.get('psc_id')
-        new_semester = request.POST.get('new_semester')
-        
-        psc = get_object_or_404(ProgramSemesterCourse, pk=psc_id, program=program)
-        psc.semester = new_semester
-        psc.save()
-        messages.success(request, f'Course moved to Semester {new_semester}.')
+        psc = get_object_or_404(ProgramSemesterCourse, pk=request.POST.get('psc_id'), program=program)
+        try:
+            apply_curriculum_changes(program, move=[{'course': psc.course_id, 'semester': request.POST.get('new_semester')}])
+        except CurriculumError as e:
+            for error in e.errors:
+                messages.warning(request, error)
+        else:
+            messages.success(request, f'Course moved to Semester {request.POST.get("new_semester")}.')
     
     return redirect('adminpanel:program_detail', pk=pk)
 
 
+@login_required
+@user_passes_test(staff_required)
+def program_curriculum_update(request, pk):
+    """
+    JSON endpoint applying a batch of curriculum edits in one transaction.
+    Body: ``{"add": [{"course", "semester", "is_elective"}], "move":
+    [{"course", "semester"}], "remove": [course ids]}``; all keys optional.
+    Responds with the change counts, or 400 and the errors, writing nothing.
+    """
+    program = get_object_or_404(Program, pk=pk)
+    if request.method != 'POST':
+        return JsonResponse({'errors': ['POST required.']}, status=405)
+    
+    try:
+        changes = json.loads(request.body or b'{}')
+        if not isinstance(changes, dict):
+            raise ValueError
+        add, move, remove = (list(changes.get(key) or []) for key in ('add', 'move', 'remove'))
+        if not all(isinstance(change, dict) for change in add + move):
+            raise ValueError
+    except (ValueError, TypeError):
+        return JsonResponse({'errors': ['Expected a JSON object with add, move and remove lists.']}, status=400)
+    
+    try:
+        added, moved, removed = apply_curriculum_changes(program, add=add, move=move, remove=remove)
+    except CurriculumError as e:
+        return JsonResponse({'errors': e.errors}, status=400)
+    return JsonResponse({'added': added, 'moved': moved, 'removed': removed})
+
+
 @login_required
 @user_passes_test(staff_required)
 def get_program_courses(request):
@@ -1387,9 +1346,20 @@ def get_program_courses(request):
     semester = request.GET.get('semester')
     
     if program_id and semester:
-        courses = ProgramSemesterCourse.objects.filter(
-            program_id=program_id, semester=semester
-        ).select_related('course')
-        data = [{'id': c.course.pk, 'code': c.course.code, 'title': c.course.title} for c in courses]
-        return JsonResponse({'courses': data})
+        return json_etag_response(request, catalog().semester_json('courses', program_id, semester))
     return JsonResponse({'courses': []})
+
+
+@login_required
+@user_passes_test(staff_required)
+def request_metrics(request):
+    """
+    Rolling per-view latency, SQL and template percentiles recorded by
+    RequestMetricsMiddleware in this process. POST clears the window.
+    """
+    if request.method == 'POST':
+        metrics_store.reset()
+    return JsonResponse({
+        'window': metrics_store.window,
+        'views': metrics_store.snapshot(),
+    })
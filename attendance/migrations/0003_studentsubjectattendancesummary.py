@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-17 06:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_summary(apps, schema_editor):
+    StudentAttendance = apps.get_model('attendance', 'StudentAttendance')
+    Summary = apps.get_model('attendance', 'StudentSubjectAttendanceSummary')
+    rows = StudentAttendance.objects.annotate(
+        year=ExtractYear('session__date'),
+        month=ExtractMonth('session__date'),
+    ).values(
+        'student_id', 'session__subject_id', 'session__semester', 'year', 'month'
+    ).annotate(
+        present=Count('pk', filter=Q(status='present')),
+        absent=Count('pk', filter=Q(status='absent')),
+        leave=Count('pk', filter=Q(status='leave')),
+    ).order_by()
+    Summary.objects.bulk_create([
+        Summary(
+            student_id=row['student_id'],
+            subject_id=row['session__subject_id'],
+            semester=row['session__semester'],
+            year=row['year'],
+            month=row['month'],
+            present=row['present'],
+            absent=row['absent'],
+            leave=row['leave'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0004_programsemestercourse'),
+        ('accounts', '0009_studentprofile_semester'),
+        ('attendance', '0002_attendancesession_medicalcertificate_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSubjectAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semester', models.IntegerField(default=1)),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('leave', models.IntegerField(default=0)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='accounts.studentprofile')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='academic.course')),
+            ],
+            options={
+                'unique_together': {('student', 'subject', 'semester', 'year', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_summary, migrations.RunPython.noop),
+    ]
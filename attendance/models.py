@@ -81,3 +81,25 @@ class MedicalCertificate(models.Model):
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.month}/{self.year}"
 
+
+
+class StudentSubjectAttendanceSummary(models.Model):
+    """Monthly attendance counts per student and subject, kept in step with StudentAttendance"""
+    student = models.ForeignKey('accounts.StudentProfile', on_delete=models.CASCADE, related_name='attendance_summaries')
+    subject = models.ForeignKey('academic.Course', on_delete=models.CASCADE, related_name='attendance_summaries')
+    semester = models.IntegerField(default=1)
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1-12
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    leave = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('student', 'subject', 'semester', 'year', 'month')
+    
+    @property
+    def total(self):
+        return self.present + self.absent + self.leave
+    
+    def __str__(self):
+        return f"{self.student} - {self.subject.code} - {self.month}/{self.year}"
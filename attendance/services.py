@@ -0,0 +1,214 @@
+from collections import Counter, defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import StudentAttendance, StudentSubjectAttendanceSummary
+
+
+AttendanceWriteResult = namedtuple('AttendanceWriteResult', ['inserted', 'updated', 'unchanged'])
+
+STATUSES = [choice for choice, _ in StudentAttendance.STATUS_CHOICES]
+
+
+def save_session_attendance(session, students, data, existing_attendance=None):
+    """
+    Apply posted attendance statuses for a session.
+
+    Posted values are diffed against the stored rows so only new or changed
+    records are written, using one bulk insert and one bulk update inside a
+    single transaction. The monthly summary rows are adjusted in the same
+    transaction. Returns the number of rows inserted, updated and left
+    unchanged.
+    """
+    if existing_attendance is None:
+        existing_attendance = {
+            sa.student_id: sa for sa in session.student_attendances.all()
+        }
+
+    to_create = []
+    to_update = []
+    unchanged = 0
+    deltas = defaultdict(Counter)
+
+    for student in students:
+        status = data.get(f'status_{student.pk}', 'present')
+        remarks = data.get(f'remarks_{student.pk}', '')
+
+        att = existing_attendance.get(student.pk)
+        if att is None:
+            to_create.append(StudentAttendance(
+                session=session,
+                student=student,
+                status=status,
+                remarks=remarks
+            ))
+            deltas[student.pk][status] += 1
+        elif att.status != status or att.remarks != remarks:
+            if att.status != status:
+                deltas[student.pk][att.status] -= 1
+                deltas[student.pk][status] += 1
+            att.status = status
+            att.remarks = remarks
+            to_update.append(att)
+        else:
+            unchanged += 1
+
+    with transaction.atomic():
+        if to_create:
+            StudentAttendance.objects.bulk_create(to_create)
+        if to_update:
+            StudentAttendance.objects.bulk_update(to_update, ['status', 'remarks'])
+        apply_summary_deltas(session, deltas)
+
+    return AttendanceWriteResult(len(to_create), len(to_update), unchanged)
+
+
+def apply_summary_deltas(session, deltas):
+    """
+    Add per-student status count changes for one session to the summary
+    table. ``deltas`` maps student id to a Counter of status -> change.
+    Must be called inside a transaction.
+    """
+    deltas = {student_id: delta for student_id, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+
+    key = {
+        'subject_id': session.subject_id,
+        'semester': session.semester,
+        'year': session.date.year,
+        'month': session.date.month,
+    }
+    summaries = {
+        s.student_id: s
+        for s in StudentSubjectAttendanceSummary.objects.select_for_update().filter(
+            student_id__in=deltas.keys(), **key
+        )
+    }
+
+    to_create = []
+    to_update = []
+    for student_id, delta in deltas.items():
+        summary = summaries.get(student_id)
+        if summary is None:
+            summary = StudentSubjectAttendanceSummary(student_id=student_id, **key)
+            to_create.append(summary)
+        else:
+            to_update.append(summary)
+        for status, change in delta.items():
+            setattr(summary, status, getattr(summary, status) + change)
+
+    if to_create:
+        StudentSubjectAttendanceSummary.objects.bulk_create(to_create)
+    if to_update:
+        StudentSubjectAttendanceSummary.objects.bulk_update(to_update, STATUSES)
+
+
+def student_subject_stats(student):
+    """Subject-wise attendance totals for a student, keyed by subject code"""
+    rows = StudentSubjectAttendanceSummary.objects.filter(
+        student=student
+    ).values('subject__code', 'subject__title').annotate(
+        present_count=Sum('present'),
+        absent_count=Sum('absent'),
+        leave_count=Sum('leave'),
+    ).order_by('subject__code')
+
+    subject_stats = {}
+    for row in rows:
+        present, absent, leave = row['present_count'], row['absent_count'], row['leave_count']
+        total = present + absent + leave
+        subject_stats[row['subject__code']] = {
+            'name': row['subject__title'],
+            'present': present,
+            'absent': absent,
+            'leave': leave,
+            'total': total,
+            'percentage': round((present / total) * 100, 1) if total > 0 else 0,
+        }
+    return subject_stats
+
+
+def attendance_percentages(students):
+    """Overall attendance percentage for each student, keyed by student id"""
+    rows = StudentSubjectAttendanceSummary.objects.filter(
+        student__in=students
+    ).values('student_id').annotate(
+        present_count=Sum('present'),
+        absent_count=Sum('absent'),
+        leave_count=Sum('leave'),
+    ).order_by()
+
+    percentages = {}
+    for row in rows:
+        total = row['present_count'] + row['absent_count'] + row['leave_count']
+        if total > 0:
+            percentages[row['student_id']] = round((row['present_count'] / total) * 100, 1)
+    return percentages
+
+
+def _raw_summary_rows():
+    """Summary counts computed directly from StudentAttendance"""
+    return StudentAttendance.objects.annotate(
+        year=ExtractYear('session__date'),
+        month=ExtractMonth('session__date'),
+    ).values(
+        'student_id', 'session__subject_id', 'session__semester', 'year', 'month'
+    ).annotate(
+        present=Count('pk', filter=Q(status='present')),
+        absent=Count('pk', filter=Q(status='absent')),
+        leave=Count('pk', filter=Q(status='leave')),
+    ).order_by()
+
+
+def rebuild_attendance_summary(batch_size=1000):
+    """Recreate every summary row from the raw attendance records"""
+    rows = [
+        StudentSubjectAttendanceSummary(
+            student_id=row['student_id'],
+            subject_id=row['session__subject_id'],
+            semester=row['session__semester'],
+            year=row['year'],
+            month=row['month'],
+            present=row['present'],
+            absent=row['absent'],
+            leave=row['leave'],
+        )
+        for row in _raw_summary_rows().iterator()
+    ]
+    with transaction.atomic():
+        StudentSubjectAttendanceSummary.objects.all().delete()
+        StudentSubjectAttendanceSummary.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def find_summary_mismatches():
+    """
+    Compare the summary table with counts taken from the raw records.
+    Returns a list of (key, expected, stored) tuples where the counts are
+    (present, absent, leave) and a missing side is None.
+    """
+    expected = {
+        (row['student_id'], row['session__subject_id'], row['session__semester'], row['year'], row['month']):
+            (row['present'], row['absent'], row['leave'])
+        for row in _raw_summary_rows().iterator()
+    }
+    stored = {
+        (row['student_id'], row['subject_id'], row['semester'], row['year'], row['month']):
+            (row['present'], row['absent'], row['leave'])
+        for row in StudentSubjectAttendanceSummary.objects.values(
+            'student_id', 'subject_id', 'semester', 'year', 'month', 'present', 'absent', 'leave'
+        ).iterator()
+    }
+
+    mismatches = []
+    for key in expected.keys() | stored.keys():
+        stored_counts = stored.get(key)
+        # Rows whose counts have all been moved elsewhere are equivalent to missing
+        if stored_counts == (0, 0, 0):
+            stored_counts = None
+        if expected.get(key) != stored_counts:
+            mismatches.append((key, expected.get(key), stored_counts))
+    return sorted(mismatches, key=lambda m: m[0])
@@ -16,10 +16,12 @@ urlpatterns = [
     path('college/departments/', views.college_select_departments, name='college_select_departments'),
     path('college/students/', views.college_students, name='college_students'),
     path('college/students/add/', views.college_add_student, name='college_add_student'),
+    path('college/students/import/', views.college_import_students, name='college_import_students'),
     path('college/students/<int:student_id>/', views.college_view_student, name='college_view_student'),
     path('college/students/<int:student_id>/edit/', views.college_edit_student, name='college_edit_student'),
     path('college/faculty/', views.college_faculty, name='college_faculty'),
     path('college/faculty/add/', views.college_add_faculty, name='college_add_faculty'),
+    path('college/faculty/import/', views.college_import_faculty, name='college_import_faculty'),
     path('college/faculty/<int:faculty_id>/', views.college_view_faculty, name='college_view_faculty'),
     path('college/faculty/<int:faculty_id>/edit/', views.college_edit_faculty, name='college_edit_faculty'),
     path('college/notifications/', views.college_notifications, name='college_notifications'),
@@ -49,6 +51,7 @@ urlpatterns = [
     path('hod/students/', views.hod_students, name='hod_students'),
     path('hod/attendance/', views.hod_attendance, name='hod_attendance'),
     path('hod/attendance/add/', views.hod_add_attendance, name='hod_add_attendance'),
+    path('hod/attendance/export/', views.hod_attendance_export, name='hod_attendance_export'),
     path('hod/attendance/<int:session_id>/mark/', views.hod_mark_attendance, name='hod_mark_attendance'),
     path('hod/attendance/<int:session_id>/edit/', views.hod_edit_attendance, name='hod_edit_attendance'),
     path('hod/medical-certificates/', views.hod_medical_certificates, name='hod_medical_certificates'),
@@ -60,7 +63,9 @@ urlpatterns = [
     path('principal/', views.principal_dashboard, name='principal_dashboard'),
     path('principal/profile/', views.principal_profile, name='principal_profile'),
     path('principal/faculty/', views.principal_faculty, name='principal_faculty'),
+    path('principal/faculty/export/', views.principal_faculty_export, name='principal_faculty_export'),
     path('principal/students/', views.principal_students, name='principal_students'),
+    path('principal/students/export/', views.principal_students_export, name='principal_students_export'),
     path('principal/departments/', views.principal_departments, name='principal_departments'),
     path('principal/notifications/', views.principal_notifications, name='principal_notifications'),
     path('principal/notifications/add/', views.principal_add_notification, name='principal_add_notification'),
@@ -2,15 +2,30 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db.models import Q, Count, Sum
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse
 from django.db.models.functions import TruncMonth
 from datetime import datetime, date, timedelta
-from academic.models import Course, Department, Program, ExamNotification, UniversityExam, ExamSubject, StudentResult, QuestionPaper, ProgramSemesterCourse
-from accounts.models import College, CollegeAffiliatedDepartment, CollegeAffiliatedProgram, StudentProfile, FacultyProfile
-from attendance.models import AttendanceSession, StudentAttendance, MedicalCertificate
+from academic.models import Course, Department, Program, ExamNotification, ExamSubject, QuestionPaper, ExamCollegeSummary
+from accounts.models import College, StudentProfile, FacultyProfile
+from attendance.models import AttendanceSession, StudentAttendance, MedicalCertificate, StudentSubjectAttendanceSummary
+from academic.catalog import catalog, json_etag_response
+from academic.notifications import notification_feed, notification_page, university_notifications
+from academic.results import result_sheet
+from academic.services import released_papers, serve_question_paper
+from attendance.services import save_session_attendance, student_subject_stats, attendance_percentages
+from adminpanel.affiliations import department_program_tree, update_college_affiliations
+from adminpanel.exports import (
+    ATTENDANCE_COLUMNS, FACULTY_COLUMNS, STUDENT_COLUMNS,
+    attendance_rows, export_response, export_values, faculty_rows, student_rows,
+)
+from adminpanel.imports import (
+    FACULTY_IMPORT_COLUMNS, STUDENT_IMPORT_COLUMNS, SpreadsheetError, import_faculty, import_students,
+)
+from adminpanel.pagination import paginate_keyset
+from adminpanel.stats import college_department_stats, college_stats, department_stats
+from search.index import search_ids
 import json
 import calendar
 
@@ -22,12 +37,10 @@ def college_required(view_func):
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             return redirect('login')
-        if request.user.role != 'college':
+        if request.ums.role != 'college':
             messages.error(request, 'Access denied. This area is for colleges only.')
             return redirect('public:index')
-        try:
-            college_profile = request.user.college_profile
-        except College.DoesNotExist:
+        if request.ums.profile is None:
             messages.error(request, 'College profile not found.')
             return redirect('public:index')
         return view_func(request, *args, **kwargs)
@@ -39,12 +52,10 @@ def student_required(view_func):
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             return redirect('login')
-        if request.user.role != 'student':
+        if request.ums.role != 'student':
             messages.error(request, 'Access denied. This area is for students only.')
             return redirect('public:index')
-        try:
-            student_profile = request.user.studentprofile
-        except StudentProfile.DoesNotExist:
+        if request.ums.profile is None:
             messages.error(request, 'Student profile not found.')
             return redirect('public:index')
         return view_func(request, *args, **kwargs)
@@ -56,12 +67,10 @@ def faculty_required(view_func):
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             return redirect('login')
-        if request.user.role != 'faculty':
+        if request.ums.role != 'faculty':
             messages.error(request, 'Access denied. This area is for faculty only.')
             return redirect('public:index')
-        try:
-            faculty_profile = request.user.faculty_profile
-        except FacultyProfile.DoesNotExist:
+        if request.ums.profile is None:
             messages.error(request, 'Faculty profile not found.')
             return redirect('public:index')
         return view_func(request, *args, **kwargs)
@@ -73,17 +82,15 @@ def hod_required(view_func):
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             return redirect('login')
-        if request.user.role != 'faculty':
+        if request.ums.role != 'faculty':
             messages.error(request, 'Access denied. This area is for HODs only.')
             return redirect('public:index')
-        try:
-            faculty_profile = request.user.faculty_profile
-            if faculty_profile.designation != 'hod':
-                messages.error(request, 'Access denied. This area is for HODs only.')
-                return redirect('public:index')
-        except FacultyProfile.DoesNotExist:
+        if request.ums.profile is None:
             messages.error(request, 'Faculty profile not found.')
             return redirect('public:index')
+        if not request.ums.is_hod:
+            messages.error(request, 'Access denied. This area is for HODs only.')
+            return redirect('public:index')
         return view_func(request, *args, **kwargs)
     return wrapper
 
@@ -93,17 +100,15 @@ def principal_required(view_func):
     def wrapper(request, *args, **kwargs):
         if not request.user.is_authenticated:
             return redirect('login')
-        if request.user.role != 'faculty':
+        if request.ums.role != 'faculty':
             messages.error(request, 'Access denied. This area is for Principals only.')
             return redirect('public:index')
-        try:
-            faculty_profile = request.user.faculty_profile
-            if faculty_profile.designation != 'principal':
-                messages.error(request, 'Access denied. This area is for Principals only.')
-                return redirect('public:index')
-        except FacultyProfile.DoesNotExist:
+        if request.ums.profile is None:
             messages.error(request, 'Faculty profile not found.')
             return redirect('public:index')
+        if not request.ums.is_principal:
+            messages.error(request, 'Access denied. This area is for Principals only.')
+            return redirect('public:index')
         return view_func(request, *args, **kwargs)
     return wrapper
 
@@ -125,24 +130,13 @@ def courses(request):
     qs = Course.objects.select_related('department').all().order_by('code')
     
     if q:
-        qs = qs.filter(
-            Q(code__icontains=q) |
-            Q(title__icontains=q) |
-            Q(department__name__icontains=q)
-        )
+        qs = qs.filter(pk__in=search_ids('course', q))
     
     # Get all departments for the sidebar
     departments = Department.objects.all().order_by('name')
     
     # Pagination
-    paginator = Paginator(qs, 12)
-    page = request.GET.get('page')
-    try:
-        courses_page = paginator.page(page)
-    except PageNotAnInteger:
-        courses_page = paginator.page(1)
-    except EmptyPage:
-        courses_page = paginator.page(paginator.num_pages)
+    courses_page = paginate_keyset(request, qs, 12, ordering=('code',))
     
     context = {
         'courses': courses_page,
@@ -248,13 +242,15 @@ def college_register(request):
 @college_required
 def college_dashboard(request):
     """College dashboard - main landing page after login"""
-    college = request.user.college_profile
+    college = request.ums.college
+    
+    stats = college_stats(college)
     
     context = {
         'college': college,
         'affiliated_departments': college.affiliated_departments.select_related('department').all(),
-        'departments_count': college.affiliated_departments.count(),
-        'students_count': college.students.count(),
+        'departments_count': stats['departments_count'],
+        'students_count': stats['students_count'],
     }
     return render(request, 'public/college/dashboard.html', context)
 
@@ -263,7 +259,7 @@ def college_dashboard(request):
 @college_required
 def college_profile(request):
     """View and edit college profile"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     if request.method == 'POST':
         # Allow editing basic profile info
@@ -287,27 +283,13 @@ def college_profile(request):
 @college_required
 def college_select_departments(request):
     """Select departments for affiliation"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     # Check if college is approved
     if not college.is_approved:
         messages.warning(request, 'Your college registration is still pending approval. You cannot select departments yet.')
         return redirect('public:college_dashboard')
     
-    all_departments = Department.objects.all().order_by('name')
-    affiliated_dept_ids = list(college.affiliated_departments.values_list('department_id', flat=True))
-    
-    # Get affiliated program ids for the college
-    affiliated_program_ids = list(college.affiliated_programs.values_list('program_id', flat=True))
-    # Attach programs to each department for template
-    departments_with_programs = []
-    for dept in all_departments:
-        programs = Program.objects.filter(department=dept).order_by('name')
-        departments_with_programs.append({
-            'department': dept,
-            'programs': programs,
-        })
-
     if request.method == 'POST':
         # Check if already affiliated - can't change departments after affiliation is approved
         if college.affiliation_status == 'approved':
@@ -316,25 +298,8 @@ def college_select_departments(request):
         
         selected_programs = request.POST.getlist('programs')
         
-        # Clear existing and add new program selections
-        college.affiliated_programs.all().delete()
-        college.affiliated_departments.all().delete()
-        
-        dept_ids = set()
-        for prog_id in selected_programs:
-            prog = Program.objects.get(pk=prog_id)
-            CollegeAffiliatedProgram.objects.create(
-                college=college,
-                program=prog
-            )
-            dept_ids.add(prog.department_id)
-        
-        # Save departments based on selected programs
-        for dept_id in dept_ids:
-            CollegeAffiliatedDepartment.objects.get_or_create(
-                college=college,
-                department_id=dept_id
-            )
+        # Only the added and removed programs (and their departments) are written
+        update_college_affiliations(college, selected_programs)
         
         if selected_programs:
             if college.affiliation_status == 'not_applied':
@@ -349,9 +314,12 @@ def college_select_departments(request):
         
         return redirect('public:college_select_departments')
     
+    affiliated_dept_ids = list(college.affiliated_departments.values_list('department_id', flat=True))
+    affiliated_program_ids = list(college.affiliated_programs.values_list('program_id', flat=True))
+    
     context = {
         'college': college,
-        'departments': departments_with_programs,
+        'departments': department_program_tree(),
         'selected_dept_ids': affiliated_dept_ids,
         'affiliated_program_ids': affiliated_program_ids,
     }
@@ -362,7 +330,7 @@ def college_select_departments(request):
 @college_required
 def college_students(request):
     """List students enrolled by this college"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     # Check if college can enroll students
     if not college.can_enroll_students:
@@ -373,26 +341,14 @@ def college_students(request):
     students = college.students.select_related('user', 'department', 'program').all().order_by('-pk')
     
     if q:
-        students = students.filter(
-            Q(user__first_name__icontains=q) |
-            Q(user__last_name__icontains=q) |
-            Q(user__email__icontains=q) |
-            Q(roll_number__icontains=q)
-        )
+        students = students.filter(pk__in=search_ids('student', q, college=college))
     
     # Get programs from affiliated departments
     affiliated_departments = college.affiliated_departments.select_related('department').all()
     affiliated_dept_ids = list(affiliated_departments.values_list('department_id', flat=True))
     available_programs = Program.objects.filter(department_id__in=affiliated_dept_ids).order_by('name')
     
-    paginator = Paginator(students, 10)
-    page = request.GET.get('page')
-    try:
-        students_page = paginator.page(page)
-    except PageNotAnInteger:
-        students_page = paginator.page(1)
-    except EmptyPage:
-        students_page = paginator.page(paginator.num_pages)
+    students_page = paginate_keyset(request, students, 10, ordering=('-pk',), approximate_count=True)
     
     context = {
         'college': college,
@@ -405,12 +361,23 @@ def college_students(request):
     return render(request, 'public/college/students.html', context)
 
 
+def affiliated_programs_json(college):
+    """Map of department id -> the college's affiliated programs, for the program picker"""
+    programs = catalog().programs
+    dept_programs_map = {}
+    for program_id in college.affiliated_programs.order_by('program__name').values_list('program_id', flat=True):
+        program = programs.get(program_id)
+        if program is not None:
+            dept_programs_map.setdefault(program.department_id, []).append({'id': program.id, 'name': program.name})
+    return json.dumps(dept_programs_map)
+
+
 @login_required
 @college_required
 def college_add_student(request):
     """Add a new student to the college"""
     import json
-    college = request.user.college_profile
+    college = request.ums.college
     
     # Check if college can enroll students
     if not college.can_enroll_students:
@@ -418,20 +385,11 @@ def college_add_student(request):
         return redirect('public:college_dashboard')
     
     # Get affiliated departments with programs
-    affiliated_departments = college.affiliated_departments.select_related('department').all()
+    affiliated_departments = college.affiliated_departments.select_related('department').annotate(
+        program_count=Count('department__programs')
+    )
     
-    # Build a map of department_id -> affiliated programs for this college
-    affiliated_programs = college.affiliated_programs.select_related('program', 'program__department').all()
-    dept_programs_map = {}
-    for ap in affiliated_programs:
-        dept_id = ap.program.department_id
-        if dept_id not in dept_programs_map:
-            dept_programs_map[dept_id] = []
-        dept_programs_map[dept_id].append({
-            'id': ap.program.id,
-            'name': ap.program.name
-        })
-    dept_programs_json = json.dumps(dept_programs_map)
+    dept_programs_json = affiliated_programs_json(college)
     
     if request.method == 'POST':
         email = request.POST.get('email', '').strip()
@@ -508,11 +466,49 @@ def college_add_student(request):
     return render(request, 'public/college/add_student.html', context)
 
 
+@login_required
+@college_required
+def college_import_students(request):
+    """Bulk-enroll students from a CSV or XLSX file"""
+    college = request.ums.college
+    
+    if not college.can_enroll_students:
+        messages.warning(request, 'Your college is not yet authorized to enroll students.')
+        return redirect('public:college_dashboard')
+    
+    if request.GET.get('template'):
+        return export_response(request, 'student-import-template', STUDENT_IMPORT_COLUMNS, [])
+    
+    report = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, 'Please choose a CSV or XLSX file to import.')
+        else:
+            try:
+                report = import_students(college, upload, upload.name, dry_run=bool(request.POST.get('dry_run')))
+            except SpreadsheetError as exc:
+                messages.error(request, str(exc))
+            else:
+                if report.created:
+                    messages.success(request, f'{report.created} students enrolled successfully!')
+                elif not report.errors:
+                    messages.info(request, f'All {report.valid} rows are valid.')
+    
+    context = {
+        'college': college,
+        'columns': STUDENT_IMPORT_COLUMNS,
+        'programs': college.affiliated_programs.select_related('program__department').order_by('program__name'),
+        'report': report,
+    }
+    return render(request, 'public/college/import_students.html', context)
+
+
 @login_required
 @college_required
 def college_view_student(request, student_id):
     """View a student's details"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     # Get the student, ensuring they belong to this college
     student = get_object_or_404(StudentProfile, pk=student_id, college=college)
@@ -529,7 +525,7 @@ def college_view_student(request, student_id):
 def college_edit_student(request, student_id):
     """Edit a student's details"""
     import json
-    college = request.user.college_profile
+    college = request.ums.college
     
     # Get the student, ensuring they belong to this college
     student = get_object_or_404(StudentProfile, pk=student_id, college=college)
@@ -537,18 +533,7 @@ def college_edit_student(request, student_id):
     # Get affiliated departments with programs
     affiliated_departments = college.affiliated_departments.select_related('department').all()
     
-    # Build a map of department_id -> affiliated programs for this college
-    affiliated_programs = college.affiliated_programs.select_related('program', 'program__department').all()
-    dept_programs_map = {}
-    for ap in affiliated_programs:
-        dept_id = ap.program.department_id
-        if dept_id not in dept_programs_map:
-            dept_programs_map[dept_id] = []
-        dept_programs_map[dept_id].append({
-            'id': ap.program.id,
-            'name': ap.program.name
-        })
-    dept_programs_json = json.dumps(dept_programs_map)
+    dept_programs_json = affiliated_programs_json(college)
     
     if request.method == 'POST':
         first_name = request.POST.get('first_name', '').strip()
@@ -610,7 +595,7 @@ def college_edit_student(request, student_id):
 @college_required
 def college_faculty(request):
     """List faculty members of this college"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     if not college.can_enroll_students:
         messages.warning(request, 'Your college is not yet authorized to manage faculty. Complete registration and affiliation first.')
@@ -622,11 +607,7 @@ def college_faculty(request):
     faculty_list = college.faculty_members.select_related('user').prefetch_related('departments').all().order_by('-pk')
     
     if q:
-        faculty_list = faculty_list.filter(
-            Q(user__first_name__icontains=q) |
-            Q(user__last_name__icontains=q) |
-            Q(user__email__icontains=q)
-        )
+        faculty_list = faculty_list.filter(pk__in=search_ids('faculty', q, college=college))
     
     if designation_filter:
         faculty_list = faculty_list.filter(designation=designation_filter)
@@ -634,14 +615,7 @@ def college_faculty(request):
     # Get affiliated departments
     affiliated_departments = college.affiliated_departments.select_related('department').all()
     
-    paginator = Paginator(faculty_list, 10)
-    page = request.GET.get('page')
-    try:
-        faculty_page = paginator.page(page)
-    except PageNotAnInteger:
-        faculty_page = paginator.page(1)
-    except EmptyPage:
-        faculty_page = paginator.page(paginator.num_pages)
+    faculty_page = paginate_keyset(request, faculty_list, 10, ordering=('-pk',), approximate_count=True)
     
     context = {
         'college': college,
@@ -660,7 +634,7 @@ def college_faculty(request):
 @college_required
 def college_add_faculty(request):
     """Add a new faculty member to the college"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     if not college.can_enroll_students:
         messages.warning(request, 'Your college is not yet authorized to add faculty.')
@@ -736,9 +710,8 @@ def college_add_faculty(request):
                 joining_date=joining_date,
             )
             
-            # Add departments
-            for dept_id in department_ids:
-                faculty.departments.add(Department.objects.get(pk=dept_id))
+            # Add departments in one insert
+            faculty.departments.add(*department_ids)
             
             messages.success(request, f'{dict(FacultyProfile.DESIGNATION_CHOICES)[designation]} {first_name} {last_name} added successfully!')
             return redirect('public:college_faculty')
@@ -751,11 +724,49 @@ def college_add_faculty(request):
     return render(request, 'public/college/add_faculty.html', context)
 
 
+@login_required
+@college_required
+def college_import_faculty(request):
+    """Bulk-add or update faculty from a CSV or XLSX file"""
+    college = request.ums.college
+    
+    if not college.can_enroll_students:
+        messages.warning(request, 'Your college is not yet authorized to add faculty.')
+        return redirect('public:college_dashboard')
+    
+    if request.GET.get('template'):
+        return export_response(request, 'faculty-import-template', FACULTY_IMPORT_COLUMNS, [])
+    
+    report = None
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, 'Please choose a CSV or XLSX file to import.')
+        else:
+            try:
+                report = import_faculty(college, upload, upload.name, dry_run=bool(request.POST.get('dry_run')))
+            except SpreadsheetError as exc:
+                messages.error(request, str(exc))
+            else:
+                if report.created or report.updated:
+                    messages.success(request, f'{report.created} faculty added and {report.updated} updated.')
+                elif not report.errors:
+                    messages.info(request, f'All {report.valid} rows are valid.')
+    
+    context = {
+        'college': college,
+        'columns': FACULTY_IMPORT_COLUMNS,
+        'departments': college.affiliated_departments.select_related('department').order_by('department__name'),
+        'report': report,
+    }
+    return render(request, 'public/college/import_faculty.html', context)
+
+
 @login_required
 @college_required
 def college_view_faculty(request, faculty_id):
     """View a faculty member's details"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     faculty = get_object_or_404(FacultyProfile, pk=faculty_id, college=college)
     
@@ -770,7 +781,7 @@ def college_view_faculty(request, faculty_id):
 @college_required
 def college_edit_faculty(request, faculty_id):
     """Edit a faculty member's details"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     faculty = get_object_or_404(FacultyProfile, pk=faculty_id, college=college)
     affiliated_departments = college.affiliated_departments.select_related('department').all()
@@ -794,6 +805,11 @@ def college_edit_faculty(request, faculty_id):
         if not department_ids:
             errors.append('At least one department is required.')
         
+        # Validate departments are affiliated
+        affiliated_dept_ids = {str(pk) for pk in affiliated_departments.values_list('department_id', flat=True)}
+        if not set(department_ids) <= affiliated_dept_ids:
+            errors.append('One or more selected departments are not affiliated with your college.')
+        
         # Validate only one principal per college (excluding current faculty)
         if designation == 'principal' and college.faculty_members.filter(designation='principal').exclude(pk=faculty_id).exists():
             errors.append('This college already has a Principal.')
@@ -816,10 +832,8 @@ def college_edit_faculty(request, faculty_id):
                 faculty.joining_date = joining_date
             faculty.save()
             
-            # Update departments
-            faculty.departments.clear()
-            for dept_id in department_ids:
-                faculty.departments.add(Department.objects.get(pk=dept_id))
+            # Update departments, only writing the memberships that changed
+            faculty.departments.set(department_ids)
             
             messages.success(request, f'{first_name} {last_name} updated successfully!')
             return redirect('public:college_faculty')
@@ -828,6 +842,7 @@ def college_edit_faculty(request, faculty_id):
         'college': college,
         'faculty': faculty,
         'departments': affiliated_departments,
+        'faculty_department_ids': set(faculty.departments.values_list('pk', flat=True)),
         'designation_choices': FacultyProfile.DESIGNATION_CHOICES,
     }
     return render(request, 'public/college/edit_faculty.html', context)
@@ -839,7 +854,7 @@ def college_edit_faculty(request, faculty_id):
 @student_required
 def student_dashboard(request):
     """Student dashboard - main landing page after login"""
-    student = request.user.studentprofile
+    student = request.ums.student
     
     context = {
         'student': student,
@@ -852,7 +867,7 @@ def student_dashboard(request):
 @student_required
 def student_profile(request):
     """View and edit student profile"""
-    student = request.user.studentprofile
+    student = request.ums.student
     
     if request.method == 'POST':
         phone = request.POST.get('phone', '').strip()
@@ -874,7 +889,7 @@ def student_profile(request):
 @faculty_required
 def faculty_dashboard(request):
     """Faculty dashboard - main landing page after login"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     
     # Redirect to specific portal based on designation
     if faculty.designation == 'principal':
@@ -894,7 +909,7 @@ def faculty_dashboard(request):
 @faculty_required
 def faculty_profile(request):
     """View and edit faculty profile"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     
     if request.method == 'POST':
         phone = request.POST.get('phone', '').strip()
@@ -918,22 +933,18 @@ def faculty_profile(request):
 @hod_required
 def hod_dashboard(request):
     """HOD dashboard - department management"""
-    faculty = request.user.faculty_profile
-    departments = faculty.departments.all()
+    faculty = request.ums.faculty
+    departments = college_department_stats(faculty.college, request.ums.department_ids)
     
     # Get stats for HOD's departments
-    total_faculty = 0
-    total_students = 0
-    for dept in departments:
-        total_faculty += FacultyProfile.objects.filter(departments=dept, college=faculty.college).count()
-        total_students += StudentProfile.objects.filter(department=dept, college=faculty.college).count()
+    stats = department_stats(faculty.college, request.ums.department_ids)
     
     context = {
         'faculty': faculty,
         'college': faculty.college,
         'departments': departments,
-        'total_faculty': total_faculty,
-        'total_students': total_students,
+        'total_faculty': stats['faculty_count'],
+        'total_students': stats['students_count'],
     }
     return render(request, 'public/hod/dashboard.html', context)
 
@@ -942,7 +953,7 @@ def hod_dashboard(request):
 @hod_required
 def hod_profile(request):
     """HOD profile view"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     
     if request.method == 'POST':
         phone = request.POST.get('phone', '').strip()
@@ -964,7 +975,7 @@ def hod_profile(request):
 @hod_required
 def hod_faculty(request):
     """HOD view - manage faculty in their department"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     departments = faculty.departments.all()
     
     # Get faculty in HOD's departments
@@ -986,7 +997,7 @@ def hod_faculty(request):
 @hod_required
 def hod_students(request):
     """HOD view - view students in their department"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     departments = faculty.departments.all()
     
     # Get students in HOD's departments
@@ -1000,6 +1011,7 @@ def hod_students(request):
         'college': faculty.college,
         'departments': departments,
         'dept_students': dept_students,
+        'attendance_percentages': attendance_percentages(dept_students),
     }
     return render(request, 'public/hod/students.html', context)
 
@@ -1010,22 +1022,23 @@ def hod_students(request):
 @principal_required
 def principal_dashboard(request):
     """Principal dashboard - college overview"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     # Get college stats
-    total_faculty = college.faculty_members.count()
-    total_students = college.students.count()
-    total_departments = college.affiliated_departments.count()
-    total_hods = college.faculty_members.filter(designation='hod').count()
+    stats = college_stats(college)
     
     context = {
         'faculty': faculty,
         'college': college,
-        'total_faculty': total_faculty,
-        'total_students': total_students,
-        'total_departments': total_departments,
-        'total_hods': total_hods,
+        'total_faculty': stats['faculty_count'],
+        'total_students': stats['students_count'],
+        'total_departments': stats['departments_count'],
+        'total_hods': stats['hod_count'],
+        # The college's share of each published exam, snapshotted at publication
+        'exam_results': ExamCollegeSummary.objects.filter(college=college).select_related(
+            'exam__program', 'topper__user'
+        ).order_by('-exam__result_published_at', '-pk')[:5],
     }
     return render(request, 'public/principal/dashboard.html', context)
 
@@ -1034,7 +1047,7 @@ def principal_dashboard(request):
 @principal_required
 def principal_profile(request):
     """Principal profile view"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     
     if request.method == 'POST':
         phone = request.POST.get('phone', '').strip()
@@ -1056,7 +1069,7 @@ def principal_profile(request):
 @principal_required
 def principal_faculty(request):
     """Principal view - all faculty in college"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     all_faculty = college.faculty_members.select_related('user').prefetch_related('departments').all()
@@ -1069,11 +1082,20 @@ def principal_faculty(request):
     return render(request, 'public/principal/faculty.html', context)
 
 
+@login_required
+@principal_required
+def principal_faculty_export(request):
+    """Principal - stream the college's faculty as CSV or XLSX"""
+    college = request.ums.college
+    qs = FacultyProfile.objects.filter(college=college).order_by('pk')
+    return export_values(request, 'faculty', FACULTY_COLUMNS, qs, faculty_rows, extra_columns=('Departments',))
+
+
 @login_required
 @principal_required
 def principal_students(request):
     """Principal view - all students in college"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     all_students = college.students.select_related('user', 'department', 'program').all()
@@ -1086,36 +1108,29 @@ def principal_students(request):
     return render(request, 'public/principal/students.html', context)
 
 
+@login_required
+@principal_required
+def principal_students_export(request):
+    """Principal - stream the college's students as CSV or XLSX"""
+    college = request.ums.college
+    qs = StudentProfile.objects.filter(college=college).order_by('pk')
+    return export_values(request, 'students', STUDENT_COLUMNS, qs, student_rows)
+
+
 @login_required
 @principal_required
 def principal_departments(request):
     """Principal view - all departments in college"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
-    departments = college.affiliated_departments.select_related('department').all()
-    
-    # Add stats to each department
-    dept_data = []
-    for dept in departments:
-        faculty_count = FacultyProfile.objects.filter(departments=dept.department, college=college).count()
-        student_count = StudentProfile.objects.filter(department=dept.department, college=college).count()
-        hod = FacultyProfile.objects.filter(
-            departments=dept.department, 
-            college=college, 
-            designation='hod'
-        ).first()
-        dept_data.append({
-            'department': dept.department,
-            'faculty_count': faculty_count,
-            'student_count': student_count,
-            'hod': hod,
-        })
+    # Faculty, student and HOD figures for every department in one query
+    departments = college_department_stats(college)
     
     context = {
         'faculty': faculty,
         'college': college,
-        'dept_data': dept_data,
+        'departments': departments,
     }
     return render(request, 'public/principal/departments.html', context)
 
@@ -1128,18 +1143,18 @@ def principal_departments(request):
 @hod_required
 def hod_attendance(request):
     """HOD view - Attendance management for their departments"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     departments = faculty.departments.all()
     
     # Get subjects (courses) for their departments
-    dept_ids = list(departments.values_list('id', flat=True))
+    dept_ids = request.ums.department_ids
     subjects = Course.objects.filter(department_id__in=dept_ids)
     
     # Get recent attendance sessions
     sessions = AttendanceSession.objects.filter(
         college=college,
-        department__in=departments
+        department_id__in=dept_ids
     ).select_related('subject', 'department', 'created_by__user')[:20]
     
     context = {
@@ -1152,16 +1167,53 @@ def hod_attendance(request):
     return render(request, 'public/hod/attendance.html', context)
 
 
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+@login_required
+@hod_required
+def hod_attendance_export(request):
+    """
+    HOD - stream the attendance marked in their departments as CSV or
+    XLSX, optionally narrowed by ?semester=, ?subject=, ?from= and ?to=.
+    """
+    college = request.ums.college
+    records = StudentAttendance.objects.filter(
+        session__college=college,
+        session__department_id__in=request.ums.department_ids
+    )
+    
+    semester = request.GET.get('semester', '')
+    if semester.isdigit():
+        records = records.filter(session__semester=int(semester))
+    subject = request.GET.get('subject', '')
+    if subject.isdigit():
+        records = records.filter(session__subject_id=int(subject))
+    start = _parse_date(request.GET.get('from'))
+    if start:
+        records = records.filter(session__date__gte=start)
+    end = _parse_date(request.GET.get('to'))
+    if end:
+        records = records.filter(session__date__lte=end)
+    
+    records = records.order_by('session__date', 'session_id', 'student_id')
+    return export_values(request, 'attendance', ATTENDANCE_COLUMNS, records, attendance_rows)
+
+
 @login_required
 @hod_required
 def hod_add_attendance(request):
     """HOD adds attendance for a class"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     departments = faculty.departments.all()
     
     # Get subjects for their departments
-    dept_ids = list(departments.values_list('id', flat=True))
+    dept_ids = request.ums.department_ids
     subjects = Course.objects.filter(department_id__in=dept_ids)
     programs = Program.objects.filter(department_id__in=dept_ids)
     
@@ -1221,7 +1273,7 @@ def hod_add_attendance(request):
 @hod_required
 def hod_mark_attendance(request, session_id):
     """HOD marks attendance for students in a session"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     session = get_object_or_404(AttendanceSession, pk=session_id, college=college)
@@ -1241,24 +1293,12 @@ def hod_mark_attendance(request, session_id):
     }
     
     if request.method == 'POST':
-        for student in students:
-            status = request.POST.get(f'status_{student.pk}', 'present')
-            remarks = request.POST.get(f'remarks_{student.pk}', '')
-            
-            if student.pk in existing_attendance:
-                att = existing_attendance[student.pk]
-                att.status = status
-                att.remarks = remarks
-                att.save()
-            else:
-                StudentAttendance.objects.create(
-                    session=session,
-                    student=student,
-                    status=status,
-                    remarks=remarks
-                )
+        result = save_session_attendance(session, students, request.POST, existing_attendance)
         
-        messages.success(request, 'Attendance marked successfully!')
+        messages.success(
+            request,
+            f'Attendance marked successfully! ({result.inserted} added, {result.updated} updated, {result.unchanged} unchanged)'
+        )
         return redirect('public:hod_attendance')
     
     context = {
@@ -1282,13 +1322,12 @@ def hod_edit_attendance(request, session_id):
 @hod_required
 def hod_medical_certificates(request):
     """HOD reviews medical certificates from students"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
-    departments = faculty.departments.all()
     
     certificates = MedicalCertificate.objects.filter(
         student__college=college,
-        student__department__in=departments
+        student__department_id__in=request.ums.department_ids
     ).select_related('student__user', 'student__department')
     
     context = {
@@ -1303,7 +1342,7 @@ def hod_medical_certificates(request):
 @hod_required
 def hod_review_certificate(request, cert_id):
     """HOD approves/rejects a medical certificate"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     certificate = get_object_or_404(MedicalCertificate, pk=cert_id, student__college=college)
@@ -1341,16 +1380,17 @@ def hod_review_certificate(request, cert_id):
 @faculty_required
 def faculty_attendance(request):
     """Faculty view - Their subject attendance"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
-    departments = faculty.departments.all()
     
     # Get attendance sessions for subjects in their departments
-    dept_ids = list(departments.values_list('id', flat=True))
+    dept_ids = request.ums.department_ids
     sessions = AttendanceSession.objects.filter(
         college=college,
         department_id__in=dept_ids
-    ).select_related('subject', 'department', 'created_by__user')[:30]
+    ).select_related('subject', 'department', 'created_by__user').annotate(
+        student_count=Count('student_attendances')
+    )[:30]
     
     context = {
         'faculty': faculty,
@@ -1364,13 +1404,13 @@ def faculty_attendance(request):
 @faculty_required
 def faculty_edit_attendance(request, session_id):
     """Faculty edits attendance for their subject"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     session = get_object_or_404(AttendanceSession, pk=session_id, college=college)
     
     # Check if faculty can edit (is in the department)
-    if session.department not in faculty.departments.all():
+    if session.department_id not in request.ums.department_ids:
         messages.error(request, 'You can only edit attendance for your department subjects.')
         return redirect('public:faculty_attendance')
     
@@ -1388,24 +1428,12 @@ def faculty_edit_attendance(request, session_id):
     }
     
     if request.method == 'POST':
-        for student in students:
-            status = request.POST.get(f'status_{student.pk}', 'present')
-            remarks = request.POST.get(f'remarks_{student.pk}', '')
-            
-            if student.pk in existing_attendance:
-                att = existing_attendance[student.pk]
-                att.status = status
-                att.remarks = remarks
-                att.save()
-            else:
-                StudentAttendance.objects.create(
-                    session=session,
-                    student=student,
-                    status=status,
-                    remarks=remarks
-                )
+        result = save_session_attendance(session, students, request.POST, existing_attendance)
         
-        messages.success(request, 'Attendance updated successfully!')
+        messages.success(
+            request,
+            f'Attendance updated successfully! ({result.inserted} added, {result.updated} updated, {result.unchanged} unchanged)'
+        )
         return redirect('public:faculty_attendance')
     
     context = {
@@ -1424,23 +1452,23 @@ def faculty_edit_attendance(request, session_id):
 @student_required
 def student_attendance(request):
     """Student views their attendance"""
-    student = request.user.studentprofile
+    student = request.ums.student
     college = student.college
     
-    # Get all attendance records for this student
+    # Recent attendance records for this student
     attendances = StudentAttendance.objects.filter(
         student=student
-    ).select_related('session__subject', 'session__department')
+    ).select_related('session__subject', 'session__department').order_by('-session__date')
     
     # Calculate monthly stats
     current_month = date.today().month
     current_year = date.today().year
     
-    month_leaves = attendances.filter(
-        session__date__month=current_month,
-        session__date__year=current_year,
-        status='leave'
-    ).count()
+    month_leaves = StudentSubjectAttendanceSummary.objects.filter(
+        student=student,
+        year=current_year,
+        month=current_month
+    ).aggregate(total=Sum('leave'))['total'] or 0
     
     # Check if student needs to submit medical certificate (>3 leaves)
     needs_certificate = month_leaves > 3
@@ -1453,19 +1481,10 @@ def student_attendance(request):
     ).first()
     
     # Subject-wise attendance summary
-    subject_stats = {}
-    for att in attendances:
-        subj = att.session.subject.code
-        if subj not in subject_stats:
-            subject_stats[subj] = {'present': 0, 'absent': 0, 'leave': 0, 'total': 0, 'name': att.session.subject.title}
-        subject_stats[subj][att.status] += 1
-        subject_stats[subj]['total'] += 1
-    
-    # Calculate percentages
-    for subj in subject_stats:
-        total = subject_stats[subj]['total']
-        present = subject_stats[subj]['present']
-        subject_stats[subj]['percentage'] = round((present / total) * 100, 1) if total > 0 else 0
+    subject_stats = student_subject_stats(student)
+    total_records = sum(stats['total'] for stats in subject_stats.values())
+    present_count = sum(stats['present'] for stats in subject_stats.values())
+    absent_count = sum(stats['absent'] for stats in subject_stats.values())
     
     context = {
         'student': student,
@@ -1475,6 +1494,9 @@ def student_attendance(request):
         'needs_certificate': needs_certificate,
         'existing_cert': existing_cert,
         'subject_stats': subject_stats,
+        'total_records': total_records,
+        'present_count': present_count,
+        'absent_count': absent_count,
         'current_month': calendar.month_name[current_month],
         'current_year': current_year,
     }
@@ -1485,7 +1507,7 @@ def student_attendance(request):
 @student_required
 def student_submit_medical_certificate(request):
     """Student submits medical certificate"""
-    student = request.user.studentprofile
+    student = request.ums.student
     
     current_month = date.today().month
     current_year = date.today().year
@@ -1535,23 +1557,20 @@ def student_submit_medical_certificate(request):
 @hod_required
 def hod_notifications(request):
     """HOD manages college exam notifications"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     # Get college notifications
-    notifications = ExamNotification.objects.filter(college=college)
-    
-    # Get university notifications
-    university_notifications = ExamNotification.objects.filter(
-        notification_type='university',
-        is_active=True
-    )[:10]
+    cursor = request.GET.get('cursor')
+    page = notification_page(ExamNotification.objects.filter(college=college), cursor)
     
     context = {
         'faculty': faculty,
         'college': college,
-        'notifications': notifications,
-        'university_notifications': university_notifications,
+        'notifications': page.items,
+        'university_notifications': university_notifications()[:10],
+        'cursor': cursor,
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'public/hod/notifications.html', context)
 
@@ -1560,7 +1579,7 @@ def hod_notifications(request):
 @hod_required
 def hod_add_notification(request):
     """HOD adds a college exam notification"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     if request.method == 'POST':
@@ -1595,27 +1614,19 @@ def hod_add_notification(request):
 @student_required
 def student_notifications(request):
     """Student views exam notifications"""
-    student = request.user.studentprofile
+    student = request.ums.student
     college = student.college
     
-    # College notifications
-    college_notifications = ExamNotification.objects.filter(
-        college=college,
-        notification_type='college',
-        is_active=True
-    )
-    
-    # University notifications
-    university_notifications = ExamNotification.objects.filter(
-        notification_type='university',
-        is_active=True
-    )
+    # College and university notifications merged into one feed
+    cursor = request.GET.get('cursor')
+    feed = notification_feed(college, cursor)
     
     context = {
         'student': student,
         'college': college,
-        'college_notifications': college_notifications,
-        'university_notifications': university_notifications,
+        'notifications': feed.items,
+        'cursor': cursor,
+        'next_cursor': feed.next_cursor,
     }
     return render(request, 'public/student/notifications.html', context)
 
@@ -1624,25 +1635,19 @@ def student_notifications(request):
 @faculty_required
 def faculty_notifications(request):
     """Faculty views exam notifications"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
-    college_notifications = ExamNotification.objects.filter(
-        college=college,
-        notification_type='college',
-        is_active=True
-    )
-    
-    university_notifications = ExamNotification.objects.filter(
-        notification_type='university',
-        is_active=True
-    )
+    # College and university notifications merged into one feed
+    cursor = request.GET.get('cursor')
+    feed = notification_feed(college, cursor)
     
     context = {
         'faculty': faculty,
         'college': college,
-        'college_notifications': college_notifications,
-        'university_notifications': university_notifications,
+        'notifications': feed.items,
+        'cursor': cursor,
+        'next_cursor': feed.next_cursor,
     }
     return render(request, 'public/faculty/notifications.html', context)
 
@@ -1651,20 +1656,19 @@ def faculty_notifications(request):
 @principal_required
 def principal_notifications(request):
     """Principal views and manages notifications"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
-    college_notifications = ExamNotification.objects.filter(college=college)
-    university_notifications = ExamNotification.objects.filter(
-        notification_type='university',
-        is_active=True
-    )
+    cursor = request.GET.get('cursor')
+    page = notification_page(ExamNotification.objects.filter(college=college), cursor)
     
     context = {
         'faculty': faculty,
         'college': college,
-        'college_notifications': college_notifications,
-        'university_notifications': university_notifications,
+        'college_notifications': page.items,
+        'university_notifications': university_notifications(),
+        'cursor': cursor,
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'public/principal/notifications.html', context)
 
@@ -1673,7 +1677,7 @@ def principal_notifications(request):
 @principal_required
 def principal_add_notification(request):
     """Principal adds a college exam notification"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     if request.method == 'POST':
@@ -1712,40 +1716,12 @@ def principal_add_notification(request):
 @student_required
 def student_results(request):
     """Student views their exam results"""
-    student = request.user.studentprofile
-    
-    # Get all published exams for student's program
-    exams = UniversityExam.objects.filter(
-        program=student.program,
-        result_published=True
-    ).prefetch_related('subjects__results')
-    
-    exam_results = []
-    for exam in exams:
-        results = StudentResult.objects.filter(
-            student=student,
-            exam_subject__exam=exam
-        ).select_related('exam_subject__course')
-        
-        if results.exists():
-            total_marks = sum(r.marks_obtained or 0 for r in results)
-            max_marks = sum(r.exam_subject.max_marks for r in results)
-            percentage = round((total_marks / max_marks) * 100, 2) if max_marks > 0 else 0
-            all_pass = all(r.is_pass for r in results)
-            
-            exam_results.append({
-                'exam': exam,
-                'results': results,
-                'total_marks': total_marks,
-                'max_marks': max_marks,
-                'percentage': percentage,
-                'status': 'Pass' if all_pass else 'Fail'
-            })
+    student = request.ums.student
     
     context = {
         'student': student,
         'college': student.college,
-        'exam_results': exam_results,
+        'exam_results': result_sheet(student),
     }
     return render(request, 'public/student/results.html', context)
 
@@ -1758,15 +1734,11 @@ def student_results(request):
 @principal_required
 def principal_question_papers(request):
     """Principal views/downloads question papers"""
-    faculty = request.user.faculty_profile
+    faculty = request.ums.faculty
     college = faculty.college
     
     # Get released question papers
-    now = timezone.now()
-    papers = QuestionPaper.objects.filter(
-        status='released',
-        release_datetime__lte=now
-    ).select_related('exam_subject__exam', 'exam_subject__course')
+    papers = released_papers()
     
     context = {
         'faculty': faculty,
@@ -1780,26 +1752,9 @@ def principal_question_papers(request):
 @principal_required
 def principal_download_paper(request, paper_id):
     """Principal downloads a question paper"""
-    from academic.models import QuestionPaperDownload
-    
-    faculty = request.user.faculty_profile
-    college = faculty.college
-    
+    faculty = request.ums.faculty
     paper = get_object_or_404(QuestionPaper, pk=paper_id, status='released')
-    
-    # Log the download
-    QuestionPaperDownload.objects.create(
-        question_paper=paper,
-        college=college,
-        downloaded_by=request.user
-    )
-    paper.download_count += 1
-    paper.save()
-    
-    # Return the file
-    response = HttpResponse(paper.paper_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{paper.title}.pdf"'
-    return response
+    return serve_question_paper(request, paper, faculty.college)
 
 
 # ============================================================
@@ -1810,18 +1765,17 @@ def principal_download_paper(request, paper_id):
 @college_required
 def college_notifications(request):
     """College views notifications"""
-    college = request.user.college_profile
+    college = request.ums.college
     
-    college_notifications = ExamNotification.objects.filter(college=college)
-    university_notifications = ExamNotification.objects.filter(
-        notification_type='university',
-        is_active=True
-    )
+    cursor = request.GET.get('cursor')
+    page = notification_page(ExamNotification.objects.filter(college=college), cursor)
     
     context = {
         'college': college,
-        'college_notifications': college_notifications,
-        'university_notifications': university_notifications,
+        'college_notifications': page.items,
+        'university_notifications': university_notifications(),
+        'cursor': cursor,
+        'next_cursor': page.next_cursor,
     }
     return render(request, 'public/college/notifications.html', context)
 
@@ -1830,7 +1784,7 @@ def college_notifications(request):
 @college_required
 def college_add_notification(request):
     """College adds exam notification"""
-    college = request.user.college_profile
+    college = request.ums.college
     
     if request.method == 'POST':
         title = request.POST.get('title', '').strip()
@@ -1863,13 +1817,9 @@ def college_add_notification(request):
 @college_required
 def college_question_papers(request):
     """College views/downloads question papers"""
-    college = request.user.college_profile
+    college = request.ums.college
     
-    now = timezone.now()
-    papers = QuestionPaper.objects.filter(
-        status='released',
-        release_datetime__lte=now
-    ).select_related('exam_subject__exam', 'exam_subject__course')
+    papers = released_papers()
     
     context = {
         'college': college,
@@ -1882,23 +1832,8 @@ def college_question_papers(request):
 @college_required
 def college_download_paper(request, paper_id):
     """College downloads a question paper"""
-    from academic.models import QuestionPaperDownload
-    
-    college = request.user.college_profile
-    
     paper = get_object_or_404(QuestionPaper, pk=paper_id, status='released')
-    
-    QuestionPaperDownload.objects.create(
-        question_paper=paper,
-        college=college,
-        downloaded_by=request.user
-    )
-    paper.download_count += 1
-    paper.save()
-    
-    response = HttpResponse(paper.paper_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{paper.title}.pdf"'
-    return response
+    return serve_question_paper(request, paper, request.ums.college)
 
 
 # ============================================================
@@ -1912,13 +1847,6 @@ def get_semester_subjects(request):
     semester = request.GET.get('semester')
     
     if program_id and semester:
-        # Get subjects from ProgramSemesterCourse
-        psc_list = ProgramSemesterCourse.objects.filter(
-            program_id=program_id,
-            semester=semester
-        ).select_related('course')
-        
-        data = [{'id': psc.course.pk, 'code': psc.course.code, 'title': psc.course.title} for psc in psc_list]
-        return JsonResponse({'subjects': data})
+        return json_etag_response(request, catalog().semester_json('subjects', program_id, semester))
     
     return JsonResponse({'subjects': []})
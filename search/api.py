@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.urls import reverse
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .index import autocomplete
+
+
+CATALOG_ENTITIES = ('course', 'program')
+PEOPLE_ENTITIES = ('student', 'faculty', 'college')
+
+MIN_QUERY_LENGTH = 2
+MAX_LIMIT = 25
+
+# Detail pages linked from suggestions, by audience
+ADMIN_URLS = {
+    'student': 'adminpanel:student_edit',
+    'faculty': 'adminpanel:faculty_edit',
+    'college': 'adminpanel:college_detail',
+    'course': 'adminpanel:course_edit',
+    'program': 'adminpanel:program_detail',
+}
+COLLEGE_URLS = {
+    'student': 'public:college_view_student',
+    'faculty': 'public:college_view_faculty',
+}
+
+
+def _is_admin(request):
+    return request.user.is_staff or request.user.role == 'admin'
+
+
+def search_scopes(request):
+    """
+    Entities the caller may search, mapped to the college id they are
+    restricted to (None for unrestricted). Administrators see everything;
+    college and faculty users see people of their own college; everyone
+    else sees only the course catalog.
+    """
+    scopes = dict.fromkeys(CATALOG_ENTITIES)
+    if _is_admin(request):
+        scopes.update(dict.fromkeys(PEOPLE_ENTITIES))
+    elif request.ums.role in ('college', 'faculty') and request.ums.college_id:
+        scopes.update(dict.fromkeys(PEOPLE_ENTITIES, request.ums.college_id))
+    return scopes
+
+
+def _url_names(request):
+    if _is_admin(request):
+        return ADMIN_URLS
+    if request.ums.role == 'college':
+        return COLLEGE_URLS
+    return {}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def autocomplete_view(request):
+    """
+    Prefix suggestions across students, faculty, colleges, courses and
+    programs. Accepts ``q``, an optional comma-separated ``types`` filter
+    and ``limit``.
+    """
+    q = request.query_params.get('q', '').strip()
+    scopes = search_scopes(request)
+    types = request.query_params.get('types')
+    if types:
+        wanted = {t.strip() for t in types.split(',')}
+        scopes = {entity: college_id for entity, college_id in scopes.items() if entity in wanted}
+    default_limit = getattr(settings, 'UMS_AUTOCOMPLETE_LIMIT', 10)
+    try:
+        limit = int(request.query_params.get('limit', default_limit))
+    except ValueError:
+        limit = default_limit
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if len(q) < MIN_QUERY_LENGTH:
+        return Response({'query': q, 'results': []})
+
+    url_names = _url_names(request)
+    results = []
+    for result in autocomplete(q, scopes, limit):
+        url_name = url_names.get(result['type'])
+        results.append({**result, 'url': reverse(url_name, args=[result['id']]) if url_name else None})
+    return Response({'query': q, 'results': results})
@@ -0,0 +1,330 @@
+import hashlib
+import time
+from collections import namedtuple
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import SearchDocument, SearchTerm
+
+
+FTS_TABLE = 'search_searchdocument_fts'
+
+VERSION_KEY = 'ums:search-version'
+
+# Model and related fields loaded when building each entity's documents
+ENTITIES = {
+    'student': ('accounts', 'StudentProfile', ('user', 'college', 'department', 'program'), ()),
+    'faculty': ('accounts', 'FacultyProfile', ('user', 'college'), ('departments',)),
+    'college': ('accounts', 'College', ('user',), ()),
+    'course': ('academic', 'Course', ('department',), ()),
+    'program': ('academic', 'Program', ('department',), ()),
+}
+
+# Search text parts plus the label and detail line shown in autocomplete
+Document = namedtuple('Document', ['college_id', 'label', 'detail', 'parts'])
+
+MAX_TERM_LENGTH = 64
+
+
+def _body(parts):
+    return ' '.join(str(part) for part in parts if part).lower()
+
+
+def _terms(body):
+    return {term[:MAX_TERM_LENGTH] for term in body.split()}
+
+
+def _full_name(user):
+    # Historical models in migrations have no custom methods, so build the name here
+    return f"{user.first_name} {user.last_name}".strip() or user.email
+
+
+def _student_document(student):
+    user = student.user
+    return Document(
+        student.college_id,
+        _full_name(user),
+        user.email,
+        (
+            f"STU{student.pk:04d}",
+            user.first_name,
+            user.last_name,
+            user.email,
+            student.roll_number,
+            student.college and student.college.name,
+            student.department and student.department.name,
+            student.program and student.program.name,
+        ),
+    )
+
+
+def _faculty_document(faculty):
+    user = faculty.user
+    return Document(
+        faculty.college_id,
+        _full_name(user),
+        user.email,
+        (
+            f"FAC{faculty.pk:04d}",
+            user.first_name,
+            user.last_name,
+            user.email,
+            faculty.college and faculty.college.name,
+            *(department.name for department in faculty.departments.all()),
+        ),
+    )
+
+
+def _college_document(college):
+    return Document(
+        college.pk,
+        college.name,
+        college.code,
+        (college.name, college.code, college.email, college.user.email),
+    )
+
+
+def _course_document(course):
+    department = course.department and course.department.name
+    return Document(
+        None,
+        f"{course.code} - {course.title}",
+        department or '',
+        (course.code, course.title, department),
+    )
+
+
+def _program_document(program):
+    return Document(
+        None,
+        program.name,
+        program.department.name,
+        (program.name, program.department.name),
+    )
+
+
+BUILDERS = {
+    'student': _student_document,
+    'faculty': _faculty_document,
+    'college': _college_document,
+    'course': _course_document,
+    'program': _program_document,
+}
+
+
+def entity_queryset(entity, apps=global_apps):
+    app_label, model_name, related, prefetch = ENTITIES[entity]
+    model = apps.get_model(app_label, model_name)
+    return model.objects.select_related(*related).prefetch_related(*prefetch).order_by('pk')
+
+
+def bump_search_version():
+    """Invalidate cached autocomplete results"""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _write(documents, apps, batch_size, upsert):
+    model = apps.get_model('search', 'SearchDocument')
+    if not upsert:
+        model.objects.bulk_create(documents, batch_size=batch_size)
+        return
+    # MySQL upserts on any unique key and rejects an explicit conflict target
+    unique_fields = None
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields = ['entity', 'object_id']
+    model.objects.bulk_create(
+        documents,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=['college_id', 'body', 'label', 'detail', 'updated_at'],
+    )
+
+
+def _write_terms(entity, documents, apps, batch_size):
+    """Replace the prefix terms of a batch of freshly written documents"""
+    term_model = apps.get_model('search', 'SearchTerm')
+    # Upserts do not report primary keys on every backend, so look them up
+    ids = dict(
+        apps.get_model('search', 'SearchDocument').objects.filter(
+            entity=entity, object_id__in=[doc.object_id for doc in documents]
+        ).values_list('object_id', 'pk')
+    )
+    term_model.objects.filter(document_id__in=ids.values()).delete()
+    term_model.objects.bulk_create(
+        [
+            term_model(document_id=ids[doc.object_id], entity=entity, college_id=doc.college_id, term=term)
+            for doc in documents
+            for term in sorted(_terms(doc.body))
+        ],
+        batch_size=batch_size,
+    )
+
+
+def index_queryset(entity, queryset=None, apps=global_apps, batch_size=1000, upsert=True):
+    """
+    (Re)build the documents and prefix terms for every object in
+    ``queryset`` (all objects of the entity by default), writing them in
+    upsert batches, or plain inserts when ``upsert`` is False. Returns the
+    number of documents written.
+    """
+    model = apps.get_model('search', 'SearchDocument')
+    if queryset is None:
+        queryset = entity_queryset(entity, apps)
+    build = BUILDERS[entity]
+
+    def flush(batch):
+        _write(batch, apps, batch_size, upsert)
+        _write_terms(entity, batch, apps, batch_size)
+
+    written = 0
+    batch = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        document = build(obj)
+        batch.append(model(
+            entity=entity,
+            object_id=obj.pk,
+            college_id=document.college_id,
+            body=_body(document.parts),
+            label=document.label[:255],
+            detail=document.detail[:255],
+        ))
+        if len(batch) >= batch_size:
+            flush(batch)
+            written += len(batch)
+            batch = []
+    if batch:
+        flush(batch)
+        written += len(batch)
+    if written:
+        bump_search_version()
+    return written
+
+
+def index_objects(entity, ids):
+    """Refresh the documents of the given objects, dropping ones that no longer exist"""
+    ids = set(ids)
+    if not ids:
+        return
+    queryset = entity_queryset(entity).filter(pk__in=ids)
+    with transaction.atomic():
+        index_queryset(entity, queryset)
+        found = set(queryset.values_list('pk', flat=True))
+        if ids - found:
+            remove_objects(entity, ids - found)
+
+
+def remove_objects(entity, ids):
+    SearchDocument.objects.filter(entity=entity, object_id__in=list(ids)).delete()
+    bump_search_version()
+
+
+def rebuild_search_index(apps=global_apps, batch_size=1000):
+    """Recreate every search document. Returns the counts written per entity."""
+    model = apps.get_model('search', 'SearchDocument')
+    with transaction.atomic():
+        apps.get_model('search', 'SearchTerm').objects.all().delete()
+        model.objects.all().delete()
+        return {
+            entity: index_queryset(entity, apps=apps, batch_size=batch_size, upsert=False)
+            for entity in ENTITIES
+        }
+
+
+_fts_available = {}
+
+
+def _has_fts():
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts_available:
+        _fts_available[name] = FTS_TABLE in connection.introspection.table_names()
+    return _fts_available[name]
+
+
+def search_ids(entity, q, college=None):
+    """
+    Ids of ``entity`` objects whose search document contains ``q``, as a
+    subquery for ``pk__in``. Uses the FTS5 trigram table on SQLite and the
+    pg_trgm index on PostgreSQL; other backends fall back to a LIKE scan
+    of the single document table.
+    """
+    term = q.strip().lower()
+    documents = SearchDocument.objects.filter(entity=entity)
+    if college is not None:
+        documents = documents.filter(college_id=getattr(college, 'pk', college))
+
+    # The trigram tokenizer cannot match terms shorter than three characters
+    if connection.vendor == 'sqlite' and len(term) >= 3 and _has_fts():
+        documents = documents.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            ['"' + term.replace('"', '""') + '"']
+        ))
+    else:
+        documents = documents.filter(body__contains=term)
+    return documents.values('object_id')
+
+
+def _prefix_end(prefix):
+    """Smallest string sorting after every string that starts with ``prefix``"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def prefix_search(q, scopes, limit=10):
+    """
+    Documents with a word starting with the longest word of ``q`` and
+    containing the other words, as dicts of type, id, label and detail.
+
+    ``scopes`` maps each entity to search to a college id restricting it,
+    or None for no restriction. The prefix is matched as a range on the
+    term index rather than with LIKE, so the lookup stays an index seek on
+    every backend.
+    """
+    words = sorted(set(q.lower().split()), key=len, reverse=True)
+    if not words or not scopes:
+        return []
+    prefix = words[0][:MAX_TERM_LENGTH]
+
+    scope = Q()
+    for entity, college_id in scopes.items():
+        if college_id is None:
+            scope |= Q(entity=entity)
+        else:
+            scope |= Q(entity=entity, college_id=college_id)
+    terms = SearchTerm.objects.filter(scope, term__gte=prefix, term__lt=_prefix_end(prefix))
+    for word in words[1:]:
+        terms = terms.filter(document__body__contains=word)
+
+    # A document can match on several words, so over-fetch before de-duplicating
+    rows = terms.order_by('term', 'document_id').values_list(
+        'document_id', 'entity', 'document__object_id', 'document__label', 'document__detail'
+    )[:limit * 4]
+    results = {}
+    for document_id, entity, object_id, label, detail in rows:
+        if document_id not in results:
+            results[document_id] = {'type': entity, 'id': object_id, 'label': label, 'detail': detail}
+            if len(results) == limit:
+                break
+    return list(results.values())
+
+
+def autocomplete(q, scopes, limit=10):
+    """
+    ``prefix_search`` cached per scope, query and limit for
+    UMS_AUTOCOMPLETE_TTL seconds. Any index write starts a new cache
+    generation, so cached suggestions never outlive the data.
+    """
+    q = ' '.join(q.lower().split())
+    scope = ','.join(f'{entity}={college_id}' for entity, college_id in sorted(scopes.items()))
+    version = cache.get(VERSION_KEY, 0)
+    digest = hashlib.md5(f'{scope}|{limit}|{q}'.encode()).hexdigest()
+    key = f'ums:autocomplete:{version}:{digest}'
+    results = cache.get(key)
+    if results is None:
+        results = prefix_search(q, scopes, limit)
+        cache.set(key, results, getattr(settings, 'UMS_AUTOCOMPLETE_TTL', 60))
+    return results
@@ -0,0 +1,137 @@
+# Generated by Django 6.0 on 2026-10-17 07:40
+
+from django.db import migrations, models
+
+
+FTS_TABLE = 'search_searchdocument_fts'
+
+SQLITE_FTS = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(body, content='search_searchdocument', content_rowid='id', tokenize='trigram')",
+    f"""CREATE TRIGGER search_searchdocument_ai AFTER INSERT ON search_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END""",
+    f"""CREATE TRIGGER search_searchdocument_ad AFTER DELETE ON search_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+    END""",
+    f"""CREATE TRIGGER search_searchdocument_au AFTER UPDATE ON search_searchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, body) VALUES ('delete', old.id, old.body);
+        INSERT INTO {FTS_TABLE}(rowid, body) VALUES (new.id, new.body);
+    END""",
+]
+
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS search_searchdocument_ai",
+    "DROP TRIGGER IF EXISTS search_searchdocument_ad",
+    "DROP TRIGGER IF EXISTS search_searchdocument_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_TRGM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX searchdoc_body_trgm_idx ON search_searchdocument USING gin (body gin_trgm_ops)",
+]
+
+POSTGRES_TRGM_DROP = [
+    "DROP INDEX IF EXISTS searchdoc_body_trgm_idx",
+]
+
+
+def create_text_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        # The trigram tokenizer needs SQLite 3.34+; older versions fall back to LIKE
+        if connection.Database.sqlite_version_info >= (3, 34, 0):
+            for sql in SQLITE_FTS:
+                schema_editor.execute(sql)
+    elif connection.vendor == 'postgresql':
+        for sql in POSTGRES_TRGM:
+            schema_editor.execute(sql)
+
+
+def drop_text_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for sql in SQLITE_FTS_DROP:
+            schema_editor.execute(sql)
+    elif connection.vendor == 'postgresql':
+        for sql in POSTGRES_TRGM_DROP:
+            schema_editor.execute(sql)
+
+
+def _body(*parts):
+    return ' '.join(str(part) for part in parts if part).lower()
+
+
+def _documents(apps):
+    """(entity, object id, college id, body) of every object, as indexed by this migration"""
+    for student in apps.get_model('accounts', 'StudentProfile').objects.select_related(
+        'user', 'college', 'department', 'program'
+    ):
+        yield 'student', student.pk, student.college_id, _body(
+            f"STU{student.pk:04d}",
+            student.user.first_name,
+            student.user.last_name,
+            student.user.email,
+            student.roll_number,
+            student.college and student.college.name,
+            student.department and student.department.name,
+            student.program and student.program.name,
+        )
+    for faculty in apps.get_model('accounts', 'FacultyProfile').objects.select_related(
+        'user', 'college'
+    ).prefetch_related('departments'):
+        yield 'faculty', faculty.pk, faculty.college_id, _body(
+            f"FAC{faculty.pk:04d}",
+            faculty.user.first_name,
+            faculty.user.last_name,
+            faculty.user.email,
+            faculty.college and faculty.college.name,
+            *(department.name for department in faculty.departments.all()),
+        )
+    for college in apps.get_model('accounts', 'College').objects.select_related('user'):
+        yield 'college', college.pk, college.pk, _body(college.name, college.code, college.email, college.user.email)
+    for course in apps.get_model('academic', 'Course').objects.select_related('department'):
+        yield 'course', course.pk, None, _body(course.code, course.title, course.department and course.department.name)
+
+
+def populate_documents(apps, schema_editor):
+    # Built from historical models here rather than by search.index, which
+    # follows the current schema
+    model = apps.get_model('search', 'SearchDocument')
+    model.objects.bulk_create(
+        (
+            model(entity=entity, object_id=object_id, college_id=college_id, body=body)
+            for entity, object_id, college_id, body in _documents(apps)
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('accounts', '0009_studentprofile_semester'),
+        ('academic', '0005_examnotification_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('student', 'Student'), ('faculty', 'Faculty'), ('college', 'College'), ('course', 'Course')], max_length=16)),
+                ('object_id', models.BigIntegerField()),
+                ('college_id', models.BigIntegerField(blank=True, null=True)),
+                ('body', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity', 'college_id'], name='searchdoc_entity_college_idx')],
+                'unique_together': {('entity', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
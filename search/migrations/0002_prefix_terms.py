@@ -0,0 +1,131 @@
+# Generated by Django 6.0 on 2026-10-17 09:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+MAX_TERM_LENGTH = 64
+
+
+def _body(parts):
+    return ' '.join(str(part) for part in parts if part).lower()
+
+
+def _full_name(user):
+    return f"{user.first_name} {user.last_name}".strip() or user.email
+
+
+def _documents(apps):
+    """(entity, object id, college id, label, detail, parts) of every object, as indexed by this migration"""
+    for student in apps.get_model('accounts', 'StudentProfile').objects.select_related(
+        'user', 'college', 'department', 'program'
+    ):
+        user = student.user
+        yield 'student', student.pk, student.college_id, _full_name(user), user.email, (
+            f"STU{student.pk:04d}",
+            user.first_name,
+            user.last_name,
+            user.email,
+            student.roll_number,
+            student.college and student.college.name,
+            student.department and student.department.name,
+            student.program and student.program.name,
+        )
+    for faculty in apps.get_model('accounts', 'FacultyProfile').objects.select_related(
+        'user', 'college'
+    ).prefetch_related('departments'):
+        user = faculty.user
+        yield 'faculty', faculty.pk, faculty.college_id, _full_name(user), user.email, (
+            f"FAC{faculty.pk:04d}",
+            user.first_name,
+            user.last_name,
+            user.email,
+            faculty.college and faculty.college.name,
+            *(department.name for department in faculty.departments.all()),
+        )
+    for college in apps.get_model('accounts', 'College').objects.select_related('user'):
+        yield 'college', college.pk, college.pk, college.name, college.code, (
+            college.name, college.code, college.email, college.user.email,
+        )
+    for course in apps.get_model('academic', 'Course').objects.select_related('department'):
+        department = course.department and course.department.name
+        yield 'course', course.pk, None, f"{course.code} - {course.title}", department or '', (
+            course.code, course.title, department,
+        )
+    for program in apps.get_model('academic', 'Program').objects.select_related('department'):
+        yield 'program', program.pk, None, program.name, program.department.name, (
+            program.name, program.department.name,
+        )
+
+
+def populate_documents(apps, schema_editor):
+    # Built from historical models here rather than by search.index, which
+    # follows the current schema
+    document_model = apps.get_model('search', 'SearchDocument')
+    term_model = apps.get_model('search', 'SearchTerm')
+    document_model.objects.all().delete()
+    document_model.objects.bulk_create(
+        (
+            document_model(
+                entity=entity,
+                object_id=object_id,
+                college_id=college_id,
+                body=_body(parts),
+                label=label[:255],
+                detail=detail[:255],
+            )
+            for entity, object_id, college_id, label, detail, parts in _documents(apps)
+        ),
+        batch_size=1000,
+    )
+    # Read back rather than taken from bulk_create, which does not set
+    # primary keys on every backend
+    term_model.objects.bulk_create(
+        (
+            term_model(document_id=pk, entity=entity, college_id=college_id, term=term)
+            for pk, entity, college_id, body in document_model.objects.values_list(
+                'pk', 'entity', 'college_id', 'body'
+            ).iterator()
+            for term in sorted({term[:MAX_TERM_LENGTH] for term in body.split()})
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchdocument',
+            name='detail',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='searchdocument',
+            name='label',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='searchdocument',
+            name='entity',
+            field=models.CharField(choices=[('student', 'Student'), ('faculty', 'Faculty'), ('college', 'College'), ('course', 'Course'), ('program', 'Program')], max_length=16),
+        ),
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(choices=[('student', 'Student'), ('faculty', 'Faculty'), ('college', 'College'), ('course', 'Course'), ('program', 'Program')], max_length=16)),
+                ('college_id', models.BigIntegerField(blank=True, null=True)),
+                ('term', models.CharField(max_length=64)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='search.searchdocument')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity', 'term'], name='searchterm_entity_term_idx'), models.Index(fields=['college_id', 'entity', 'term'], name='searchterm_college_term_idx')],
+            },
+        ),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
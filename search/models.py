@@ -0,0 +1,55 @@
+from django.db import models
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, lower-cased search text for one student, faculty member,
+    college, course or program. Listing searches match against ``body`` through a
+    backend-specific substring index instead of OR-ing icontains lookups
+    across joined tables.
+    """
+    ENTITY_CHOICES = (
+        ('student', 'Student'),
+        ('faculty', 'Faculty'),
+        ('college', 'College'),
+        ('course', 'Course'),
+        ('program', 'Program'),
+    )
+
+    entity = models.CharField(max_length=16, choices=ENTITY_CHOICES)
+    object_id = models.BigIntegerField()
+    college_id = models.BigIntegerField(null=True, blank=True)
+    body = models.TextField()
+    label = models.CharField(max_length=255, blank=True)
+    detail = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('entity', 'object_id')
+        indexes = [
+            models.Index(fields=['entity', 'college_id'], name='searchdoc_entity_college_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity}:{self.object_id}"
+
+
+class SearchTerm(models.Model):
+    """
+    One word of a search document, indexed for prefix lookups. Entity and
+    college are copied from the document so autocomplete can range-scan a
+    single B-tree index without joining.
+    """
+    document = models.ForeignKey(SearchDocument, on_delete=models.CASCADE, related_name='terms')
+    entity = models.CharField(max_length=16, choices=SearchDocument.ENTITY_CHOICES)
+    college_id = models.BigIntegerField(null=True, blank=True)
+    term = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['entity', 'term'], name='searchterm_entity_term_idx'),
+            models.Index(fields=['college_id', 'entity', 'term'], name='searchterm_college_term_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
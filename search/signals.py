@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from accounts.models import College, FacultyProfile, StudentProfile
+from academic.models import Course, Department, Program
+
+from .index import index_objects, index_queryset, entity_queryset, remove_objects
+
+
+ENTITY_MODELS = {
+    StudentProfile: 'student',
+    FacultyProfile: 'faculty',
+    College: 'college',
+    Course: 'course',
+    Program: 'program',
+}
+
+# Documents that embed a related object's name, by the relation leading to it
+DEPENDENTS = {
+    College: (('student', 'college'), ('faculty', 'college')),
+    Department: (('student', 'department'), ('faculty', 'departments'), ('course', 'department'), ('program', 'department')),
+    Program: (('student', 'program'),),
+}
+
+# User saves that touch none of the indexed columns
+UNINDEXED_USER_FIELDS = {'last_login', 'password'}
+
+
+def entity_saved(sender, instance, **kwargs):
+    index_objects(ENTITY_MODELS[sender], [instance.pk])
+
+
+def entity_deleted(sender, instance, **kwargs):
+    remove_objects(ENTITY_MODELS[sender], [instance.pk])
+
+
+for model in ENTITY_MODELS:
+    post_save.connect(entity_saved, sender=model, dispatch_uid=f'search_saved_{model.__name__}')
+    post_delete.connect(entity_deleted, sender=model, dispatch_uid=f'search_deleted_{model.__name__}')
+
+
+def name_before_save(sender, instance, **kwargs):
+    old_name = None
+    if instance.pk:
+        old_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+    instance._search_renamed = old_name is not None and old_name != instance.name
+
+
+def reindex_dependents(sender, instance, **kwargs):
+    if not getattr(instance, '_search_renamed', False):
+        return
+    for entity, field in DEPENDENTS[sender]:
+        index_queryset(entity, entity_queryset(entity).filter(**{field: instance.pk}).distinct())
+
+
+def dependents_before_delete(sender, instance, **kwargs):
+    instance._search_dependents = [
+        (entity, list(entity_queryset(entity).filter(**{field: instance.pk}).values_list('pk', flat=True)))
+        for entity, field in DEPENDENTS[sender]
+    ]
+
+
+def reindex_former_dependents(sender, instance, **kwargs):
+    for entity, ids in getattr(instance, '_search_dependents', ()):
+        index_objects(entity, ids)
+
+
+for model in DEPENDENTS:
+    pre_save.connect(name_before_save, sender=model, dispatch_uid=f'search_rename_{model.__name__}')
+    post_save.connect(reindex_dependents, sender=model, dispatch_uid=f'search_dependents_{model.__name__}')
+    pre_delete.connect(dependents_before_delete, sender=model, dispatch_uid=f'search_dependents_delete_{model.__name__}')
+    post_delete.connect(reindex_former_dependents, sender=model, dispatch_uid=f'search_dependents_deleted_{model.__name__}')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= UNINDEXED_USER_FIELDS):
+        return
+    for model, entity in ENTITY_MODELS.items():
+        if model not in (Course, Program):
+            index_queryset(entity, entity_queryset(entity).filter(user=instance))
+
+
+@receiver(m2m_changed, sender=FacultyProfile.departments.through)
+def faculty_departments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # post_clear from the department side does not report the faculty
+        # ids, and by then the memberships that would find them are gone
+        instance._search_cleared_faculty = list(instance.faculty.values_list('pk', flat=True))
+        return
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        index_objects('faculty', [instance.pk])
+    elif action == 'post_clear':
+        index_objects('faculty', getattr(instance, '_search_cleared_faculty', ()))
+    elif pk_set:
+        index_objects('faculty', pk_set)
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import api
+
+app_name = "search"
+
+urlpatterns = [
+    path('autocomplete/', api.autocomplete_view, name='autocomplete'),
+]
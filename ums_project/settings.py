@@ -29,16 +29,19 @@ INSTALLED_APPS = [
     'attendance',
     'adminpanel',
     'public',
+    'search',
     'widget_tweaks',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'adminpanel.metrics.RequestMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.UMSContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -47,7 +50,8 @@ ROOT_URLCONF = 'ums_project.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to the request metrics
+        'BACKEND': 'adminpanel.metrics.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -89,6 +93,23 @@ else:
         }
     }
 
+# Cache - version stamps that invalidate cached catalogs, stats and result
+# sheets must be seen by every worker, so deployments set REDIS_URL. The
+# in-memory fallback is per process and only suits a single dev server.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -115,11 +136,103 @@ LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/login-redirect/'
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 
+# Longest a process serves its in-memory academic catalog before rebuilding it,
+# in case a change was made where this process cannot see the version stamp
+UMS_CATALOG_TTL = 60
+
+# Seconds dashboard counters are cached; model signals also invalidate them
+UMS_STATS_TTL = 60
+
+# Question paper download log rows that queue up behind a write in progress
+# are inserted in batches of this size
+UMS_DOWNLOAD_LOG_BATCH_SIZE = 50
+
+# Seconds the released question paper listing is cached (never past the next release)
+UMS_PAPER_LIST_TTL = 300
+
+# Longest sleep between checks of the release_question_papers --loop worker
+UMS_PAPER_RELEASE_INTERVAL = 60
+
+# Seconds a student's assembled result sheet is cached; publishing results
+# or editing published marks invalidates every sheet sooner where the cache
+# is shared, so this only bounds staleness in other processes
+UMS_RESULT_SHEET_TTL = 300
+
+# Students whose GPA rows are read and written per batch when SGPA/CGPA are recomputed
+UMS_GPA_BATCH_SIZE = 500
+
+# Rows read and written per batch by the result publication pipeline
+UMS_RESULT_SNAPSHOT_BATCH_SIZE = 2000
+
+# Notifications shown per page of the cursor-paginated notification feeds
+UMS_NOTIFICATIONS_PER_PAGE = 20
+
+# Seconds the university-wide notification list is cached; editing a notice
+# invalidates it sooner
+UMS_NOTIFICATIONS_TTL = 60
+
+# Listing counts: exact counts are cached for UMS_COUNT_CACHE_TTL seconds;
+# on PostgreSQL planner estimates are used above UMS_COUNT_ESTIMATE_THRESHOLD rows
+UMS_COUNT_CACHE_TTL = 300
+UMS_COUNT_ESTIMATE_THRESHOLD = 10000
+
+# Autocomplete API: suggestions returned by default and seconds a prefix stays cached
+UMS_AUTOCOMPLETE_LIMIT = 10
+UMS_AUTOCOMPLETE_TTL = 60
+
+# Rows fetched per database round trip and written per chunk by CSV/XLSX exports
+UMS_EXPORT_CHUNK_SIZE = 2000
+
+# Bulk imports: rows inserted per batch, and processes hashing passwords (None uses every core)
+UMS_IMPORT_CHUNK_SIZE = 500
+UMS_IMPORT_HASH_WORKERS = None
+
+# Request metrics: latest samples kept per URL name (per process), and how many
+# runs of one statement in a request are logged as duplicate (likely N+1) queries
+UMS_METRICS_ENABLED = os.environ.get('UMS_METRICS_ENABLED', 'True') in ('True', '1')
+UMS_METRICS_WINDOW = 500
+UMS_METRICS_DUPLICATE_THRESHOLD = 3
+
+# Query budgets per URL name; a warning is logged when a request exceeds its budget
+UMS_QUERY_BUDGET_DEFAULT = 30
+UMS_QUERY_BUDGETS = {
+    'adminpanel:dashboard': 15,
+    'adminpanel:students': 12,
+    'adminpanel:faculty': 12,
+    'adminpanel:colleges': 12,
+    'adminpanel:program_detail': 8,
+    'public:college_dashboard': 15,
+    'public:principal_dashboard': 15,
+    'public:hod_dashboard': 15,
+    'public:faculty_dashboard': 15,
+    'public:student_dashboard': 15,
+    'public:get_semester_subjects': 4,
+    'adminpanel:get_program_courses': 4,
+    'adminpanel:get_exam_subjects': 5,
+    'search:autocomplete': 5,
+}
+
 # Use email for authentication
 AUTHENTICATION_BACKENDS = [
     'accounts.backends.EmailBackend',
 ]
 
+# One JSON line per request on the ums.requests logger
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'ums': {
+            'handlers': ['console'],
+            'level': os.environ.get('UMS_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Development: print emails to console
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
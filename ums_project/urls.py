@@ -7,9 +7,10 @@ from django.contrib.auth.decorators import login_required
 def login_redirect_view(request):
     """Redirect users to appropriate dashboard based on their role"""
     user = request.user
+    ums = request.ums
     
     # College users
-    if user.role == 'college' and hasattr(user, 'college_profile'):
+    if ums.role == 'college' and ums.profile is not None:
         return redirect('public:college_dashboard')
     
     # Admin users
@@ -17,15 +18,14 @@ def login_redirect_view(request):
         return redirect('adminpanel:dashboard')
     
     # Student users
-    elif user.role == 'student' and hasattr(user, 'studentprofile'):
+    elif ums.role == 'student' and ums.profile is not None:
         return redirect('public:student_dashboard')
     
     # Faculty users (check designation for HOD/Principal)
-    elif user.role == 'faculty' and hasattr(user, 'faculty_profile'):
-        faculty = user.faculty_profile
-        if faculty.designation == 'principal':
+    elif ums.role == 'faculty' and ums.profile is not None:
+        if ums.is_principal:
             return redirect('public:principal_dashboard')
-        elif faculty.designation == 'hod':
+        elif ums.is_hod:
             return redirect('public:hod_dashboard')
         else:
             return redirect('public:faculty_dashboard')
@@ -39,6 +39,7 @@ urlpatterns = [
     path('accounts/', include('django.contrib.auth.urls')),
     path('dashboard/', include('adminpanel.urls')),
     path('login-redirect/', login_redirect_view, name='login_redirect'),
+    path('api/search/', include('search.urls')),
     path('', include('public.urls')),
 ]
 